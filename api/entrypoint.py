@@ -36,9 +36,22 @@ from oss.src.dbs.secrets.dao import SecretsDAO
 from oss.src.core.secrets.services import VaultService
 from oss.src.apis.fastapi.vault.router import VaultRouter
 from oss.src.services.auth_helper import authentication_middleware
+from oss.src.services.auth_cache import last_used_writer
 from oss.src.services.analytics_service import analytics_middleware
+from oss.src.apis.fastapi.shared.utils import RequestScopeMiddleware
+from oss.src.dbs.postgres.shared.engine import engine
 from oss.src.dbs.postgres.observability.dao import ObservabilityDAO
 from oss.src.core.observability.service import ObservabilityService
+from oss.src.core.observability.queue import IngestionQueue, OTLP_QUEUE_ENABLED
+from oss.src.core.observability.cache import TraceCache, TRACE_CACHE_ENABLED
+from oss.src.apis.fastapi.observability.executor import (
+    OTLPExecutor,
+    OTLP_EXECUTOR_ENABLED,
+)
+from oss.src.core.observability.retention import (
+    RetentionJob,
+    NODES_MAINTENANCE_ENABLED,
+)
 from oss.src.apis.fastapi.observability.router import ObservabilityRouter
 
 
@@ -68,12 +81,37 @@ async def lifespan(application: FastAPI, cache=True):
     """
     await check_for_new_migrations()
 
+    await last_used_writer.start()
+
+    if otlp_executor:
+        await otlp_executor.start()
+
+    if ingestion_queue:
+        await ingestion_queue.start()
+
+    if retention_job:
+        await retention_job.start()
+
     yield
 
+    if retention_job:
+        await retention_job.stop()
+
+    if ingestion_queue:
+        await ingestion_queue.stop()
+
+    if otlp_executor:
+        await otlp_executor.stop()
+
+    await last_used_writer.stop()
+
+    await engine.close()
+
 
 app = FastAPI(lifespan=lifespan, openapi_tags=open_api_tags_metadata)
 app.middleware("http")(authentication_middleware)
 app.middleware("http")(analytics_middleware)
+app.add_middleware(RequestScopeMiddleware)
 
 if is_ee():
     import ee.src.main as ee
@@ -123,7 +161,19 @@ app.include_router(workspace_router.router, prefix="/workspaces", tags=["Workspa
 
 
 vault_router = VaultRouter(VaultService(SecretsDAO()))
-observability = ObservabilityRouter(ObservabilityService(ObservabilityDAO()))
+trace_cache = TraceCache() if TRACE_CACHE_ENABLED else None
+observability_service = ObservabilityService(ObservabilityDAO(), trace_cache)
+ingestion_queue = IngestionQueue(observability_service) if OTLP_QUEUE_ENABLED else None
+retention_job = (
+    RetentionJob(observability_service) if NODES_MAINTENANCE_ENABLED else None
+)
+otlp_executor = OTLPExecutor() if OTLP_EXECUTOR_ENABLED else None
+observability = ObservabilityRouter(
+    observability_service,
+    ingestion_queue,
+    otlp_executor,
+    trace_cache,
+)
 
 app.include_router(router=observability.otlp, prefix="/otlp", tags=["Observability"])
 app.include_router(
@@ -0,0 +1,212 @@
+"""partition_nodes_dbe_by_created_at
+
+Revision ID: c1e0a9f3d7b4
+Revises: 8a7d1c4e9b52
+Create Date: 2025-04-14 11:03:52.640187
+
+Downtime: nodes is rewritten inside the migration transaction, which holds an
+exclusive lock on it until the copy, the primary key and the indexes are done.
+Tracing reads and writes block meanwhile, for a time proportional to the size
+of nodes, so pause ingestion or plan a maintenance window on large installs.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c1e0a9f3d7b4"
+down_revision: Union[str, None] = "8a7d1c4e9b52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PARTITIONS_AHEAD = 4  # weeks, then created by the maintenance job
+
+
+def create_indexes() -> None:
+    op.create_index(
+        "index_project_id_tree_id",
+        "nodes",
+        ["project_id", "tree_id"],
+        unique=False,
+    )
+    op.create_index(
+        "index_project_id_root_id",
+        "nodes",
+        ["project_id", "root_id"],
+        unique=False,
+    )
+    op.create_index(
+        "index_project_id_node_id",
+        "nodes",
+        ["project_id", "created_at"],
+        unique=False,
+    )
+    op.create_index(
+        "index_project_id_acc_costs_total",
+        "nodes",
+        ["project_id", "acc_costs_total"],
+        unique=False,
+    )
+    op.create_index(
+        "index_project_id_acc_duration_total",
+        "nodes",
+        ["project_id", "acc_duration_total"],
+        unique=False,
+    )
+    op.create_index(
+        "index_project_id_acc_tokens_total",
+        "nodes",
+        ["project_id", "acc_tokens_total"],
+        unique=False,
+    )
+    op.create_index(
+        "index_project_id_created_at_is_error",
+        "nodes",
+        ["project_id", "created_at"],
+        unique=False,
+        postgresql_where=sa.text("is_error"),
+    )
+    op.create_index(
+        "index_content_trgm",
+        "nodes",
+        ["content"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"content": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "index_refs_gin",
+        "nodes",
+        ["refs"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"refs": "jsonb_path_ops"},
+    )
+    op.create_index(
+        "index_meta_gin",
+        "nodes",
+        ["meta"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE nodes RENAME TO nodes_unpartitioned;")
+
+    op.execute(
+        """
+        CREATE TABLE nodes (
+            LIKE nodes_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+        ) PARTITION BY RANGE (created_at);
+        """
+    )
+
+    # WEEKLY PARTITIONS, FROM THE OLDEST NODE UNTIL A FEW WEEKS AHEAD
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            start TIMESTAMPTZ;
+        BEGIN
+            SELECT date_trunc('week', COALESCE(min(created_at), now()), 'UTC')
+            INTO start
+            FROM nodes_unpartitioned;
+
+            WHILE start < date_trunc('week', now(), 'UTC')
+                + INTERVAL '{PARTITIONS_AHEAD + 1} weeks'
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE nodes_p%s PARTITION OF nodes '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    to_char(start AT TIME ZONE 'UTC', 'YYYYMMDD'),
+                    start,
+                    start + INTERVAL '1 week'
+                );
+
+                start := start + INTERVAL '1 week';
+            END LOOP;
+        END $$;
+        """
+    )
+
+    # SAFETY NET FOR NODES OUTSIDE OF THE MAINTAINED PARTITIONS
+    op.execute("CREATE TABLE nodes_default PARTITION OF nodes DEFAULT;")
+
+    # COPIED ONE WEEK AT A TIME, SO THAT NO STATEMENT BUFFERS THE WHOLE TABLE
+    op.execute("CREATE INDEX ON nodes_unpartitioned (created_at);")
+
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            start TIMESTAMPTZ;
+            stop TIMESTAMPTZ;
+        BEGIN
+            SELECT date_trunc('week', min(created_at), 'UTC'), max(created_at)
+            INTO start, stop
+            FROM nodes_unpartitioned;
+
+            WHILE start <= stop
+            LOOP
+                INSERT INTO nodes
+                SELECT * FROM nodes_unpartitioned
+                WHERE created_at >= start
+                AND created_at < start + INTERVAL '1 week';
+
+                start := start + INTERVAL '1 week';
+            END LOOP;
+        END $$;
+        """
+    )
+
+    op.execute(
+        "INSERT INTO nodes SELECT * FROM nodes_unpartitioned WHERE created_at IS NULL;"
+    )
+
+    op.execute("DROP TABLE nodes_unpartitioned;")
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_primary_key(
+        "nodes_pkey",
+        "nodes",
+        ["project_id", "node_id", "created_at"],
+    )
+    create_indexes()
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE nodes RENAME TO nodes_partitioned;")
+
+    op.execute(
+        """
+        CREATE TABLE nodes (
+            LIKE nodes_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+        );
+        """
+    )
+
+    # KEEPS THE LATEST COPY OF NODES STORED MORE THAN ONCE
+    op.execute(
+        """
+        INSERT INTO nodes
+        SELECT DISTINCT ON (project_id, node_id) *
+        FROM nodes_partitioned
+        ORDER BY project_id, node_id, created_at DESC;
+        """
+    )
+
+    op.execute("DROP TABLE nodes_partitioned CASCADE;")
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_primary_key(
+        "nodes_pkey",
+        "nodes",
+        ["project_id", "node_id"],
+    )
+    create_indexes()
+    # ### end Alembic commands ###
@@ -0,0 +1,120 @@
+import os
+from functools import partial
+from typing import List, Optional
+from asyncio import get_running_loop, gather
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+
+from oss.src.utils.logging import get_module_logger
+from oss.src.core.observability.dtos import SpanDTO
+from oss.src.apis.fastapi.observability.opentelemetry.otlp import parse_otlp_stream
+from oss.src.apis.fastapi.observability.utils import parse_from_otel_span_dto
+
+log = get_module_logger(__file__)
+
+# ENV VARS
+OTLP_EXECUTOR_ENABLED = os.getenv("AGENTA_OTLP_EXECUTOR_ENABLED", "true") == "true"
+OTLP_EXECUTOR_WORKERS = int(os.getenv("AGENTA_OTLP_EXECUTOR_WORKERS", "2"))
+OTLP_EXECUTOR_THRESHOLD = int(
+    os.getenv("AGENTA_OTLP_EXECUTOR_THRESHOLD", str(256 * 1024))  # bytes
+)
+
+
+def parse_otlp_payload(
+    otlp_stream: bytes,
+) -> List[SpanDTO]:
+    """
+    Decompresses, decodes and converts an OTLP payload into span DTOs.
+
+    Runs in the worker processes, so it must stay a picklable top-level function.
+    Span DTOs travel back pickled, and are restored without validation.
+    """
+    return [
+        parse_from_otel_span_dto(otel_span)
+        for otel_span in parse_otlp_stream(otlp_stream)
+    ]
+
+
+class OTLPExecutor:
+    """
+    Process pool that keeps CPU-bound OTLP parsing off the event loop.
+
+    Payloads below the threshold are parsed inline, since the round-trip to a
+    worker process would cost more than the parsing itself.
+
+    Workers are spawned, not forked, so that they do not inherit the event
+    loop, the database pools or the locks of the API process, and are warmed
+    up on start, so that the first large payload does not pay for the imports.
+    Every API process has its own pool, hence the small default.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = OTLP_EXECUTOR_WORKERS,
+        threshold: int = OTLP_EXECUTOR_THRESHOLD,
+    ):
+        self.workers = workers
+        self.threshold = threshold
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    def offloads(
+        self,
+        otlp_stream: bytes,
+    ) -> bool:
+        return self.running and len(otlp_stream) >= self.threshold
+
+    async def start(self) -> None:
+        if self.running:
+            return
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+        )
+
+        await gather(
+            *[
+                get_running_loop().run_in_executor(self._pool, parse_otlp_payload, b"")
+                for _ in range(self.workers)
+            ]
+        )
+
+        log.info(
+            "OTLP executor started with %s worker(s) for payloads above %s bytes",
+            self.workers,
+            self.threshold,
+        )
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+
+        # NEW PAYLOADS ARE PARSED INLINE FROM NOW ON
+        pool, self._pool = self._pool, None
+
+        # WAITING ON THE WORKERS BLOCKS, SO NOT ON THE EVENT LOOP
+        await get_running_loop().run_in_executor(
+            None,
+            partial(pool.shutdown, wait=True, cancel_futures=True),
+        )
+
+        log.info("OTLP executor stopped")
+
+    async def parse(
+        self,
+        otlp_stream: bytes,
+    ) -> List[SpanDTO]:
+        if not self.offloads(otlp_stream):
+            return parse_otlp_payload(otlp_stream)
+
+        return await get_running_loop().run_in_executor(
+            self._pool,
+            parse_otlp_payload,
+            otlp_stream,
+        )
@@ -0,0 +1,146 @@
+from json import dumps
+from typing import Any, AsyncIterator, Dict, List
+
+from oss.src.core.observability.dtos import SpanDTO
+from oss.src.apis.fastapi.observability.utils import parse_to_agenta_span_dto
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+
+EXPORT_BATCH_SIZE = 1000  # spans per Arrow record batch
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+async def export_ndjson(
+    span_dtos: AsyncIterator[SpanDTO],
+) -> AsyncIterator[bytes]:
+    async for span_dto in span_dtos:
+        span_dto = parse_to_agenta_span_dto(span_dto)
+
+        yield span_dto.model_dump_json(exclude_none=True).encode() + b"\n"
+
+
+# --- ARROW ---
+
+
+_ARROW_COLUMNS = (
+    "created_at",
+    "root_id",
+    "tree_id",
+    "tree_type",
+    "node_id",
+    "node_type",
+    "node_name",
+    "parent_id",
+    "time_start",
+    "time_end",
+    "status_code",
+    "status_message",
+    "exception",
+    "data",
+    "metrics",
+    "meta",
+    "refs",
+)
+
+_ARROW_JSON_COLUMNS = ("exception", "data", "metrics", "meta", "refs")
+
+
+def _arrow_schema():
+    timestamp = pyarrow.timestamp("us", tz="UTC")
+
+    return pyarrow.schema(
+        [
+            (
+                (column, timestamp)
+                if column in ("created_at", "time_start", "time_end")
+                else (column, pyarrow.string())
+            )
+            for column in _ARROW_COLUMNS
+        ]
+    )
+
+
+def _arrow_row(
+    span_dto: SpanDTO,
+) -> Dict[str, Any]:
+    span = span_dto.model_dump(mode="json")
+
+    row = {
+        "created_at": span_dto.lifecycle.created_at if span_dto.lifecycle else None,
+        "root_id": span["root"]["id"],
+        "tree_id": span["tree"]["id"],
+        "tree_type": span["tree"].get("type"),
+        "node_id": span["node"]["id"],
+        "node_type": span["node"].get("type"),
+        "node_name": span["node"]["name"],
+        "parent_id": span["parent"]["id"] if span.get("parent") else None,
+        "time_start": span_dto.time.start,
+        "time_end": span_dto.time.end,
+        "status_code": span["status"].get("code"),
+        "status_message": span["status"].get("message"),
+    }
+
+    for column in _ARROW_JSON_COLUMNS:
+        row[column] = dumps(span[column]) if span.get(column) is not None else None
+
+    return row
+
+
+class _ArrowSink:
+    """File-like object collecting what the IPC writer emits."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+
+        self.chunks = []
+
+        return data
+
+
+async def export_arrow(
+    span_dtos: AsyncIterator[SpanDTO],
+) -> AsyncIterator[bytes]:
+    schema = _arrow_schema()
+    sink = _ArrowSink()
+    writer = pyarrow.ipc.new_stream(sink, schema)
+
+    rows: List[Dict[str, Any]] = []
+
+    async for span_dto in span_dtos:
+        rows.append(_arrow_row(parse_to_agenta_span_dto(span_dto)))
+
+        if len(rows) >= EXPORT_BATCH_SIZE:
+            writer.write_batch(pyarrow.RecordBatch.from_pylist(rows, schema=schema))
+
+            rows = []
+
+            yield sink.drain()
+
+    if rows:
+        writer.write_batch(pyarrow.RecordBatch.from_pylist(rows, schema=schema))
+
+    writer.close()
+
+    yield sink.drain()
@@ -18,8 +18,21 @@ class CollectStatusResponse(VersionedModel):
     status: str
 
 
+class IngestionQueueResponse(VersionedModel):
+    enabled: bool
+    depth: Optional[int] = None
+    capacity: Optional[int] = None
+    enqueued: Optional[int] = None
+    dropped: Optional[int] = None
+    ingested: Optional[int] = None
+    retried: Optional[int] = None
+    failed: Optional[int] = None
+
+
 class OTelSpansResponse(VersionedModel):
     count: Optional[int] = None
+    approximate: Optional[bool] = None
+    cursor: Optional[str] = None
     spans: List[OTelSpanDTO]
 
 
@@ -53,14 +66,20 @@ class AgentaRootsDTO(BaseModel):
 
 class AgentaNodesResponse(VersionedModel, AgentaNodesDTO):
     count: Optional[int] = None
+    approximate: Optional[bool] = None
+    cursor: Optional[str] = None
 
 
 class AgentaTreesResponse(VersionedModel, AgentaTreesDTO):
     count: Optional[int] = None
+    approximate: Optional[bool] = None
+    cursor: Optional[str] = None
 
 
 class AgentaRootsResponse(VersionedModel, AgentaRootsDTO):
     count: Optional[int] = None
+    approximate: Optional[bool] = None
+    cursor: Optional[str] = None
 
 
 class LegacySummary(BaseModel):
@@ -3,9 +3,6 @@ from datetime import datetime
 import gzip
 import zlib
 
-
-from google.protobuf.json_format import MessageToDict
-
 # from opentelemetry.proto.trace.v1 import trace_pb2 as Trace_Proto
 import oss.src.apis.fastapi.observability.opentelemetry.traces_proto as Trace_Proto
 
@@ -62,12 +59,23 @@ def _decompress_data(data: bytes) -> bytes:
         return data
 
 
-def _parse_attribute(attribute):
-    raw_value = attribute.value
-    value_type = list(MessageToDict(raw_value).keys())[0].replace("V", "_v")
-    clean_value = getattr(raw_value, value_type)
+def _parse_value(value):
+    value_type = value.WhichOneof("value")
+
+    if value_type is None:
+        return None
+
+    if value_type == "array_value":
+        return [_parse_value(item) for item in value.array_value.values]
+
+    if value_type == "kvlist_value":
+        return _parse_attributes(value.kvlist_value.values)
+
+    return getattr(value, value_type)
+
 
-    return (attribute.key, clean_value)
+def _parse_attributes(attributes) -> dict:
+    return {attribute.key: _parse_value(attribute.value) for attribute in attributes}
 
 
 def _parse_timestamp(timestamp_ns: int) -> str:
@@ -124,25 +132,14 @@ def parse_otlp_stream(otlp_stream: bytes) -> List[OTelSpanDTO]:
                 )
 
                 # SPAN ATTRIBUTES
-                s_attributes = {
-                    k: v
-                    for k, v in [
-                        _parse_attribute(attribute) for attribute in span.attributes
-                    ]
-                }
+                s_attributes = _parse_attributes(span.attributes)
 
                 # SPAN EVENTS
                 s_events = [
                     OTelEventDTO(
                         name=event.name,
                         timestamp=_parse_timestamp(event.time_unix_nano),
-                        attributes={
-                            k: v
-                            for k, v in [
-                                _parse_attribute(attribute)
-                                for attribute in event.attributes
-                            ]
-                        },
+                        attributes=_parse_attributes(event.attributes),
                     )
                     for event in span.events
                 ]
@@ -155,13 +152,7 @@ def parse_otlp_stream(otlp_stream: bytes) -> List[OTelSpanDTO]:
                             trace_id="0x" + link.trace_id.hex(),
                             span_id="0x" + link.span_id.hex(),
                         ),
-                        attributes={
-                            k: v
-                            for k, v in [
-                                _parse_attribute(attribute)
-                                for attribute in link.attributes
-                            ]
-                        },
+                        attributes=_parse_attributes(link.attributes),
                     )
                     for link in span.links
                 ]
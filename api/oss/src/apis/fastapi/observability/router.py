@@ -1,12 +1,16 @@
-from typing import Dict, List, Union, Literal
+from typing import Dict, List, Union, Literal, Optional
 from uuid import UUID
 
 from fastapi import Request, Depends, Query, status, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response, JSONResponse, StreamingResponse
+from pydantic import BaseModel
 
 from oss.src.utils.logging import get_module_logger
 from oss.src.core.observability.service import ObservabilityService
+from oss.src.core.observability.queue import IngestionQueue, IngestionQueueFull
+from oss.src.core.observability.cache import TraceCache
 from oss.src.core.observability.dtos import (
+    SpanDTO,
     QueryDTO,
     AnalyticsDTO,
     TreeDTO,
@@ -14,11 +18,23 @@ from oss.src.core.observability.dtos import (
     GroupingDTO,
     FilteringDTO,
     ConditionDTO,
+    CountingMode,
     Focus,
 )
-from oss.src.core.observability.utils import FilteringException
+from oss.src.core.observability.utils import (
+    FilteringException,
+    PaginationException,
+)
 
 from oss.src.apis.fastapi.shared.utils import handle_exceptions
+from oss.src.apis.fastapi.observability.executor import OTLPExecutor
+from oss.src.apis.fastapi.observability.export import (
+    pyarrow,
+    export_ndjson,
+    export_arrow,
+    NDJSON_MEDIA_TYPE,
+    ARROW_MEDIA_TYPE,
+)
 from oss.src.apis.fastapi.observability.opentelemetry.otlp import (
     parse_otlp_stream,
 )
@@ -33,6 +49,7 @@ from oss.src.apis.fastapi.observability.utils import (
 )
 from oss.src.apis.fastapi.observability.models import (
     CollectStatusResponse,
+    IngestionQueueResponse,
     OTelSpansResponse,
     AgentaNodesResponse,
     AgentaTreesResponse,
@@ -57,15 +74,46 @@ if is_ee():
 log = get_module_logger(__file__)
 
 
+def _to_agenta_node_dto(
+    span_dto: SpanDTO,
+) -> AgentaNodeDTO:
+    # Spans are validated once, when mapped from the DB rows, and then only
+    # re-typed here, without dumping and re-validating their (nested) nodes.
+    return AgentaNodeDTO.model_construct(
+        _fields_set=span_dto.model_fields_set,
+        **dict(span_dto),
+    )
+
+
+def _json_response(
+    response: BaseModel,
+) -> Response:
+    # Serializes the (already valid) response once, bypassing the validation
+    # FastAPI would otherwise run against the declared response model.
+    return Response(
+        content=response.model_dump_json(exclude_none=True),
+        media_type="application/json",
+    )
+
+
 class ObservabilityRouter:
     VERSION = "1.0.0"
 
     def __init__(
         self,
         observability_service: ObservabilityService,
+        ingestion_queue: Optional[IngestionQueue] = None,
+        otlp_executor: Optional[OTLPExecutor] = None,
+        trace_cache: Optional[TraceCache] = None,
     ):
         self.service = observability_service
 
+        self.queue = ingestion_queue
+
+        self.executor = otlp_executor
+
+        self.cache = trace_cache
+
         self.router = APIRouter()
 
         self.otlp = APIRouter()
@@ -104,6 +152,16 @@ class ObservabilityRouter:
             response_model=CollectStatusResponse,
         )
 
+        self.router.add_api_route(
+            "/otlp/queue",
+            self.otlp_queue,
+            methods=["GET"],
+            operation_id="otlp_queue",
+            summary="Metrics of the OTLP ingestion queue",
+            status_code=status.HTTP_200_OK,
+            response_model=IngestionQueueResponse,
+        )
+
         ### QUERIES
 
         self.router.add_api_route(
@@ -122,6 +180,16 @@ class ObservabilityRouter:
             response_model_exclude_none=True,
         )
 
+        self.router.add_api_route(
+            "/traces/export",
+            self.export_traces,
+            methods=["GET"],
+            operation_id="export_traces",
+            summary="Export spans as a stream, with optional windowing and filtering.",
+            status_code=status.HTTP_200_OK,
+            response_class=StreamingResponse,
+        )
+
         self.router.add_api_route(
             "/analytics",
             self.query_analytics,
@@ -174,6 +242,21 @@ class ObservabilityRouter:
 
         return CollectStatusResponse(version=self.VERSION, status="ready")
 
+    @handle_exceptions()
+    async def otlp_queue(self):
+        """
+        Metrics of the OTLP ingestion queue.
+        """
+
+        if not self.queue:
+            return IngestionQueueResponse(version=self.VERSION, enabled=False)
+
+        return IngestionQueueResponse(
+            version=self.VERSION,
+            enabled=self.queue.running,
+            **self.queue.metrics(),
+        )
+
     @handle_exceptions()
     async def otlp_receiver(
         self,
@@ -199,49 +282,66 @@ class ObservabilityRouter:
                 detail="Invalid request body: not a valid OTLP stream.",
             ) from e
 
-        otel_spans = None
-        try:
-            # ---------------------------------------------------------------- #
-            otel_spans = parse_otlp_stream(otlp_stream)
-            # ---------------------------------------------------------------- #
-        except Exception as e:
-            log.error(
-                "Failed to parse OTLP stream from project %s with error %s",
-                request.state.project_id,
-                str(e),
-            )
-            log.error(
-                "OTLP stream: %s",
-                otlp_stream,
-            )
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to parse OTLP stream.",
-            ) from e
-
         span_dtos = None
-        try:
-            # ---------------------------------------------------------------- #
-            span_dtos = [
-                parse_from_otel_span_dto(otel_span) for otel_span in otel_spans
-            ]
-            # ---------------------------------------------------------------- #
-        except Exception as e:
-            log.error(
-                "Failed to parse spans from project %s with error %s",
-                request.state.project_id,
-                str(e),
-            )
-            for otel_span in otel_spans:
+        if self.executor and self.executor.offloads(otlp_stream):
+            try:
+                # ------------------------------------------------------------ #
+                span_dtos = await self.executor.parse(otlp_stream)
+                # ------------------------------------------------------------ #
+            except Exception as e:
                 log.error(
-                    "Span: [%s] %s",
-                    UUID(otel_span.context.trace_id[2:]),
-                    otel_span,
+                    "Failed to parse OTLP stream from project %s with error %s",
+                    request.state.project_id,
+                    str(e),
                 )
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to parse OTEL span.",
-            ) from e
+                raise HTTPException(
+                    status_code=500,
+                    detail="Failed to parse OTLP stream.",
+                ) from e
+
+        else:
+            otel_spans = None
+            try:
+                # ------------------------------------------------------------ #
+                otel_spans = parse_otlp_stream(otlp_stream)
+                # ------------------------------------------------------------ #
+            except Exception as e:
+                log.error(
+                    "Failed to parse OTLP stream from project %s with error %s",
+                    request.state.project_id,
+                    str(e),
+                )
+                log.error(
+                    "OTLP stream: %s",
+                    otlp_stream,
+                )
+                raise HTTPException(
+                    status_code=500,
+                    detail="Failed to parse OTLP stream.",
+                ) from e
+
+            try:
+                # ------------------------------------------------------------ #
+                span_dtos = [
+                    parse_from_otel_span_dto(otel_span) for otel_span in otel_spans
+                ]
+                # ------------------------------------------------------------ #
+            except Exception as e:
+                log.error(
+                    "Failed to parse spans from project %s with error %s",
+                    request.state.project_id,
+                    str(e),
+                )
+                for otel_span in otel_spans:
+                    log.error(
+                        "Span: [%s] %s",
+                        UUID(otel_span.context.trace_id[2:]),
+                        otel_span,
+                    )
+                raise HTTPException(
+                    status_code=500,
+                    detail="Failed to parse OTEL span.",
+                ) from e
 
         # -------------------------------------------------------------------- #
         delta = sum([1 for span_dto in span_dtos if span_dto.parent is None])
@@ -257,6 +357,27 @@ class ObservabilityRouter:
                 return NOT_ENTITLED_RESPONSE(Tracker.COUNTERS)
         # -------------------------------------------------------------------- #
 
+        if self.queue and self.queue.running:
+            try:
+                # ------------------------------------------------------------ #
+                self.queue.put(
+                    project_id=UUID(request.state.project_id),
+                    span_dtos=span_dtos,
+                )
+                # ------------------------------------------------------------ #
+            except IngestionQueueFull as e:
+                log.warning(
+                    "Dropped %s spans from project %s: ingestion queue is full",
+                    len(span_dtos),
+                    request.state.project_id,
+                )
+                raise HTTPException(
+                    status_code=503,
+                    detail="Ingestion queue is full, please retry later.",
+                ) from e
+
+            return CollectStatusResponse(version=self.VERSION, status="processing")
+
         try:
             # ---------------------------------------------------------------- #
             await self.service.ingest(
@@ -303,31 +424,52 @@ class ObservabilityRouter:
             query_dto.grouping.focus = Focus.NODE
 
         try:
-            span_dtos, count = await self.service.query(
+            span_dtos, count, cursor = await self.service.query(
                 project_id=UUID(request.state.project_id),
                 query_dto=query_dto,
             )
-        except FilteringException as e:
+        except (FilteringException, PaginationException) as e:
             raise HTTPException(
                 status_code=400,
                 detail=str(e),
             ) from e
 
+        approximate = None
+        counting = query_dto.counting
+
+        if counting and count is not None:
+            if counting.mode == CountingMode.ESTIMATED:
+                approximate = True
+            elif (
+                counting.mode == CountingMode.CAPPED
+                and counting.cap
+                and count > counting.cap
+            ):
+                count = counting.cap
+                approximate = True
+
         spans = []
 
         # format = opentelemetry -> focus = node
         if format == "opentelemetry":
             spans = [parse_to_otel_span_dto(span_dto) for span_dto in span_dtos]
 
-            return OTelSpansResponse(
-                version=self.VERSION,
-                count=count,
-                spans=spans,
+            return _json_response(
+                OTelSpansResponse.model_construct(
+                    version=self.VERSION,
+                    count=count,
+                    approximate=approximate,
+                    cursor=cursor,
+                    spans=spans,
+                )
             )
 
         # format = agenta
         elif format == "agenta":
-            spans = [parse_to_agenta_span_dto(span_dto) for span_dto in span_dtos]
+            spans = [
+                _to_agenta_node_dto(parse_to_agenta_span_dto(span_dto))
+                for span_dto in span_dtos
+            ]
 
             # focus = tree | root
             if query_dto.grouping and query_dto.grouping.focus.value != "node":
@@ -339,72 +481,128 @@ class ObservabilityRouter:
                         _nodes_by_tree[span.tree.id] = list()
                         _types_by_tree[span.tree.id] = None
 
-                    _nodes_by_tree[span.tree.id].append(
-                        AgentaNodeDTO(**span.model_dump())
-                    )
+                    _nodes_by_tree[span.tree.id].append(span)
                     _types_by_tree[span.tree.id] = span.tree.type
 
+                _trees_by_tree: Dict[str, AgentaTreeDTO] = {
+                    tree_id: AgentaTreeDTO.model_construct(
+                        tree=TreeDTO.model_construct(
+                            id=tree_id,
+                            type=_types_by_tree[tree_id],
+                        ),
+                        nodes=nodes,
+                    )
+                    for tree_id, nodes in _nodes_by_tree.items()
+                }
+
                 # focus = tree
                 if query_dto.grouping.focus.value == "tree":
-                    return AgentaTreesResponse(
-                        version=self.VERSION,
-                        count=count,
-                        trees=[
-                            AgentaTreeDTO(
-                                tree=TreeDTO(
-                                    id=tree_id,
-                                    type=_types_by_tree[tree_id],
-                                ),
-                                nodes=[
-                                    AgentaNodeDTO(**span.model_dump()) for span in nodes
-                                ],
-                            )
-                            for tree_id, nodes in _nodes_by_tree.items()
-                        ],
+                    return _json_response(
+                        AgentaTreesResponse.model_construct(
+                            version=self.VERSION,
+                            count=count,
+                            approximate=approximate,
+                            cursor=cursor,
+                            trees=list(_trees_by_tree.values()),
+                        )
                     )
 
                 # focus = root
                 else:
-                    _nodes_by_root: Dict[str, List[AgentaTreeDTO]] = dict()
-                    _types_by_root: Dict[str, str] = dict()
+                    _trees_by_root: Dict[str, List[AgentaTreeDTO]] = dict()
 
                     for tree_id, nodes in _nodes_by_tree.items():
-                        if nodes[0].root.id not in _nodes_by_root:
-                            _nodes_by_root[nodes[0].root.id] = list()
-                            _types_by_root[nodes[0].root.id] = None
-
-                        _nodes_by_root[nodes[0].root.id].append(
-                            AgentaTreeDTO(
-                                version=self.VERSION,
-                                tree=TreeDTO(
-                                    id=tree_id,
-                                    type=_types_by_tree[tree_id],
-                                ),
-                                nodes=[
-                                    AgentaNodeDTO(**span.model_dump()) for span in nodes
-                                ],
-                            )
+                        if nodes[0].root.id not in _trees_by_root:
+                            _trees_by_root[nodes[0].root.id] = list()
+
+                        _trees_by_root[nodes[0].root.id].append(_trees_by_tree[tree_id])
+
+                    return _json_response(
+                        AgentaRootsResponse.model_construct(
+                            version=self.VERSION,
+                            count=count,
+                            approximate=approximate,
+                            cursor=cursor,
+                            roots=[
+                                AgentaRootDTO.model_construct(
+                                    root=RootDTO.model_construct(id=root_id),
+                                    trees=trees,
+                                )
+                                for root_id, trees in _trees_by_root.items()
+                            ],
                         )
-
-                    return AgentaRootsResponse(
-                        version=self.VERSION,
-                        count=count,
-                        roots=[
-                            AgentaRootDTO(
-                                root=RootDTO(id=root_id),
-                                trees=trees,
-                            )
-                            for root_id, trees in _nodes_by_root.items()
-                        ],
                     )
 
             # focus = node
-            return AgentaNodesResponse(
-                version=self.VERSION,
-                count=count,
-                nodes=[AgentaNodeDTO(**span.model_dump()) for span in spans],
+            return _json_response(
+                AgentaNodesResponse.model_construct(
+                    version=self.VERSION,
+                    count=count,
+                    approximate=approximate,
+                    cursor=cursor,
+                    nodes=spans,
+                )
+            )
+
+    @handle_exceptions()
+    async def export_traces(
+        self,
+        request: Request,
+        query_dto: QueryDTO = Depends(parse_query_dto),
+        format: Literal[  # pylint: disable=W0622
+            "ndjson",
+            "arrow",
+        ] = Query("ndjson"),
+    ):
+        """
+        Export spans as a stream, with optional windowing and filtering.
+
+        Spans are streamed flat, newest first, as NDJSON lines or Arrow IPC
+        record batches. Grouping and pagination do not apply.
+        """
+
+        if format == "arrow" and not pyarrow:
+            raise HTTPException(
+                status_code=400,
+                detail="Arrow export is not available: pyarrow is not installed.",
+            )
+
+        span_dtos = self.service.stream(
+            project_id=UUID(request.state.project_id),
+            query_dto=query_dto,
+        )
+
+        # FAIL EARLY ON INVALID FILTERS, BEFORE THE RESPONSE STARTS
+        try:
+            first = await span_dtos.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except (FilteringException, PaginationException) as e:
+            raise HTTPException(
+                status_code=400,
+                detail=str(e),
+            ) from e
+
+        async def _span_dtos():
+            if first is None:
+                return
+
+            yield first
+
+            async for span_dto in span_dtos:
+                yield span_dto
+
+        if format == "arrow":
+            return StreamingResponse(
+                export_arrow(_span_dtos()),
+                media_type=ARROW_MEDIA_TYPE,
             )
 
+        return StreamingResponse(
+            export_ndjson(_span_dtos()),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
     @handle_exceptions()
     async def query_analytics(
         self,
@@ -484,7 +682,26 @@ class ObservabilityRouter:
         except Exception as e:
             raise HTTPException(status_code=400, detail="trace_id is invalid.") from e
 
-        return await self.query_traces(
+        project_id = UUID(request.state.project_id)
+
+        generation = None
+        if self.cache:
+            content = await self.cache.get(
+                project_id=project_id,
+                tree_id=UUID(tree_id),
+                format=format,
+            )
+
+            if content is not None:
+                return Response(content=content, media_type="application/json")
+
+            # BEFORE READING THE TREE, TO TELL IF IT CHANGED WHILE READ
+            generation = await self.cache.generation(
+                project_id=project_id,
+                tree_id=UUID(tree_id),
+            )
+
+        response = await self.query_traces(
             request=request,
             format=format,
             query_dto=QueryDTO(
@@ -502,6 +719,17 @@ class ObservabilityRouter:
             ),
         )
 
+        if self.cache and isinstance(response, Response):
+            await self.cache.set(
+                project_id=project_id,
+                tree_id=UUID(tree_id),
+                format=format,
+                content=response.body,
+                generation=generation,
+            )
+
+        return response
+
     ### MUTATIONS
 
     @handle_exceptions()
@@ -510,6 +738,7 @@ class ObservabilityRouter:
         request: Request,
         node_id: UUID = Query(None),
         node_ids: List[UUID] = Query(None),
+        tree_ids: List[UUID] = Query(None),
     ):
         """
         Delete trace.
@@ -519,6 +748,7 @@ class ObservabilityRouter:
             project_id=UUID(request.state.project_id),
             node_id=node_id,
             node_ids=node_ids,
+            tree_ids=tree_ids,
         )
 
         return CollectStatusResponse(version=self.VERSION, status="deleted")
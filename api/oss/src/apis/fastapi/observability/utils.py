@@ -39,11 +39,15 @@ from oss.src.core.observability.dtos import (
     WindowingDTO,
     FilteringDTO,
     PaginationDTO,
+    CountingDTO,
+    CountingMode,
     QueryDTO,
     AnalyticsDTO,
     ConditionDTO,
 )
 
+_DEFAULT_COUNT_CAP = 10000
+
 
 # --- PARSE QUERY / ANALYTICS DTO ---
 
@@ -96,6 +100,7 @@ def _parse_pagination(
     size: Optional[int] = None,
     next: Optional[str] = None,  # pylint: disable=W0622:redefined-builtin
     stop: Optional[str] = None,
+    cursor: Optional[str] = None,
 ) -> Optional[PaginationDTO]:
     _pagination = None
 
@@ -105,6 +110,18 @@ def _parse_pagination(
             detail="Both 'page' and 'next' cannot be provided at the same time",
         )
 
+    if cursor and (page or next or stop):
+        raise HTTPException(
+            status_code=400,
+            detail="'cursor' cannot be combined with 'page', 'next' or 'stop'",
+        )
+
+    if cursor and not size:
+        raise HTTPException(
+            status_code=400,
+            detail="'size' is required when 'cursor' is provided",
+        )
+
     if size and stop:
         raise HTTPException(
             status_code=400,
@@ -122,11 +139,35 @@ def _parse_pagination(
         size=size,
         next=next,
         stop=stop,
+        cursor=cursor,
     )
 
     return _pagination
 
 
+def _parse_counting(
+    counting: Optional[str] = None,
+    cap: Optional[int] = None,
+) -> Optional[CountingDTO]:
+    _counting = None
+
+    if counting:
+        try:
+            mode = CountingMode(counting)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid counting mode '{counting}', please use one of {[m.value for m in CountingMode]}",
+            ) from e
+
+        _counting = CountingDTO(
+            mode=mode,
+            cap=(cap or _DEFAULT_COUNT_CAP) if mode == CountingMode.CAPPED else None,
+        )
+
+    return _counting
+
+
 def parse_query_dto(
     # GROUPING
     # - Option 2: Flat query parameters
@@ -144,12 +185,24 @@ def parse_query_dto(
     size: Optional[int] = Query(None),
     next: Optional[str] = Query(None),  # pylint: disable=W0622:redefined-builtin
     stop: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    # COUNTING
+    # - Option 2: Flat query parameters
+    counting: Optional[str] = Query(None),
+    cap: Optional[int] = Query(None),
 ) -> QueryDTO:
     return QueryDTO(
         grouping=_parse_grouping(focus=focus),
         windowing=_parse_windowing(oldest=oldest, newest=newest),
         filtering=_parse_filtering(filtering=filtering),
-        pagination=_parse_pagination(page=page, size=size, next=next, stop=stop),
+        pagination=_parse_pagination(
+            page=page,
+            size=size,
+            next=next,
+            stop=stop,
+            cursor=cursor,
+        ),
+        counting=_parse_counting(counting=counting, cap=cap),
     )
 
 
@@ -206,48 +259,50 @@ def _unmarshal_attributes(
         }
     }
     """
-    unmarshalled = {}
+    trie = _Trie()
 
     for key, value in marshalled.items():
-        keys = key.split(".")
+        *parts, last = key.split(".")
 
-        level = unmarshalled
+        level = trie
 
-        for i, part in enumerate(keys[:-1]):
-            if part.isdigit():
-                part = int(part)
+        for part in parts:
+            child = level.get(part)
 
-                if not isinstance(level, list):
-                    level = []
+            if not isinstance(child, _Trie):
+                child = level[part] = _Trie()
 
-                while len(level) <= part:
-                    level.append({})
+            level = child
 
-                level = level[part]
+        level[last] = value
+
+    return {part: _unmarshal_trie(child) for part, child in trie.items()}
 
-            else:
-                if part not in level:
-                    level[part] = {} if not keys[i + 1].isdigit() else []
 
-                level = level[part]
+class _Trie(dict):
+    """Tells trie nodes apart from values that are dicts themselves."""
 
-        last_key = keys[-1]
 
-        if last_key.isdigit():
-            last_key = int(last_key)
+def _unmarshal_trie(
+    trie: Any,
+) -> Any:
+    if not isinstance(trie, _Trie):
+        return trie
 
-            if not isinstance(level, list):
-                level = []
+    if all(part.isdigit() for part in trie):
+        # GAPS ARE EMPTY OBJECTS IN LISTS OF OBJECTS, AND None OTHERWISE
+        nested = any(isinstance(child, _Trie) for child in trie.values())
 
-            while len(level) <= last_key:
-                level.append(None)
+        unmarshalled = [
+            {} if nested else None for _ in range(max(int(part) for part in trie) + 1)
+        ]
 
-            level[last_key] = value
+        for part, child in trie.items():
+            unmarshalled[int(part)] = _unmarshal_trie(child)
 
-        else:
-            level[last_key] = value
+        return unmarshalled
 
-    return unmarshalled
+    return {part: _unmarshal_trie(child) for part, child in trie.items()}
 
 
 def _encode_key(
@@ -257,13 +312,6 @@ def _encode_key(
     return f"ag.{namespace}.{key}"
 
 
-def _decode_key(
-    namespace,
-    key: str,
-) -> str:
-    return key.replace(f"ag.{namespace}.", "")
-
-
 def _encode_value(
     value: Any,
 ) -> Optional[Any]:
@@ -301,22 +349,36 @@ def _decode_value(
     return value
 
 
-def _get_attributes(
+_NAMESPACES = ("type", "data", "metrics", "meta", "refs")
+
+
+def _get_namespaces(
     attributes: Attributes,
-    namespace: str,
-):
-    return {
-        _decode_key(namespace, key): _decode_value(value)
-        for key, value in attributes.items()
-        if key != _decode_key(namespace, key)
-    }
+    namespaces: Tuple[str, ...] = _NAMESPACES,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Buckets ag.<namespace>.<key> attributes by namespace in a single pass.
+
+    Only the values of bucketed attributes are decoded.
+    """
+    buckets = {namespace: dict() for namespace in namespaces}
+
+    for key, value in attributes.items():
+        if not key.startswith("ag."):
+            continue
+
+        namespace, _, _key = key[3:].partition(".")
+
+        if _key and namespace in buckets:
+            buckets[namespace][_key] = _decode_value(value)
+
+    return buckets
 
 
 def _parse_from_types(
     otel_span_dto: OTelSpanDTO,
+    types: Dict[str, Any],
 ) -> dict:
-    types = _get_attributes(otel_span_dto.attributes, "type")
-
     if types.get("tree"):
         del otel_span_dto.attributes[_encode_key("type", "tree")]
 
@@ -326,12 +388,23 @@ def _parse_from_types(
     return types
 
 
+_SEMCONV_KEYS = tuple(
+    CODEX["keys"]["attributes"]["exact"]["from"]
+    + CODEX["keys"]["attributes"]["prefix"]["from"]
+    + CODEX["keys"]["attributes"]["dynamic"]["from"]
+)
+
+
 def _parse_from_semconv(
     attributes: Attributes,
 ) -> None:
     _attributes = copy(attributes)
 
     for old_key, value in _attributes.items():
+        # FAST PATH FOR KEYS THAT NO CONVENTION MAPS
+        if not old_key.startswith(_SEMCONV_KEYS):
+            continue
+
         if old_key in CODEX["keys"]["attributes"]["exact"]["from"]:
             new_key = CODEX["maps"]["attributes"]["exact"]["from"][old_key]
 
@@ -375,7 +448,7 @@ def _parse_from_links(
         otel_links = list()
 
         for link in otel_span_dto.links:
-            _links = _get_attributes(link.attributes, "type")
+            _links = _get_namespaces(link.attributes, ("type",))["type"]
 
             if _links:
                 link_type = _links.get("link")
@@ -404,45 +477,23 @@ def _parse_from_links(
 
 def _parse_from_attributes(
     otel_span_dto: OTelSpanDTO,
-) -> Tuple[dict, dict, dict, dict, dict]:
-    # DATA
-    _data = _get_attributes(otel_span_dto.attributes, "data")
-
-    for key in _data.keys():
-        del otel_span_dto.attributes[_encode_key("data", key)]
+    namespaces: Dict[str, Dict[str, Any]],
+) -> Tuple[dict, dict, dict, dict]:
+    attributes = []
 
-    # _data = _unmarshal_attributes(_data)
-    _data = _data if _data else None
+    for namespace in ("data", "metrics", "meta", "refs"):
+        _attributes = namespaces.get(namespace)
 
-    # METRICS
-    _metrics = _get_attributes(otel_span_dto.attributes, "metrics")
-
-    for key in _metrics.keys():
-        del otel_span_dto.attributes[_encode_key("metrics", key)]
-
-    # _metrics = _unmarshal_attributes(_metrics)
-    _metrics = _metrics if _metrics else None
-
-    # META
-    _meta = _get_attributes(otel_span_dto.attributes, "meta")
-
-    for key in _meta.keys():
-        del otel_span_dto.attributes[_encode_key("meta", key)]
+        for key in _attributes or {}:
+            del otel_span_dto.attributes[_encode_key(namespace, key)]
 
-    # _meta = _unmarshal_attributes(_meta)
-    _meta = _meta if _meta else None
-
-    # REFS
-    _refs = _get_attributes(otel_span_dto.attributes, "refs")
-
-    for key in _refs.keys():
-        del otel_span_dto.attributes[_encode_key("refs", key)]
-
-    _refs = _refs if _refs else None
+        attributes.append(_attributes if _attributes else None)
 
     if len(otel_span_dto.attributes.keys()) < 1:
         otel_span_dto.attributes = None
 
+    _data, _metrics, _meta, _refs = attributes
+
     return _data, _metrics, _meta, _refs
 
 
@@ -484,9 +535,15 @@ def parse_from_otel_span_dto(
     except:  # pylint: disable=bare-except
         pass
 
+    namespaces = {}
+    try:
+        namespaces = _get_namespaces(otel_span_dto.attributes)
+    except:  # pylint: disable=bare-except
+        pass
+
     types = {}
     try:
-        types = _parse_from_types(otel_span_dto)
+        types = _parse_from_types(otel_span_dto, namespaces.get("type", {}))
     except:  # pylint: disable=bare-except
         pass
 
@@ -552,7 +609,7 @@ def parse_from_otel_span_dto(
 
     data, metrics, meta, refs = None, None, None, None
     try:
-        data, metrics, meta, refs = _parse_from_attributes(otel_span_dto)
+        data, metrics, meta, refs = _parse_from_attributes(otel_span_dto, namespaces)
     except:  # pylint: disable=bare-except
         pass
 
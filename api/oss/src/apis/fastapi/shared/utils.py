@@ -1,8 +1,12 @@
 from functools import wraps
 from traceback import print_exc
 from fastapi import HTTPException
+from starlette.types import ASGIApp, Receive, Scope, Send
 from uuid import uuid4
 
+from oss.src.dbs.postgres.shared.engine import engine
+from oss.src.dbs.postgres.shared.config import POSTGRES_POOL_PER_REQUEST
+
 
 def handle_exceptions():
     def decorator(func):
@@ -24,3 +28,22 @@ def handle_exceptions():
         return wrapper
 
     return decorator
+
+
+class RequestScopeMiddleware:
+    """
+    Pure ASGI middleware, so the request scope also covers streamed responses
+    and background tasks, which run before the app returns.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not POSTGRES_POOL_PER_REQUEST:
+            await self.app(scope, receive, send)
+
+            return
+
+        async with engine.request_scope():
+            await self.app(scope, receive, send)
@@ -0,0 +1,443 @@
+import os
+from time import monotonic, time
+from uuid import UUID, uuid4
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple, Any
+
+from oss.src.utils.logging import get_module_logger
+from oss.src.utils.redis_utils import async_redis_connection
+
+log = get_module_logger(__file__)
+
+# ENV VARS
+# -> a cache local to each worker serves stale traces after writes handled by
+#    other workers, so it is only on by default with a shared backend
+_REDIS_CONFIGURED = bool(os.getenv("REDIS_URL"))
+
+TRACE_CACHE_ENABLED = (
+    os.getenv("AGENTA_TRACE_CACHE_ENABLED", str(_REDIS_CONFIGURED).lower()) == "true"
+)
+TRACE_CACHE_BACKEND = os.getenv(
+    "AGENTA_TRACE_CACHE_BACKEND", "redis" if _REDIS_CONFIGURED else "memory"
+)
+TRACE_CACHE_TTL = int(os.getenv("AGENTA_TRACE_CACHE_TTL", "300"))  # seconds
+TRACE_CACHE_MAX_ENTRIES = int(os.getenv("AGENTA_TRACE_CACHE_MAX_ENTRIES", "1024"))
+TRACE_CACHE_MAX_BYTES = int(
+    os.getenv("AGENTA_TRACE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))  # bytes
+)
+
+_REDIS_PREFIX = "agenta:observability:traces"
+_FORMATS = ("agenta", "opentelemetry")
+
+Key = Tuple[UUID, UUID, str]  # project_id, tree_id, format
+Scope = Tuple[UUID, Optional[UUID]]  # project_id, tree_id or None for all trees
+
+# STORES THE ENTRY ONLY IF NO VERSION CHANGED SINCE THE GENERATION WAS READ
+# KEYS: global version, project version, tree version, entry, project index
+# ARGV: global, project and tree versions as read, content, ttl, now
+_REDIS_SET_SCRIPT = """
+local versions = redis.call('MGET', KEYS[1], KEYS[2], KEYS[3])
+for i = 1, 3 do
+    if (versions[i] or '') ~= ARGV[i] then
+        return 0
+    end
+end
+local ttl = tonumber(ARGV[5])
+local now = tonumber(ARGV[6])
+redis.call('SET', KEYS[4], ARGV[4], 'EX', ttl)
+redis.call('ZREMRANGEBYSCORE', KEYS[5], '-inf', now)
+redis.call('ZADD', KEYS[5], now + ttl, KEYS[4])
+redis.call('EXPIRE', KEYS[5], ttl)
+return 1
+"""
+
+
+class TraceCache:
+    """
+    Read-through cache of serialized trace responses, keyed by tree.
+
+    Entries are invalidated when spans of their tree are ingested or deleted,
+    and expire after a TTL otherwise. Readers take a generation before reading
+    the trace from the database, and set() drops the entry if its tree was
+    invalidated meanwhile, so that a read racing with an ingestion does not
+    cache the trace as it was before.
+
+    The memory backend is a size-bounded LRU local to the process, so it only
+    suits single-worker deployments. The redis backend shares entries and
+    invalidations across workers, with one key per tree and format, indexed by
+    project so that a whole project can be invalidated at once.
+    """
+
+    def __init__(
+        self,
+        *,
+        backend: str = TRACE_CACHE_BACKEND,
+        ttl: int = TRACE_CACHE_TTL,
+        max_entries: int = TRACE_CACHE_MAX_ENTRIES,
+        max_bytes: int = TRACE_CACHE_MAX_BYTES,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # MEMORY
+        self._entries: "OrderedDict[Key, Tuple[float, bytes]]" = OrderedDict()
+        self._keys_by_project: Dict[UUID, Set[Key]] = dict()
+        self._size = 0
+        # -> a clock ticking on every invalidation, and when it last ticked per
+        #    project and tree, forgetting the oldest ones past a bound, in which
+        #    case any generation older than the forgotten ones is refused
+        self._clock = 0
+        self._invalidations: "OrderedDict[Scope, int]" = OrderedDict()
+        self._forgotten = 0
+
+        # REDIS
+        self._redis = None
+        self._redis_set = None
+
+        if self.backend == "redis":
+            self._redis = async_redis_connection()
+            self._redis_set = self._redis.register_script(_REDIS_SET_SCRIPT)
+
+        # METRICS
+        self.hits = 0
+        self.misses = 0
+        self.skips = 0
+
+    async def get(
+        self,
+        *,
+        project_id: UUID,
+        tree_id: UUID,
+        format: str,  # pylint: disable=W0622
+    ) -> Optional[bytes]:
+        if self._redis:
+            content = await self._redis_get(project_id, tree_id, format)
+        else:
+            content = self._memory_get((project_id, tree_id, format))
+
+        if content is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return content
+
+    async def generation(
+        self,
+        *,
+        project_id: UUID,
+        tree_id: UUID,
+    ) -> Any:
+        """Returns the generation of a tree, to be read before the tree itself."""
+
+        if self._redis:
+            return await self._redis_generation(project_id, tree_id)
+
+        return self._clock
+
+    async def set(
+        self,
+        *,
+        project_id: UUID,
+        tree_id: UUID,
+        format: str,  # pylint: disable=W0622
+        content: bytes,
+        generation: Any,
+    ) -> None:
+        if self._redis:
+            stored = await self._redis_set_if(
+                project_id, tree_id, format, content, generation
+            )
+        else:
+            stored = self._memory_set_if(
+                (project_id, tree_id, format), content, generation
+            )
+
+        if not stored:
+            self.skips += 1
+
+    async def invalidate(
+        self,
+        *,
+        project_id: UUID,
+        tree_ids: Optional[List[UUID]] = None,
+    ) -> None:
+        """Drops the given trees of a project, or all of its trees if none given."""
+
+        if self._redis:
+            await self._redis_invalidate(project_id, tree_ids)
+        else:
+            self._memory_invalidate(project_id, tree_ids)
+
+    async def clear(self) -> None:
+        if self._redis:
+            await self._redis_clear()
+        else:
+            self._memory_clear()
+
+    # MEMORY
+    # ------
+
+    def _memory_get(
+        self,
+        key: Key,
+    ) -> Optional[bytes]:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        expires_at, content = entry
+
+        if expires_at < monotonic():
+            self._memory_pop(key)
+
+            return None
+
+        self._entries.move_to_end(key)
+
+        return content
+
+    def _memory_set_if(
+        self,
+        key: Key,
+        content: bytes,
+        generation: int,
+    ) -> bool:
+        project_id, tree_id, _ = key
+
+        if (
+            generation < self._forgotten
+            or self._invalidations.get((project_id, tree_id), -1) > generation
+            or self._invalidations.get((project_id, None), -1) > generation
+        ):
+            return False
+
+        if len(content) > self.max_bytes:
+            return False
+
+        self._memory_pop(key)
+
+        self._entries[key] = (monotonic() + self.ttl, content)
+        self._keys_by_project.setdefault(project_id, set()).add(key)
+        self._size += len(content)
+
+        # EVICT LEAST RECENTLY USED ENTRIES
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            self._memory_pop(next(iter(self._entries)))
+
+        return True
+
+    def _memory_invalidate(
+        self,
+        project_id: UUID,
+        tree_ids: Optional[List[UUID]],
+    ) -> None:
+        self._clock += 1
+
+        scopes = (
+            [(project_id, None)]
+            if tree_ids is None
+            else [(project_id, tree_id) for tree_id in tree_ids]
+        )
+
+        for scope in scopes:
+            self._invalidations.pop(scope, None)
+            self._invalidations[scope] = self._clock
+
+        while len(self._invalidations) > self.max_entries:
+            _, forgotten = self._invalidations.popitem(last=False)
+
+            self._forgotten = max(self._forgotten, forgotten)
+
+        keys = self._keys_by_project.get(project_id)
+
+        if not keys:
+            return
+
+        if tree_ids is not None:
+            tree_ids = set(tree_ids)
+
+        for key in list(keys):
+            if tree_ids is None or key[1] in tree_ids:
+                self._memory_pop(key)
+
+    def _memory_clear(self) -> None:
+        self._clock += 1
+        self._forgotten = self._clock
+        self._invalidations.clear()
+
+        self._entries.clear()
+        self._keys_by_project.clear()
+        self._size = 0
+
+    def _memory_pop(
+        self,
+        key: Key,
+    ) -> None:
+        entry = self._entries.pop(key, None)
+
+        if entry is None:
+            return
+
+        self._size -= len(entry[1])
+
+        keys = self._keys_by_project.get(key[0])
+
+        if keys is not None:
+            keys.discard(key)
+
+            if not keys:
+                del self._keys_by_project[key[0]]
+
+    # REDIS
+    # -----
+    # One key per tree and format, expiring on its own, and one sorted set
+    # per project indexing them by expiry. Invalidations replace the version
+    # of the tree, the project or the whole cache with a random token, which
+    # set() compares atomically with the versions read by generation().
+
+    def _redis_version_keys(
+        self,
+        project_id: UUID,
+        tree_id: UUID,
+    ) -> List[str]:
+        return [
+            f"{_REDIS_PREFIX}:version",
+            f"{_REDIS_PREFIX}:{project_id}:version",
+            f"{_REDIS_PREFIX}:{project_id}:{tree_id}:version",
+        ]
+
+    async def _redis_get(
+        self,
+        project_id: UUID,
+        tree_id: UUID,
+        format: str,  # pylint: disable=W0622
+    ) -> Optional[bytes]:
+        try:
+            return await self._redis.get(
+                f"{_REDIS_PREFIX}:{project_id}:{tree_id}:{format}",
+            )
+
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            log.warning("Failed to read trace cache with error %s", str(e))
+
+            return None
+
+    async def _redis_generation(
+        self,
+        project_id: UUID,
+        tree_id: UUID,
+    ) -> Optional[List[bytes]]:
+        try:
+            versions = await self._redis.mget(
+                self._redis_version_keys(project_id, tree_id)
+            )
+
+            return [version or b"" for version in versions]
+
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            log.warning("Failed to read trace cache with error %s", str(e))
+
+            return None
+
+    async def _redis_set_if(
+        self,
+        project_id: UUID,
+        tree_id: UUID,
+        format: str,  # pylint: disable=W0622
+        content: bytes,
+        generation: Optional[List[bytes]],
+    ) -> bool:
+        if generation is None or len(content) > self.max_bytes:
+            return False
+
+        try:
+            return bool(
+                await self._redis_set(
+                    keys=[
+                        *self._redis_version_keys(project_id, tree_id),
+                        f"{_REDIS_PREFIX}:{project_id}:{tree_id}:{format}",
+                        f"{_REDIS_PREFIX}:{project_id}:index",
+                    ],
+                    args=[*generation, content, self.ttl, int(time())],
+                )
+            )
+
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            log.warning("Failed to write trace cache with error %s", str(e))
+
+            return False
+
+    async def _redis_invalidate(
+        self,
+        project_id: UUID,
+        tree_ids: Optional[List[UUID]],
+    ) -> None:
+        index = f"{_REDIS_PREFIX}:{project_id}:index"
+
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                if tree_ids is None:
+                    pipe.set(
+                        f"{_REDIS_PREFIX}:{project_id}:version",
+                        uuid4().hex,
+                        ex=self.ttl,
+                    )
+
+                    keys = await self._redis.zrange(index, 0, -1)
+
+                    if keys:
+                        pipe.delete(*keys)
+
+                    pipe.delete(index)
+
+                else:
+                    for tree_id in tree_ids:
+                        pipe.set(
+                            f"{_REDIS_PREFIX}:{project_id}:{tree_id}:version",
+                            uuid4().hex,
+                            ex=self.ttl,
+                        )
+
+                        keys = [
+                            f"{_REDIS_PREFIX}:{project_id}:{tree_id}:{format}"
+                            for format in _FORMATS
+                        ]
+
+                        pipe.delete(*keys)
+                        pipe.zrem(index, *keys)
+
+                await pipe.execute()
+
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            log.error("Failed to invalidate trace cache with error %s", str(e))
+
+    async def _redis_clear(self) -> None:
+        try:
+            await self._redis.set(
+                f"{_REDIS_PREFIX}:version",
+                uuid4().hex,
+                ex=self.ttl,
+            )
+
+            keys = []
+
+            async for key in self._redis.scan_iter(
+                match=f"{_REDIS_PREFIX}:*:*",
+                count=1000,
+            ):
+                keys.append(key)
+
+                if len(keys) >= 1000:
+                    await self._redis.unlink(*keys)
+
+                    keys = []
+
+            if keys:
+                await self._redis.unlink(*keys)
+
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            log.error("Failed to clear trace cache with error %s", str(e))
@@ -324,12 +324,27 @@ class PaginationDTO(BaseModel):
     next: Optional[datetime] = None
     stop: Optional[datetime] = None
 
+    cursor: Optional[str] = None
+
+
+class CountingMode(Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    CAPPED = "capped"
+    NONE = "none"
+
+
+class CountingDTO(BaseModel):
+    mode: CountingMode = CountingMode.EXACT
+    cap: Optional[int] = None
+
 
 class QueryDTO(BaseModel):
     grouping: Optional[GroupingDTO] = None
     windowing: Optional[WindowingDTO] = None
     filtering: Optional[FilteringDTO] = None
     pagination: Optional[PaginationDTO] = None
+    counting: Optional[CountingDTO] = None
 
 
 class AnalyticsDTO(BaseModel):
@@ -345,10 +360,10 @@ class MetricsDTO(BaseModel):
     tokens: Optional[int] = 0
 
     def plus(self, other: "MetricsDTO") -> "MetricsDTO":
-        self.count += other.count
-        self.duration += other.duration
-        self.cost += other.cost
-        self.tokens += other.tokens
+        self.count = (self.count or 0) + (other.count or 0)
+        self.duration = (self.duration or 0.0) + (other.duration or 0.0)
+        self.cost = (self.cost or 0.0) + (other.cost or 0.0)
+        self.tokens = (self.tokens or 0) + (other.tokens or 0)
 
         return self
 
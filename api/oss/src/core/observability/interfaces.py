@@ -1,5 +1,6 @@
 from uuid import UUID
-from typing import List, Tuple, Optional
+from datetime import datetime
+from typing import List, Tuple, Optional, Dict, AsyncIterator
 
 from oss.src.core.observability.dtos import (
     QueryDTO,
@@ -20,7 +21,16 @@ class ObservabilityDAOInterface:
         *,
         project_id: UUID,
         query_dto: QueryDTO,
-    ) -> Tuple[List[SpanDTO], Optional[int]]:
+    ) -> Tuple[List[SpanDTO], Optional[int], Optional[str]]:
+        raise NotImplementedError
+
+    def stream(
+        self,
+        *,
+        project_id: UUID,
+        #
+        query_dto: QueryDTO,
+    ) -> AsyncIterator[SpanDTO]:
         raise NotImplementedError
 
     async def analytics(
@@ -66,13 +76,24 @@ class ObservabilityDAOInterface:
     ) -> List[SpanDTO]:
         raise NotImplementedError
 
+    async def read_children_metrics(
+        self,
+        *,
+        project_id: UUID,
+        #
+        tree_ids: List[UUID],
+        parent_ids: List[UUID],
+        node_ids: List[UUID],
+    ) -> Dict[UUID, Dict[str, float]]:
+        raise NotImplementedError
+
     async def delete_one(
         self,
         *,
         project_id: UUID,
         #
         node_id: UUID,
-    ) -> None:
+    ) -> List[UUID]:
         raise NotImplementedError
 
     async def delete_many(
@@ -81,5 +102,25 @@ class ObservabilityDAOInterface:
         project_id: UUID,
         #
         node_ids: List[UUID],
-    ) -> None:
+    ) -> List[UUID]:
+        raise NotImplementedError
+
+    async def purge(
+        self,
+        *,
+        project_id: UUID,
+        #
+        tree_ids: Optional[List[UUID]] = None,
+        oldest: Optional[datetime] = None,
+        newest: Optional[datetime] = None,
+    ) -> int:
+        raise NotImplementedError
+
+    async def maintain(
+        self,
+        *,
+        ahead: int,
+        retention: Optional[int] = None,
+        project_retentions: Optional[Dict[UUID, int]] = None,
+    ) -> List[str]:
         raise NotImplementedError
@@ -0,0 +1,296 @@
+import os
+from uuid import UUID
+from typing import List, Dict, Tuple, Optional
+from asyncio import Queue, QueueFull, QueueEmpty, Task, CancelledError
+from asyncio import TimeoutError as AsyncTimeoutError
+from asyncio import create_task, wait_for, gather, get_running_loop, sleep
+
+from oss.src.utils.logging import get_module_logger
+from oss.src.core.observability.dtos import SpanDTO
+from oss.src.core.observability.service import ObservabilityService
+
+log = get_module_logger(__file__)
+
+# ENV VARS
+OTLP_QUEUE_ENABLED = os.getenv("AGENTA_OTLP_QUEUE_ENABLED", "true") == "true"
+OTLP_QUEUE_SIZE = int(os.getenv("AGENTA_OTLP_QUEUE_SIZE", "1024"))  # payloads
+OTLP_QUEUE_WORKERS = int(os.getenv("AGENTA_OTLP_QUEUE_WORKERS", "2"))
+OTLP_QUEUE_BATCH_SIZE = int(os.getenv("AGENTA_OTLP_QUEUE_BATCH_SIZE", "5000"))  # spans
+OTLP_QUEUE_LINGER = float(os.getenv("AGENTA_OTLP_QUEUE_LINGER", "0.05"))  # seconds
+OTLP_QUEUE_RETRIES = int(os.getenv("AGENTA_OTLP_QUEUE_RETRIES", "2"))
+OTLP_QUEUE_BACKOFF = float(os.getenv("AGENTA_OTLP_QUEUE_BACKOFF", "0.5"))  # seconds
+OTLP_QUEUE_DRAIN_TIMEOUT = float(
+    os.getenv("AGENTA_OTLP_QUEUE_DRAIN_TIMEOUT", "10")  # seconds
+)
+
+
+class IngestionQueueFull(Exception):
+    pass
+
+
+class IngestionQueue:
+    """
+    Bounded in-process queue between the OTLP receiver and the database.
+
+    Payloads are accepted as soon as they are parsed, then a pool of writer
+    workers coalesces payloads from many requests into larger ingest batches.
+
+    Each project is routed to a fixed worker, with its own queue, so that the
+    batches of a project are ingested one after the other, and metrics are
+    cumulated across batches as they would be inline.
+
+    As payloads were already accepted, failed batches are retried with
+    backoff, since ingestion is idempotent, before their spans are counted
+    as failed and logged with the error.
+
+    On stop, pending payloads are drained for up to the drain timeout, e.g.
+    while the database is down, after which the spans left are counted as
+    dropped and logged, and the workers are cancelled.
+    """
+
+    def __init__(
+        self,
+        observability_service: ObservabilityService,
+        *,
+        max_size: int = OTLP_QUEUE_SIZE,
+        workers: int = OTLP_QUEUE_WORKERS,
+        batch_size: int = OTLP_QUEUE_BATCH_SIZE,
+        linger: float = OTLP_QUEUE_LINGER,
+        retries: int = OTLP_QUEUE_RETRIES,
+        backoff: float = OTLP_QUEUE_BACKOFF,
+        drain_timeout: float = OTLP_QUEUE_DRAIN_TIMEOUT,
+    ):
+        self.service = observability_service
+
+        self.max_size = max_size
+        self.workers = workers
+        self.batch_size = batch_size
+        self.linger = linger
+        self.retries = retries
+        self.backoff = backoff
+        self.drain_timeout = drain_timeout
+
+        self._queues: List[Queue] = []
+        self._tasks: List[Task] = []
+
+        # METRICS
+        self.enqueued = 0
+        self.dropped = 0
+        self.ingested = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    @property
+    def running(self) -> bool:
+        return len(self._tasks) > 0
+
+    async def start(self) -> None:
+        if self.running:
+            return
+
+        # THE CAPACITY IS SHARED BY THE WORKER QUEUES
+        self._queues = [
+            Queue(maxsize=max(1, self.max_size // self.workers))
+            for _ in range(self.workers)
+        ]
+        self._tasks = [create_task(self._work(queue)) for queue in self._queues]
+
+        log.info(
+            "OTLP ingestion queue started with %s worker(s) and capacity %s",
+            self.workers,
+            self.max_size,
+        )
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+
+        # FLUSH PENDING PAYLOADS BEFORE CANCELLING THE WORKERS
+        try:
+            await wait_for(
+                gather(*[queue.join() for queue in self._queues]),
+                timeout=self.drain_timeout,
+            )
+
+        except AsyncTimeoutError:
+            dropped = self._discard()
+
+            log.error(
+                "OTLP ingestion queue not drained within %ss, dropping %s queued spans",
+                self.drain_timeout,
+                dropped,
+            )
+
+        for task in self._tasks:
+            task.cancel()
+
+        await gather(*self._tasks, return_exceptions=True)
+
+        self._tasks = []
+        self._queues = []
+
+        log.info(
+            "OTLP ingestion queue stopped (ingested=%s failed=%s dropped=%s)",
+            self.ingested,
+            self.failed,
+            self.dropped,
+        )
+
+    def put(
+        self,
+        *,
+        project_id: UUID,
+        span_dtos: List[SpanDTO],
+    ) -> None:
+        try:
+            self._route(project_id).put_nowait((project_id, span_dtos))
+        except QueueFull as e:
+            self.dropped += len(span_dtos)
+
+            raise IngestionQueueFull("OTLP ingestion queue is full.") from e
+
+        self.enqueued += len(span_dtos)
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "depth": self.depth,
+            "capacity": self.max_size,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "ingested": self.ingested,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+    def _discard(self) -> int:
+        dropped = 0
+
+        for queue in self._queues:
+            while True:
+                try:
+                    _, span_dtos = queue.get_nowait()
+                except QueueEmpty:
+                    break
+
+                dropped += len(span_dtos)
+
+                queue.task_done()
+
+        self.dropped += dropped
+
+        return dropped
+
+    def _route(
+        self,
+        project_id: UUID,
+    ) -> Queue:
+        return self._queues[project_id.int % len(self._queues)]
+
+    async def _work(
+        self,
+        queue: Queue,
+    ) -> None:
+        while True:
+            payloads = await self._collect(queue)
+
+            try:
+                await self._flush(payloads)
+            finally:
+                for _ in payloads:
+                    queue.task_done()
+
+    async def _collect(
+        self,
+        queue: Queue,
+    ) -> List[Tuple[UUID, List[SpanDTO]]]:
+        payloads = [await queue.get()]
+        size = len(payloads[0][1])
+
+        # COALESCE PAYLOADS UNTIL THE BATCH IS FULL OR THE LINGER EXPIRES
+        deadline = get_running_loop().time() + self.linger
+
+        while size < self.batch_size:
+            timeout = deadline - get_running_loop().time()
+
+            if timeout <= 0 and queue.empty():
+                break
+
+            try:
+                payload = (
+                    queue.get_nowait()
+                    if not queue.empty()
+                    else await wait_for(queue.get(), timeout=timeout)
+                )
+            except AsyncTimeoutError:
+                break
+
+            payloads.append(payload)
+            size += len(payload[1])
+
+        return payloads
+
+    async def _flush(
+        self,
+        payloads: List[Tuple[UUID, List[SpanDTO]]],
+    ) -> None:
+        span_dtos_by_project: Dict[UUID, List[SpanDTO]] = dict()
+
+        for project_id, span_dtos in payloads:
+            span_dtos_by_project.setdefault(project_id, []).extend(span_dtos)
+
+        batches = list(span_dtos_by_project.items())
+
+        for i, (project_id, span_dtos) in enumerate(batches):
+            try:
+                await self._ingest(project_id, span_dtos)
+
+            except CancelledError:
+                # CANCELLED ON STOP, AFTER THE DRAIN TIMEOUT
+                self.dropped += sum(len(span_dtos) for _, span_dtos in batches[i:])
+
+                raise
+
+    async def _ingest(
+        self,
+        project_id: UUID,
+        span_dtos: List[SpanDTO],
+    ) -> None:
+        for attempt in range(self.retries + 1):
+            try:
+                await self.service.ingest(
+                    project_id=project_id,
+                    span_dtos=span_dtos,
+                )
+
+                self.ingested += len(span_dtos)
+
+                return
+
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                if attempt < self.retries:
+                    self.retried += len(span_dtos)
+
+                    log.warning(
+                        "Retrying %s queued spans from project %s after error %s",
+                        len(span_dtos),
+                        project_id,
+                        str(e),
+                    )
+
+                    await sleep(self.backoff * 2**attempt)
+
+                    continue
+
+                self.failed += len(span_dtos)
+
+                log.error(
+                    "Failed to ingest %s queued spans from project %s with error %s",
+                    len(span_dtos),
+                    project_id,
+                    str(e),
+                    exc_info=True,
+                )
@@ -0,0 +1,111 @@
+import os
+from json import loads
+from uuid import UUID
+from typing import Dict, Optional
+from asyncio import Task, CancelledError, create_task, sleep
+
+from oss.src.utils.logging import get_module_logger
+from oss.src.core.observability.service import ObservabilityService
+
+log = get_module_logger(__file__)
+
+# ENV VARS
+NODES_MAINTENANCE_ENABLED = (
+    os.getenv("AGENTA_NODES_MAINTENANCE_ENABLED", "true") == "true"
+)
+NODES_MAINTENANCE_INTERVAL = int(
+    os.getenv("AGENTA_NODES_MAINTENANCE_INTERVAL", "3600")  # seconds
+)
+NODES_PARTITIONS_AHEAD = int(os.getenv("AGENTA_NODES_PARTITIONS_AHEAD", "4"))  # weeks
+NODES_RETENTION = int(os.getenv("AGENTA_NODES_RETENTION", "0"))  # days, 0 = forever
+NODES_RETENTION_BY_PROJECT = os.getenv("AGENTA_NODES_RETENTION_BY_PROJECT")  # JSON
+
+
+def parse_project_retentions(
+    project_retentions: Optional[str],
+) -> Dict[UUID, int]:
+    if not project_retentions:
+        return {}
+
+    return {
+        UUID(project_id): int(days)
+        for project_id, days in loads(project_retentions).items()
+    }
+
+
+class RetentionJob:
+    """
+    Periodic maintenance of the time-partitioned nodes table.
+
+    Creates upcoming weekly partitions ahead of time, drops whole partitions
+    past the global retention, and deletes nodes past per-project retentions,
+    which can only be shorter than the global one.
+    """
+
+    def __init__(
+        self,
+        observability_service: ObservabilityService,
+        *,
+        interval: int = NODES_MAINTENANCE_INTERVAL,
+        ahead: int = NODES_PARTITIONS_AHEAD,
+        retention: int = NODES_RETENTION,
+        project_retentions: Optional[Dict[UUID, int]] = None,
+    ):
+        self.service = observability_service
+
+        self.interval = interval
+        self.ahead = ahead
+        self.retention = retention
+        self.project_retentions = (
+            project_retentions
+            if project_retentions is not None
+            else parse_project_retentions(NODES_RETENTION_BY_PROJECT)
+        )
+
+        self._task: Optional[Task] = None
+
+    async def start(self) -> None:
+        if self._task:
+            return
+
+        self._task = create_task(self._work())
+
+        log.info(
+            "Nodes maintenance started (every %ss, %s week(s) ahead, retention %s day(s))",
+            self.interval,
+            self.ahead,
+            self.retention or "unlimited",
+        )
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+
+        self._task.cancel()
+
+        try:
+            await self._task
+        except CancelledError:
+            pass
+
+        self._task = None
+
+    async def run(self) -> None:
+        dropped = await self.service.maintain(
+            ahead=self.ahead,
+            retention=self.retention or None,
+            project_retentions=self.project_retentions,
+        )
+
+        for name in dropped:
+            log.info("Dropped expired nodes partition %s", name)
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                await self.run()
+
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                log.error("Failed to maintain nodes partitions with error %s", str(e))
+
+            await sleep(self.interval)
@@ -1,7 +1,9 @@
 from uuid import UUID
-from typing import List, Optional, Tuple
+from datetime import datetime
+from typing import List, Optional, Tuple, Dict, AsyncIterator
 
 from oss.src.core.observability.interfaces import ObservabilityDAOInterface
+from oss.src.core.observability.cache import TraceCache
 from oss.src.core.observability.dtos import (
     QueryDTO,
     AnalyticsDTO,
@@ -14,6 +16,7 @@ from oss.src.core.observability.utils import (
     calculate_costs,
     cumulate_costs,
     cumulate_tokens,
+    cumulate_children_metrics,
     connect_children,
     parse_filtering,
     parse_ingest,
@@ -24,19 +27,21 @@ class ObservabilityService:
     def __init__(
         self,
         observability_dao: ObservabilityDAOInterface,
+        trace_cache: Optional[TraceCache] = None,
     ):
         self.observability_dao = observability_dao
+        self.trace_cache = trace_cache
 
     async def query(
         self,
         *,
         project_id: UUID,
         query_dto: QueryDTO,
-    ) -> Tuple[List[SpanDTO], Optional[int]]:
+    ) -> Tuple[List[SpanDTO], Optional[int], Optional[str]]:
         if query_dto.filtering:
             parse_filtering(query_dto.filtering)
 
-        span_dtos, count = await self.observability_dao.query(
+        span_dtos, count, cursor = await self.observability_dao.query(
             project_id=project_id,
             query_dto=query_dto,
         )
@@ -52,7 +57,22 @@ class ObservabilityService:
                 span_dto for span_dto in span_idx.values() if span_dto.parent is None
             ]
 
-        return span_dtos, count
+        return span_dtos, count, cursor
+
+    async def stream(
+        self,
+        *,
+        project_id: UUID,
+        query_dto: QueryDTO,
+    ) -> AsyncIterator[SpanDTO]:
+        if query_dto.filtering:
+            parse_filtering(query_dto.filtering)
+
+        async for span_dto in self.observability_dao.stream(
+            project_id=project_id,
+            query_dto=query_dto,
+        ):
+            yield span_dto
 
     async def analytics(
         self,
@@ -88,11 +108,26 @@ class ObservabilityService:
 
         cumulate_tokens(span_id_tree, span_idx)
 
+        # CHILDREN FROM EARLIER BATCHES, e.g. EXPORTED BEFORE THEIR PARENTS
+        children_metrics = await self.observability_dao.read_children_metrics(
+            project_id=project_id,
+            tree_ids=list({span_dto.tree.id for span_dto in span_idx.values()}),
+            parent_ids=list(span_idx.keys()),
+            node_ids=list(span_idx.keys()),
+        )
+
+        cumulate_children_metrics(span_idx, children_metrics)
+
         await self.observability_dao.create_many(
             project_id=project_id,
             span_dtos=span_idx.values(),
         )
 
+        await self._invalidate(
+            project_id=project_id,
+            tree_ids=list({span_dto.tree.id for span_dto in span_idx.values()}),
+        )
+
     async def create(
         self,
         *,
@@ -101,17 +136,27 @@ class ObservabilityService:
         span_dtos: Optional[List[SpanDTO]] = None,
     ) -> SpanDTO:
         if span_dto:
-            return await self.observability_dao.create_one(
+            await self.observability_dao.create_one(
                 project_id=project_id,
                 span_dto=span_dto,
             )
 
-        if span_dtos:
-            return await self.observability_dao.create_many(
+            await self._invalidate(
+                project_id=project_id,
+                tree_ids=[span_dto.tree.id],
+            )
+
+        elif span_dtos:
+            await self.observability_dao.create_many(
                 project_id=project_id,
                 span_dtos=span_dtos,
             )
 
+            await self._invalidate(
+                project_id=project_id,
+                tree_ids=list({span_dto.tree.id for span_dto in span_dtos}),
+            )
+
     async def read(
         self,
         *,
@@ -137,15 +182,74 @@ class ObservabilityService:
         project_id: UUID,
         node_id: Optional[UUID] = None,
         node_ids: Optional[List[UUID]] = None,
+        tree_ids: Optional[List[UUID]] = None,
+        oldest: Optional[datetime] = None,
+        newest: Optional[datetime] = None,
     ):
-        if node_id:
-            return await self.observability_dao.delete_one(
+        deleted = None
+
+        if node_id or node_ids:
+            if node_id:
+                deleted_tree_ids = await self.observability_dao.delete_one(
+                    project_id=project_id,
+                    node_id=node_id,
+                )
+
+            else:
+                deleted_tree_ids = await self.observability_dao.delete_many(
+                    project_id=project_id,
+                    node_ids=node_ids,
+                )
+
+            # ONLY THE TREES OF THE DELETED NODES
+            if deleted_tree_ids:
+                await self._invalidate(
+                    project_id=project_id,
+                    tree_ids=deleted_tree_ids,
+                )
+
+        elif tree_ids or oldest or newest:
+            deleted = await self.observability_dao.purge(
                 project_id=project_id,
-                node_id=node_id,
+                tree_ids=tree_ids,
+                oldest=oldest,
+                newest=newest,
             )
 
-        if node_ids:
-            return await self.observability_dao.delete_many(
+            # PURGED NODES MAY BELONG TO ANY TREE, UNLESS TREES ARE GIVEN
+            await self._invalidate(
                 project_id=project_id,
-                node_ids=node_ids,
+                tree_ids=tree_ids,
+            )
+
+        return deleted
+
+    async def maintain(
+        self,
+        *,
+        ahead: int,
+        retention: Optional[int] = None,
+        project_retentions: Optional[Dict[UUID, int]] = None,
+    ) -> List[str]:
+        dropped = await self.observability_dao.maintain(
+            ahead=ahead,
+            retention=retention,
+            project_retentions=project_retentions,
+        )
+
+        if self.trace_cache and (retention or project_retentions):
+            await self.trace_cache.clear()
+
+        return dropped
+
+    async def _invalidate(
+        self,
+        *,
+        project_id: UUID,
+        tree_ids: Optional[List[UUID]] = None,
+    ) -> None:
+        if self.trace_cache:
+            await self.trace_cache.invalidate(
+                project_id=project_id,
+                tree_ids=tree_ids,
             )
@@ -1,11 +1,17 @@
+import os
 from enum import Enum
 from uuid import UUID
+from json import loads
+from functools import lru_cache
 from datetime import datetime
 from traceback import print_exc
-from typing import List, Dict, OrderedDict, Callable, Any
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from binascii import Error as Base64Error
+from typing import List, Dict, OrderedDict, Callable, Any, Tuple, Optional
 
 from litellm import cost_calculator
 
+from oss.src.utils.logging import get_module_logger
 from oss.src.core.observability.dtos import (
     SpanDTO,
     FilteringDTO,
@@ -17,6 +23,10 @@ from oss.src.core.observability.dtos import (
     ExistenceOperator,
 )
 
+log = get_module_logger(__file__)
+
+PRICING_FILE = os.getenv("AGENTA_PRICING_FILE")
+
 _C_OPS = list(ComparisonOperator)
 _N_OPS = list(NumericOperator)
 _S_OPS = list(StringOperator)
@@ -35,6 +45,31 @@ class FilteringException(Exception):
     pass
 
 
+class PaginationException(Exception):
+    pass
+
+
+def encode_cursor(
+    created_at: datetime,
+    key: UUID,
+) -> str:
+    cursor = f"{created_at.isoformat()}|{key}"
+
+    return urlsafe_b64encode(cursor.encode()).decode()
+
+
+def decode_cursor(
+    cursor: str,
+) -> Tuple[datetime, UUID]:
+    try:
+        created_at, key = urlsafe_b64decode(cursor.encode()).decode().split("|")
+
+        return datetime.fromisoformat(created_at), UUID(key)
+
+    except (Base64Error, UnicodeDecodeError, ValueError) as exc:
+        raise PaginationException(f"Invalid cursor '{cursor}'") from exc
+
+
 def _is_uuid_key(key: str) -> bool:
     return (key.startswith("refs.") and key.endswith(".id")) or key in (
         "root.id",
@@ -310,6 +345,27 @@ def cumulate_tokens(
     _cumulate_tree_dfs(spans_id_tree, spans_idx, _get_unit, _get_acc, _acc, _set)
 
 
+def cumulate_children_metrics(
+    spans_idx: Dict[str, SpanDTO],
+    children_metrics: Dict[UUID, Dict[str, float]],
+) -> None:
+    """
+    Adds the cumulated metrics of children stored in earlier batches to their
+    parents, and to the ancestors of their parents, within the current batch.
+    """
+    for parent_id, metrics in children_metrics.items():
+        span = spans_idx.get(parent_id)
+
+        while span is not None:
+            if span.metrics is None:
+                span.metrics = {}
+
+            for key, value in metrics.items():
+                span.metrics[key] = span.metrics.get(key, 0.0) + value
+
+            span = spans_idx.get(span.parent.id) if span.parent else None
+
+
 def _cumulate_tree_dfs(
     spans_id_tree: OrderedDict,
     spans_idx: Dict[str, SpanDTO],
@@ -384,7 +440,81 @@ TYPES_WITH_COSTS = [
 ]
 
 
+def load_custom_prices(
+    path: Optional[str],
+) -> Dict[str, Tuple[float, float]]:
+    """
+    Loads per-token prices from a JSON file, in the litellm pricing format:
+    { "<model>": { "input_cost_per_token": ..., "output_cost_per_token": ... } }
+    """
+    if not path:
+        return dict()
+
+    with open(path, "r", encoding="utf-8") as file:
+        prices = loads(file.read())
+
+    return {
+        model: (
+            float(price.get("input_cost_per_token") or 0.0),
+            float(price.get("output_cost_per_token") or 0.0),
+        )
+        for model, price in prices.items()
+    }
+
+
+@lru_cache(maxsize=1)
+def get_custom_prices() -> Dict[str, Tuple[float, float]]:
+    """
+    Loads the pricing file on first use, so that a broken file only disables
+    custom prices, with an error, instead of failing the API on import.
+    """
+    try:
+        return load_custom_prices(PRICING_FILE)
+
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        log.error(
+            "Failed to load custom prices from %s with error %s",
+            PRICING_FILE,
+            str(e),
+        )
+
+        return dict()
+
+
+@lru_cache(maxsize=4096)
+def get_prices(
+    model: str,
+) -> Optional[Tuple[float, float]]:
+    """
+    Returns the (prompt, completion) per-token prices of a model.
+
+    Unknown models are cached as None, so that litellm is asked only once.
+    """
+    custom_prices = get_custom_prices()
+
+    if model in custom_prices:
+        return custom_prices[model]
+
+    try:
+        prices = cost_calculator.cost_per_token(
+            model=model,
+            prompt_tokens=1,
+            completion_tokens=1,
+        )
+
+    except Exception:  # pylint: disable=broad-exception-caught
+        return None
+
+    if not prices:
+        return None
+
+    return prices
+
+
 def calculate_costs(span_idx: Dict[str, SpanDTO]):
+    # GROUP SPANS BY MODEL, TO LOOK UP PRICES ONCE PER MODEL
+    spans_by_model: Dict[str, List[SpanDTO]] = dict()
+
     for span in span_idx.values():
         if (
             span.node.type
@@ -395,28 +525,25 @@ def calculate_costs(span_idx: Dict[str, SpanDTO]):
             model = span.meta.get("response.model") or span.meta.get(
                 "configuration.model"
             )
-            prompt_tokens = span.metrics.get("unit.tokens.prompt", 0.0)
-            completion_tokens = span.metrics.get("unit.tokens.completion", 0.0)
-
-            try:
-                costs = cost_calculator.cost_per_token(
-                    model=model,
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens,
-                )
-
-                if not costs:
-                    continue
-
-                prompt_cost, completion_cost = costs
-                total_cost = prompt_cost + completion_cost
-
-                span.metrics["unit.costs.prompt"] = prompt_cost
-                span.metrics["unit.costs.completion"] = completion_cost
-                span.metrics["unit.costs.total"] = total_cost
-
-            except:  # pylint: disable=bare-except
-                print("Failed to calculate costs:")
-                print(
-                    f"model={model}, prompt_tokens={prompt_tokens}, completion_tokens={completion_tokens}"
-                )
+
+            if model:
+                spans_by_model.setdefault(model, []).append(span)
+
+    for model, spans in spans_by_model.items():
+        prices = get_prices(model)
+
+        if not prices:
+            continue
+
+        prompt_price, completion_price = prices
+
+        for span in spans:
+            prompt_tokens = span.metrics.get("unit.tokens.prompt") or 0.0
+            completion_tokens = span.metrics.get("unit.tokens.completion") or 0.0
+
+            prompt_cost = prompt_price * prompt_tokens
+            completion_cost = completion_price * completion_tokens
+
+            span.metrics["unit.costs.prompt"] = prompt_cost
+            span.metrics["unit.costs.completion"] = completion_cost
+            span.metrics["unit.costs.total"] = prompt_cost + completion_cost
@@ -1,20 +1,29 @@
-from typing import Optional, List, Tuple, Union
+from typing import Optional, List, Tuple, Union, Dict, AsyncIterator
 from datetime import datetime, timedelta, time, timezone
+from json import loads, dumps
 from traceback import print_exc
 from uuid import UUID
 
-from sqlalchemy import and_, or_, not_, distinct, Column, func, cast, text
-from sqlalchemy import TIMESTAMP, Enum, UUID as SQLUUID, Integer, Numeric
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import and_, or_, not_, distinct, Column, func, cast, text, tuple_
+from sqlalchemy import delete, update, false, literal, literal_column, values, column
+from sqlalchemy import TIMESTAMP, Enum, UUID as SQLUUID, Integer, Numeric, String
+from sqlalchemy.dialects.postgresql import JSONB, insert
 from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects import postgresql
 
+from oss.src.utils.logging import get_module_logger
 from oss.src.dbs.postgres.shared.engine import engine
-from oss.src.dbs.postgres.observability.dbes import NodesDBE
+from oss.src.dbs.postgres.observability.dbes import NodesDBE, NodesRollupsDBE
 from oss.src.dbs.postgres.observability.mappings import (
     map_span_dto_to_dbe,
+    map_span_dto_to_values,
     map_span_dbe_to_dto,
     map_bucket_dbes_to_dtos,
+    map_span_dbes_to_rollup_values,
+    floor_to_granularity,
+    ceil_to_granularity,
+    ROLLUP_GRANULARITIES,
 )
 
 from oss.src.core.observability.interfaces import ObservabilityDAOInterface
@@ -23,6 +32,10 @@ from oss.src.core.observability.dtos import (
     SpanDTO,
     AnalyticsDTO,
     BucketDTO,
+    PaginationDTO,
+    CountingDTO,
+    CountingMode,
+    Focus,
 )
 from oss.src.core.observability.dtos import (
     FilteringDTO,
@@ -34,7 +47,11 @@ from oss.src.core.observability.dtos import (
     ListOperator,
     ExistenceOperator,
 )
-from oss.src.core.observability.utils import FilteringException
+from oss.src.core.observability.utils import (
+    FilteringException,
+    encode_cursor,
+    decode_cursor,
+)
 from oss.src.core.observability.utils import (
     _is_uuid_key,
     _is_literal_key,
@@ -44,6 +61,8 @@ from oss.src.core.observability.utils import (
     _is_string_key,
 )
 
+log = get_module_logger(__file__)
+
 _DEFAULT_TIME_DELTA = timedelta(days=30)
 _DEFAULT_WINDOW = 1440  # 1 day
 _DEFAULT_WINDOW_TEXT = "1 day"
@@ -57,6 +76,12 @@ _SUGGESTED_BUCKETS_LIST = [
     (720, "12 hours"),
     (1440, "1 day"),
 ]
+_MAX_BIND_PARAMETERS = 32767  # per statement, i.e. rows x columns
+_STREAM_BATCH_SIZE = 1000
+_PARTITION_INTERVAL = timedelta(weeks=1)
+_PARTITION_PREFIX = "nodes_p"
+_PARTITION_DEFAULT = "nodes_default"
+_PARTITION_LOCK = 4815162342  # advisory lock id for partition maintenance
 
 
 class ObservabilityDAO(ObservabilityDAOInterface):
@@ -69,7 +94,7 @@ class ObservabilityDAO(ObservabilityDAOInterface):
         project_id: UUID,
         #
         query_dto: QueryDTO,
-    ) -> Tuple[List[SpanDTO], Optional[int]]:
+    ) -> Tuple[List[SpanDTO], Optional[int], Optional[str]]:
         try:
             async with engine.session() as session:
                 # BASE (SUB-)QUERY
@@ -92,69 +117,73 @@ class ObservabilityDAO(ObservabilityDAOInterface):
                     )
                 # --------
 
+                # KEYSET
+                key_column = (
+                    grouping_column if grouping_column is not None else NodesDBE.node_id
+                )
+                # ------
+
                 # SCOPING
                 query = query.filter_by(
                     project_id=project_id,
                 )
                 # -------
 
-                # WINDOWING
-                windowing = query_dto.windowing
-                # ---------
-                if windowing:
-                    if windowing.oldest:
-                        query = query.filter(NodesDBE.created_at >= windowing.oldest)
-
-                    if windowing.newest:
-                        query = query.filter(NodesDBE.created_at < windowing.newest)
-                # ---------
-
-                # FILTERING
-                filtering = query_dto.filtering
-                # ---------
-                if filtering:
-                    operator = filtering.operator
-                    conditions = filtering.conditions
-
-                    query = query.filter(
-                        _combine(
-                            operator,
-                            _filters(conditions),
-                        )
-                    )
-                # ---------
+                # WINDOWING & FILTERING
+                query = _where(query, query_dto)
+                # ---------------------
 
                 # SORTING
                 query = query.order_by(
                     NodesDBE.created_at.desc(),
+                    key_column.desc(),
                 )
                 # -------
 
-                # COUNTING // dangerous with large datasets
-                count_query = select(
-                    func.count()  # pylint: disable=E1102:not-callable
-                ).select_from(query.subquery())
+                # PAGINATION
+                pagination = query_dto.pagination
+                # ----------
+
+                # COUNTING
+                counting = query_dto.counting or CountingDTO(
+                    mode=(
+                        CountingMode.NONE
+                        if pagination and pagination.cursor
+                        else CountingMode.EXACT
+                    ),
+                )
 
-                count = (await session.execute(count_query)).scalar()
+                count = await _count(session, query, counting)
                 # --------
 
                 # PAGINATION
-                pagination = query_dto.pagination
-                # ----------
                 if pagination:
                     query = _chunk(
                         query,
+                        key=key_column,
                         **pagination.model_dump(),
                     )
                 # ----------
 
                 # GROUPING
+                cursor = None
                 if grouping and grouping_column:
-                    subquery = query.subquery()
+                    keys = (await session.execute(query)).all()
+
+                    if keys:
+                        cursor = _next_cursor(
+                            pagination,
+                            len(keys),
+                            keys[-1].created_at,
+                            keys[-1].grouping_key,
+                        )
 
                     query = select(NodesDBE)
+                    query = query.filter_by(
+                        project_id=project_id,
+                    )
                     query = query.filter(
-                        grouping_column.in_(select(subquery.c["grouping_key"]))
+                        grouping_column.in_([key.grouping_key for key in keys])
                     )
 
                     # SORTING
@@ -187,7 +216,57 @@ class ObservabilityDAO(ObservabilityDAOInterface):
                 spans = (await session.execute(query)).scalars().all()
                 # ---------------
 
-            return [map_span_dbe_to_dto(span) for span in spans], count
+                if spans and not grouping_column:
+                    cursor = _next_cursor(
+                        pagination,
+                        len(spans),
+                        spans[-1].created_at,
+                        spans[-1].node_id,
+                    )
+
+            return [map_span_dbe_to_dto(span) for span in spans], count, cursor
+
+        except AttributeError as e:
+            print_exc()
+
+            raise FilteringException(
+                "Failed to run query due to non-existent key(s)."
+            ) from e
+
+    async def stream(
+        self,
+        *,
+        project_id: UUID,
+        query_dto: QueryDTO,
+    ) -> AsyncIterator[SpanDTO]:
+        try:
+            async with engine.session() as session:
+                query = select(NodesDBE)
+
+                # SCOPING
+                query = query.filter_by(
+                    project_id=project_id,
+                )
+                # -------
+
+                # WINDOWING & FILTERING
+                query = _where(query, query_dto)
+                # ---------------------
+
+                # SORTING
+                query = query.order_by(
+                    NodesDBE.created_at.desc(),
+                    NodesDBE.node_id.desc(),
+                )
+                # -------
+
+                # SERVER-SIDE CURSOR, FETCHING ONE CHUNK AT A TIME
+                query = query.execution_options(yield_per=_STREAM_BATCH_SIZE)
+
+                span_dbes = await session.stream_scalars(query)
+
+                async for span_dbe in span_dbes:
+                    yield map_span_dbe_to_dto(span_dbe)
 
         except AttributeError as e:
             print_exc()
@@ -262,10 +341,7 @@ class ObservabilityDAO(ObservabilityDAOInterface):
                 # ---------
 
                 # BASE QUERY
-                _count = func.count().label("count")  # pylint: disable=not-callable
-                _duration = None
-                _cost = None
-                _tokens = None
+                _is_error = NodesDBE.is_error.is_(True)
                 _timestamp = func.date_bin(
                     text(f"'{window_text}'"),
                     NodesDBE.created_at,
@@ -278,95 +354,60 @@ class ObservabilityDAO(ObservabilityDAOInterface):
                     analytics_dto.grouping
                     and analytics_dto.grouping.focus.value != "node"
                 ):
-                    _duration = func.sum(
-                        cast(
-                            NodesDBE.metrics["acc.duration.total"],
-                            Numeric,
-                        )
-                    ).label("duration")
-                    _cost = func.sum(
-                        cast(
-                            NodesDBE.metrics["acc.costs.total"],
-                            Numeric,
-                        )
-                    ).label("cost")
-                    _tokens = func.sum(
-                        cast(
-                            NodesDBE.metrics["acc.tokens.total"],
-                            Integer,
-                        )
-                    ).label("tokens")
+                    _prefix = "acc"
                 elif not analytics_dto.grouping or (
                     analytics_dto.grouping
                     and analytics_dto.grouping.focus.value == "node"
                 ):
-                    _duration = func.sum(
-                        cast(
-                            NodesDBE.metrics["unit.duration.total"],
-                            Numeric,
-                        )
-                    ).label("duration")
-                    _cost = func.sum(
-                        cast(
-                            NodesDBE.metrics["unit.costs.total"],
-                            Numeric,
-                        )
-                    ).label("cost")
-                    _tokens = func.sum(
-                        cast(
-                            NodesDBE.metrics["unit.tokens.total"],
-                            Integer,
-                        )
-                    ).label("tokens")
+                    _prefix = "unit"
                 else:
                     raise ValueError("Unknown grouping focus.")
-                # --------
 
-                # BASE QUERY
-                total_query = select(
-                    _count,
-                    _duration,
-                    _cost,
-                    _tokens,
-                    _timestamp,
-                ).select_from(NodesDBE)
+                _duration = getattr(NodesDBE, f"{_prefix}_duration_total")
+                _cost = getattr(NodesDBE, f"{_prefix}_costs_total")
+                _tokens = getattr(NodesDBE, f"{_prefix}_tokens_total")
+                # --------
 
-                error_query = select(
-                    _count,
-                    _duration,
-                    _cost,
-                    _tokens,
+                # BASE QUERY // total and error in a single scan
+                query = select(
                     _timestamp,
+                    func.count().label("count"),  # pylint: disable=not-callable
+                    func.sum(_duration).label("duration"),
+                    func.sum(_cost).label("cost"),
+                    func.sum(_tokens).label("tokens"),
+                    func.count()  # pylint: disable=not-callable
+                    .filter(_is_error)
+                    .label("error_count"),
+                    func.sum(_duration).filter(_is_error).label("error_duration"),
+                    func.sum(_cost).filter(_is_error).label("error_cost"),
+                    func.sum(_tokens).filter(_is_error).label("error_tokens"),
                 ).select_from(NodesDBE)
                 # ----------
 
                 # WINDOWING
-                total_query = total_query.filter(
-                    NodesDBE.created_at >= oldest,
-                    NodesDBE.created_at < newest,
-                )
-
-                error_query = error_query.filter(
+                query = query.filter(
                     NodesDBE.created_at >= oldest,
                     NodesDBE.created_at < newest,
                 )
                 # ---------
 
-                # SCOPING
-                total_query = total_query.filter_by(
-                    project_id=project_id,
-                )
+                # ROLLUPS // only unfiltered analytics can be pre-aggregated
+                window = _to_minutes(window_text)
 
-                error_query = error_query.filter_by(
-                    project_id=project_id,
-                )
+                rollup_ranges = None
+                if not analytics_dto.filtering:
+                    rollup_ranges = _to_rollup_ranges(oldest, newest, window)
+
+                    query = query.filter(
+                        _within(NodesDBE.created_at, rollup_ranges[0]),
+                    )
                 # -------
 
-                # TOTAL vs ERROR
-                error_query = error_query.filter(
-                    NodesDBE.exception.isnot(None),
+                # SCOPING
+                query = query.filter_by(
+                    project_id=project_id,
                 )
-                # ----------------
+                # -------
 
                 # FILTERING
                 filtering = analytics_dto.filtering
@@ -375,14 +416,7 @@ class ObservabilityDAO(ObservabilityDAOInterface):
                     operator = filtering.operator
                     conditions = filtering.conditions
 
-                    total_query = total_query.filter(
-                        _combine(
-                            operator,
-                            _filters(conditions),
-                        )
-                    )
-
-                    error_query = error_query.filter(
+                    query = query.filter(
                         _combine(
                             operator,
                             _filters(conditions),
@@ -395,35 +429,20 @@ class ObservabilityDAO(ObservabilityDAOInterface):
                     analytics_dto.grouping
                     and analytics_dto.grouping.focus.value != "node"
                 ):
-                    total_query = total_query.filter_by(
-                        parent_id=None,
-                    )
-
-                    error_query = error_query.filter_by(
+                    query = query.filter_by(
                         parent_id=None,
                     )
                 # --------
 
                 # SORTING
-                total_query = total_query.group_by("timestamp")
-
-                error_query = error_query.group_by("timestamp")
+                query = query.group_by("timestamp")
                 # -------
 
                 # DEBUGGING
                 # TODO: HIDE THIS BEFORE RELEASING
                 # print(
                 #     str(
-                #         total_query.compile(
-                #             dialect=postgresql.dialect(),
-                #             compile_kwargs={"literal_binds": True},
-                #         )
-                #     )
-                # )
-                # print("...")
-                # print(
-                #     str(
-                #         error_query.compile(
+                #         query.compile(
                 #             dialect=postgresql.dialect(),
                 #             compile_kwargs={"literal_binds": True},
                 #         )
@@ -432,17 +451,28 @@ class ObservabilityDAO(ObservabilityDAOInterface):
                 # ---------
 
                 # QUERY EXECUTION
-                total_bucket_dbes = (await session.execute(total_query)).all()
-                error_bucket_dbes = (await session.execute(error_query)).all()
-                # ---------------
+                bucket_dbes = []
 
-                window = _to_minutes(window_text)
+                if rollup_ranges is None or rollup_ranges[0]:
+                    bucket_dbes += (await session.execute(query)).all()
+
+                if rollup_ranges is not None:
+                    rollup_query = _rollup_query(
+                        project_id=project_id,
+                        focus=Focus.TREE if _prefix == "acc" else Focus.NODE,
+                        window_text=window_text,
+                        oldest=oldest,
+                        rollup_ranges=rollup_ranges,
+                    )
+
+                    if rollup_query is not None:
+                        bucket_dbes += (await session.execute(rollup_query)).all()
+                # ---------------
 
                 timestamps = _to_timestamps(oldest, newest, window)
 
                 bucket_dtos, count = map_bucket_dbes_to_dtos(
-                    total_bucket_dbes=total_bucket_dbes,
-                    error_bucket_dbes=error_bucket_dbes,
+                    bucket_dbes=bucket_dbes,
                     window=window,
                     timestamps=timestamps,
                 )
@@ -477,17 +507,88 @@ class ObservabilityDAO(ObservabilityDAOInterface):
         project_id: UUID,
         span_dtos: List[SpanDTO],
     ) -> None:
-        span_dbes = [
-            map_span_dto_to_dbe(
+        span_values = [
+            map_span_dto_to_values(
                 project_id=project_id,
                 span_dto=span_dto,
             )
             for span_dto in span_dtos
         ]
 
+        if not span_values:
+            return
+
+        for row in span_values:
+            # LET THE DATABASE STAMP NEW NODES, AS THE ORM WOULD
+            if row["created_at"] is None:
+                row["created_at"] = func.current_timestamp()
+
         async with engine.session() as session:
-            for span_dbe in span_dbes:
-                session.add(span_dbe)
+            # DUPLICATE SPANS (e.g. EXPORTER RETRIES) ARE IGNORED
+            # -> the primary key includes the partition key, so recent nodes
+            #    are looked up explicitly, pruned to the latest partitions
+            query = select(NodesDBE.node_id).filter_by(project_id=project_id)
+
+            query = query.filter(
+                NodesDBE.node_id.in_([row["node_id"] for row in span_values])
+            )
+            query = query.filter(NodesDBE.created_at >= _dedup_since(span_values))
+
+            node_ids = set((await session.execute(query)).scalars().all())
+
+            span_values = [row for row in span_values if row["node_id"] not in node_ids]
+
+            # e.g. A RETRIED BATCH, ALREADY STORED
+            if not span_values:
+                return
+
+            inserted_ids = set()
+
+            # MULTI-ROW INSERT, BYPASSING THE ORM UNIT OF WORK
+            # -> chunked to stay below the bind parameter limit
+            batch_size = _batch_size(span_values)
+
+            for i in range(0, len(span_values), batch_size):
+                query = insert(NodesDBE).values(span_values[i : i + batch_size])
+
+                # DUPLICATE SPANS (e.g. CONCURRENT RETRIES) ARE IGNORED
+                query = query.on_conflict_do_nothing(
+                    index_elements=[
+                        NodesDBE.project_id,
+                        NodesDBE.node_id,
+                        NodesDBE.created_at,
+                    ],
+                )
+
+                # ONLY NEWLY INSERTED SPANS ARE ROLLED UP
+                query = query.returning(*_ROLLUP_COLUMNS, NodesDBE.node_id)
+
+                span_dbes = (await session.execute(query)).all()
+
+                inserted_ids.update(span_dbe.node_id for span_dbe in span_dbes)
+
+                await _rollup(
+                    session,
+                    map_span_dbes_to_rollup_values(
+                        project_id=project_id,
+                        span_dbes=span_dbes,
+                    ),
+                )
+
+            # CROSS-BATCH CUMULATION, TOWARDS ANCESTORS STORED IN EARLIER BATCHES
+            # -> only from the topmost newly inserted spans, which already
+            #    hold the cumulated metrics of their newly inserted descendants
+            await _cumulate(
+                session,
+                project_id,
+                [
+                    row
+                    for row in span_values
+                    if row["node_id"] in inserted_ids
+                    and row["parent_id"] is not None
+                    and row["parent_id"] not in inserted_ids
+                ],
+            )
 
             await session.commit()
 
@@ -507,7 +608,10 @@ class ObservabilityDAO(ObservabilityDAOInterface):
                 node_id=node_id,
             )
 
-            span_dbe = (await session.execute(query)).scalars().one_or_none()
+            # THE LATEST COPY, IF A RETRY OUTSIDE OF THE DEDUP WINDOW WAS STORED
+            query = query.order_by(NodesDBE.created_at.desc()).limit(1)
+
+            span_dbe = (await session.execute(query)).scalars().first()
 
         span_dto = None
         if span_dbe and to_dto:
@@ -567,80 +671,816 @@ class ObservabilityDAO(ObservabilityDAOInterface):
 
         return span_dbes
 
+    async def read_children_metrics(
+        self,
+        *,
+        project_id: UUID,
+        tree_ids: List[UUID],
+        parent_ids: List[UUID],
+        node_ids: List[UUID],
+    ) -> Dict[UUID, Dict[str, float]]:
+        if not parent_ids:
+            return dict()
+
+        async with engine.session() as session:
+            query = select(
+                NodesDBE.parent_id,
+                *[
+                    func.sum(cast(NodesDBE.metrics[key].astext, Numeric)).label(key)
+                    for key in _CUMULATED_METRICS
+                ],
+            )
+
+            query = query.filter_by(project_id=project_id)
+
+            # CHILDREN SHARE THE TREE OF THEIR PARENTS, WHICH IS INDEXED
+            query = query.filter(NodesDBE.tree_id.in_(tree_ids))
+
+            query = query.filter(NodesDBE.parent_id.in_(parent_ids))
+
+            query = query.filter(NodesDBE.node_id.not_in(node_ids))
+
+            query = query.group_by(NodesDBE.parent_id)
+
+            rows = (await session.execute(query)).all()
+
+        return {
+            row.parent_id: {
+                key: float(getattr(row, key))
+                for key in _CUMULATED_METRICS
+                if getattr(row, key)
+            }
+            for row in rows
+        }
+
     async def delete_one(
         self,
         *,
         project_id: UUID,
         node_id: UUID,
-    ) -> None:
-        span_dbe = await self.read_one(
+    ) -> List[UUID]:
+        return await self.delete_many(
             project_id=project_id,
-            node_id=node_id,
-            to_dto=False,
+            node_ids=[node_id],
         )
 
-        if span_dbe:
-            # COULD BE REPLACED WITH A CASCADE
-            children_dbes = await self.read_children(
-                project_id=project_id,
-                parent_id=node_id,
-                to_dto=False,
+    async def delete_many(
+        self,
+        *,
+        project_id: UUID,
+        node_ids: List[UUID],
+    ) -> List[UUID]:
+        if not node_ids:
+            return []
+
+        async with engine.session() as session:
+            span_dbes = await _delete(
+                session,
+                project_id,
+                _with_descendants(project_id, node_ids),
             )
 
-            if children_dbes:
-                await self.delete_many(
-                    project_id=project_id,
-                    node_ids=[child_dbe.node_id for child_dbe in children_dbes],
-                )
-            # --------------------------------
+            await session.commit()
 
-            async with engine.session() as session:
-                await session.delete(span_dbe)
-                await session.commit()
+        # THE TREES TO INVALIDATE
+        return list({span_dbe.tree_id for span_dbe in span_dbes})
 
-    async def delete_many(
+    async def purge(
         self,
         *,
         project_id: UUID,
-        node_ids: List[UUID],
-    ) -> None:
-        span_dbes = await self.read_many(
-            project_id=project_id,
-            node_ids=node_ids,
-            to_dto=False,
-        )
+        tree_ids: Optional[List[UUID]] = None,
+        oldest: Optional[datetime] = None,
+        newest: Optional[datetime] = None,
+    ) -> int:
+        if not tree_ids and not oldest and not newest:
+            return 0
 
-        if span_dbes:
-            for span_dbe in span_dbes:
-                # COULD BE REPLACED WITH A CASCADE
-                children_dbes = await self.read_children(
-                    project_id=project_id,
-                    parent_id=span_dbe.node_id,
-                    to_dto=False,
+        query = select(NodesDBE.node_id).filter_by(project_id=project_id)
+
+        if tree_ids:
+            query = query.filter(NodesDBE.tree_id.in_(tree_ids))
+
+        if oldest:
+            query = query.filter(NodesDBE.created_at >= oldest)
+
+        if newest:
+            query = query.filter(NodesDBE.created_at < newest)
+
+        async with engine.session() as session:
+            span_dbes = await _delete(session, project_id, query)
+
+            await session.commit()
+
+        return len(span_dbes)
+
+    async def maintain(
+        self,
+        *,
+        ahead: int,
+        retention: Optional[int] = None,
+        project_retentions: Optional[Dict[UUID, int]] = None,
+    ) -> List[str]:
+        now = datetime.now(timezone.utc)
+        dropped = []
+
+        async with engine.session() as session:
+            # ONE REPLICA AT A TIME
+            locked = (
+                await session.execute(
+                    select(func.pg_try_advisory_xact_lock(_PARTITION_LOCK))
                 )
+            ).scalar()
 
-                if children_dbes:
-                    await self.delete_many(
-                        project_id=project_id,
-                        node_ids=[child_dbe.node_id for child_dbe in children_dbes],
+            if not locked:
+                return dropped
+
+            partitions = await _partitions(session)
+
+            # CREATE UPCOMING PARTITIONS
+            start = _floor_to_partition(now)
+
+            for _ in range(ahead + 1):
+                if start not in partitions:
+                    await _create_partition(session, start)
+
+                start += _PARTITION_INTERVAL
+
+            # DROP EXPIRED PARTITIONS, ACROSS ALL PROJECTS
+            if retention:
+                cutoff = now - timedelta(days=retention)
+
+                for start in sorted(partitions):
+                    end = start + _PARTITION_INTERVAL
+
+                    if end > cutoff:
+                        break
+
+                    name = _partition_name(start)
+
+                    await session.execute(
+                        text(f"ALTER TABLE nodes DETACH PARTITION {name}")
+                    )
+                    await session.execute(text(f"DROP TABLE {name}"))
+
+                    # ROLLUPS ARE DAY-ALIGNED, AND SO ARE PARTITIONS
+                    await session.execute(
+                        delete(NodesRollupsDBE).filter(NodesRollupsDBE.bucket < end)
                     )
-                # --------------------------------
 
-                async with engine.session() as session:
-                    await session.delete(span_dbe)
-                    await session.commit()
+                    dropped.append(name)
+
+            # DELETE EXPIRED NODES, PER PROJECT
+            for project_id, days in (project_retentions or {}).items():
+                query = select(NodesDBE.node_id).filter_by(project_id=project_id)
+
+                query = query.filter(NodesDBE.created_at < now - timedelta(days=days))
+
+                await _delete(session, project_id, query)
+
+            await session.commit()
+
+        return dropped
+
+
+_ROLLUP_COLUMNS = (
+    NodesDBE.created_at,
+    NodesDBE.parent_id,
+    NodesDBE.is_error,
+    NodesDBE.unit_duration_total,
+    NodesDBE.unit_costs_total,
+    NodesDBE.unit_tokens_total,
+    NodesDBE.acc_duration_total,
+    NodesDBE.acc_costs_total,
+    NodesDBE.acc_tokens_total,
+)
+
+_ROLLUP_METRICS = (
+    "count",
+    "duration",
+    "cost",
+    "tokens",
+    "error_count",
+    "error_duration",
+    "error_cost",
+    "error_tokens",
+)
+
+
+def _dedup_since(
+    rows: List[dict],
+) -> datetime:
+    # THE CURRENT AND PREVIOUS PARTITIONS, OR AS FAR BACK AS THE OLDEST
+    # EXPLICIT created_at, SO THAT RETRIES ARE CAUGHT ACROSS A PARTITION EDGE
+    since = _floor_to_partition(datetime.now(timezone.utc)) - _PARTITION_INTERVAL
+
+    for row in rows:
+        created_at = row["created_at"]
+
+        if isinstance(created_at, datetime):
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+
+            since = min(since, _floor_to_partition(created_at))
+
+    return since
+
+
+def _batch_size(
+    rows: List[dict],
+) -> int:
+    # ONE BIND PARAMETER PER COLUMN AND ROW, SO THAT NO ROW COUNT IS HARDCODED
+    return max(1, _MAX_BIND_PARAMETERS // max(1, len(rows[0])))
+
+
+async def _rollup(
+    session: AsyncSession,
+    rollup_values: List[dict],
+) -> None:
+    if not rollup_values:
+        return
+
+    batch_size = _batch_size(rollup_values)
+
+    for i in range(0, len(rollup_values), batch_size):
+        query = insert(NodesRollupsDBE).values(rollup_values[i : i + batch_size])
+
+        query = query.on_conflict_do_update(
+            index_elements=[
+                NodesRollupsDBE.project_id,
+                NodesRollupsDBE.granularity,
+                NodesRollupsDBE.focus,
+                NodesRollupsDBE.bucket,
+            ],
+            set_={
+                metric: getattr(NodesRollupsDBE, metric) + query.excluded[metric]
+                for metric in _ROLLUP_METRICS
+            },
+        )
+
+        await session.execute(query)
+
+
+_CUMULATED_METRICS = (
+    "acc.costs.total",
+    "acc.tokens.prompt",
+    "acc.tokens.completion",
+    "acc.tokens.total",
+)
+
+_CUMULATED_COLUMNS = {
+    "acc.costs.total": "acc_costs_total",
+    "acc.tokens.total": "acc_tokens_total",
+}
+
+_MAX_TREE_DEPTH = 1024
+
+
+async def _cumulate(
+    session: AsyncSession,
+    project_id: UUID,
+    span_values: List[dict],
+) -> None:
+    # ONE DELTA PER SPAN, TO BE ADDED TO EVERY STORED ANCESTOR
+    deltas = [
+        (
+            span_value["parent_id"],
+            span_value["tree_id"],
+            *[
+                float((span_value["metrics"] or {}).get(key) or 0.0)
+                for key in _CUMULATED_METRICS
+            ],
+        )
+        for span_value in span_values
+    ]
+
+    keys = [
+        key
+        for i, key in enumerate(_CUMULATED_METRICS)
+        if any(delta[2 + i] for delta in deltas)
+    ]
+
+    if not keys:
+        return
+
+    deltas = (
+        values(
+            column("node_id", SQLUUID),
+            column("tree_id", SQLUUID),
+            *[column(key, Numeric) for key in _CUMULATED_METRICS],
+            name="deltas",
+        )
+        .data(deltas)
+        .alias("deltas")
+    )
+
+    # RECURSIVE CTE ON parent_id, SCOPED TO THE SAME TREE TO USE ITS INDEX
+    ancestors = (
+        select(
+            NodesDBE.node_id,
+            NodesDBE.parent_id,
+            NodesDBE.tree_id,
+            literal_column("1").label("depth"),
+            *[deltas.c[key] for key in keys],
+        )
+        .filter_by(project_id=project_id)
+        .join(
+            deltas,
+            and_(
+                NodesDBE.tree_id == deltas.c.tree_id,
+                NodesDBE.node_id == deltas.c.node_id,
+            ),
+        )
+        .cte("ancestors", recursive=True)
+    )
+
+    parents = (
+        select(
+            NodesDBE.node_id,
+            NodesDBE.parent_id,
+            NodesDBE.tree_id,
+            (ancestors.c.depth + 1).label("depth"),
+            *[ancestors.c[key] for key in keys],
+        )
+        .filter_by(project_id=project_id)
+        .join(
+            ancestors,
+            and_(
+                NodesDBE.tree_id == ancestors.c.tree_id,
+                NodesDBE.node_id == ancestors.c.parent_id,
+            ),
+        )
+        .filter(ancestors.c.depth < _MAX_TREE_DEPTH)
+    )
+
+    # UNION ALL, SO THAT ANCESTORS SHARED BY SEVERAL SPANS GET EVERY DELTA
+    ancestors = ancestors.union_all(parents)
+
+    totals = (
+        select(
+            ancestors.c.node_id,
+            *[func.sum(ancestors.c[key]).label(key) for key in keys],
+        )
+        .group_by(ancestors.c.node_id)
+        .subquery("totals")
+    )
+
+    # CONCURRENT CUMULATIONS INTO THE SAME ANCESTORS, e.g. FROM WORKERS OF
+    # OTHER PROCESSES, RELY ON ROW LOCKS, AND ARE NOT SERIALIZED PER TREE:
+    # -> roots are locked FOR UPDATE before their metrics are read, so that
+    #    their rollups are moved from the values the UPDATE then adds to
+    # -> the UPDATE adds to the current values of the rows it locks, so that
+    #    no delta is lost, and a deadlock aborts one of the transactions,
+    #    which is then retried as a whole, by the queue or the exporter
+
+    # TREE ROLLUPS FOLLOW THE ACCUMULATED METRICS OF ROOT NODES
+    query = select(*_ROLLUP_COLUMNS)
+
+    query = query.filter_by(project_id=project_id)
+
+    query = query.filter(NodesDBE.parent_id.is_(None))
+
+    query = query.filter(NodesDBE.node_id.in_(select(totals.c.node_id)))
+
+    query = query.with_for_update()
+
+    old_dbes = (await session.execute(query)).all()
+
+    metrics = func.jsonb_build_object(
+        *[
+            arg
+            for key in keys
+            for arg in (
+                key,
+                func.coalesce(cast(NodesDBE.metrics[key].astext, Numeric), 0)
+                + totals.c[key],
+            )
+        ]
+    )
+
+    query = update(NodesDBE)
+
+    query = query.filter(
+        NodesDBE.project_id == project_id,
+        NodesDBE.node_id == totals.c.node_id,
+    )
+
+    query = query.values(
+        metrics=func.coalesce(NodesDBE.metrics, cast("{}", JSONB)).op("||")(metrics),
+        **{
+            column_name: func.coalesce(getattr(NodesDBE, column_name), 0)
+            + totals.c[key]
+            for key, column_name in _CUMULATED_COLUMNS.items()
+            if key in keys
+        },
+    )
+
+    query = query.returning(*_ROLLUP_COLUMNS)
+
+    new_dbes = [
+        span_dbe
+        for span_dbe in (await session.execute(query)).all()
+        if span_dbe.parent_id is None
+    ]
+
+    await _rollup(
+        session,
+        map_span_dbes_to_rollup_values(
+            project_id=project_id,
+            span_dbes=old_dbes,
+            sign=-1,
+        ),
+    )
+
+    await _rollup(
+        session,
+        map_span_dbes_to_rollup_values(
+            project_id=project_id,
+            span_dbes=new_dbes,
+        ),
+    )
+
+
+def _with_descendants(
+    project_id: UUID,
+    node_ids: List[UUID],
+) -> select:
+    # RECURSIVE CTE ON parent_id, SCOPED TO THE SAME TREE TO USE ITS INDEX
+    nodes = (
+        select(NodesDBE.tree_id, NodesDBE.node_id)
+        .filter_by(project_id=project_id)
+        .filter(NodesDBE.node_id.in_(node_ids))
+        .cte("nodes_to_delete", recursive=True)
+    )
+
+    children = (
+        select(NodesDBE.tree_id, NodesDBE.node_id)
+        .filter_by(project_id=project_id)
+        .join(
+            nodes,
+            and_(
+                NodesDBE.tree_id == nodes.c.tree_id,
+                NodesDBE.parent_id == nodes.c.node_id,
+            ),
+        )
+    )
+
+    nodes = nodes.union(children)
+
+    return select(nodes.c.node_id)
+
+
+async def _delete(
+    session: AsyncSession,
+    project_id: UUID,
+    node_ids: select,
+) -> list:
+    query = delete(NodesDBE)
+
+    query = query.filter_by(project_id=project_id)
+
+    query = query.filter(NodesDBE.node_id.in_(node_ids))
+
+    query = query.returning(*_ROLLUP_COLUMNS, NodesDBE.tree_id)
+
+    span_dbes = (await session.execute(query)).all()
+
+    await _rollup(
+        session,
+        map_span_dbes_to_rollup_values(
+            project_id=project_id,
+            span_dbes=span_dbes,
+            sign=-1,
+        ),
+    )
+
+    return span_dbes
+
+
+def _floor_to_partition(
+    timestamp: datetime,
+) -> datetime:
+    # WEEKLY PARTITIONS START ON MONDAYS, AS date_trunc('week', ...) DOES
+    day = datetime.combine(timestamp.date(), time.min, tzinfo=timezone.utc)
+
+    return day - timedelta(days=day.weekday())
+
+
+def _partition_name(
+    start: datetime,
+) -> str:
+    return f"{_PARTITION_PREFIX}{start:%Y%m%d}"
+
+
+async def _create_partition(
+    session: AsyncSession,
+    start: datetime,
+) -> None:
+    name = _partition_name(start)
+    end = start + _PARTITION_INTERVAL
+
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    window = f"created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}'"
+
+    # NODES ALREADY IN THE DEFAULT PARTITION WOULD MAKE THE PARTITION OVERLAP IT
+    # -> moved while the default partition is detached
+    stray = (
+        await session.execute(
+            text(f"SELECT EXISTS (SELECT 1 FROM {_PARTITION_DEFAULT} WHERE {window})")
+        )
+    ).scalar()
+
+    if not stray:
+        await session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF nodes FOR VALUES {bounds}"
+            )
+        )
+
+        return
+
+    await session.execute(
+        text(f"ALTER TABLE nodes DETACH PARTITION {_PARTITION_DEFAULT}")
+    )
+    await session.execute(
+        text(f"CREATE TABLE {name} PARTITION OF nodes FOR VALUES {bounds}")
+    )
+
+    moved = (
+        await session.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {_PARTITION_DEFAULT} WHERE {window} "
+                f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+            )
+        )
+    ).rowcount
+
+    await session.execute(
+        text(f"ALTER TABLE nodes ATTACH PARTITION {_PARTITION_DEFAULT} DEFAULT")
+    )
+
+    log.warning(
+        "Moved %s nodes from %s into the new partition %s",
+        moved,
+        _PARTITION_DEFAULT,
+        name,
+    )
+
+
+async def _partitions(
+    session: AsyncSession,
+) -> List[datetime]:
+    query = text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+        "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+        "WHERE parent.relname = 'nodes'"
+    )
+
+    names = (await session.execute(query)).scalars().all()
+
+    return [
+        datetime.strptime(name[len(_PARTITION_PREFIX) :], "%Y%m%d").replace(
+            tzinfo=timezone.utc
+        )
+        for name in names
+        if name.startswith(_PARTITION_PREFIX)
+    ]
+
+
+def _to_rollup_ranges(
+    oldest: datetime,
+    newest: datetime,
+    window: int,
+) -> Dict[int, List[Tuple[datetime, datetime]]]:
+    """
+    Splits each analytics bucket into the coarsest aligned rollup ranges.
+
+    Granularity 0 holds the edges that no rollup covers, to be read from nodes.
+    """
+    ranges: Dict[int, List[Tuple[datetime, datetime]]] = {
+        granularity: [] for granularity in ROLLUP_GRANULARITIES + [0]
+    }
+
+    def _split(start: datetime, end: datetime, granularities: List[int]) -> None:
+        if start >= end:
+            return
+
+        if not granularities:
+            ranges[0].append((start, end))
+            return
+
+        granularity = granularities[0]
+
+        aligned_start = ceil_to_granularity(start, granularity)
+        aligned_end = floor_to_granularity(end, granularity)
+
+        if aligned_start < aligned_end:
+            ranges[granularity].append((aligned_start, aligned_end))
+
+            _split(start, aligned_start, granularities[1:])
+            _split(aligned_end, end, granularities[1:])
+
+        else:
+            _split(start, end, granularities[1:])
+
+    timestamps = _to_timestamps(oldest, newest, window)
+
+    for i, bucket_start in enumerate(timestamps):
+        bucket_end = (
+            timestamps[i + 1]
+            if i + 1 < len(timestamps)
+            else timestamps[0] + (newest - oldest)
+        )
+
+        _split(bucket_start, bucket_end, ROLLUP_GRANULARITIES)
+
+    # MERGE CONTIGUOUS RANGES ACROSS BUCKETS
+    for granularity, _ranges in ranges.items():
+        merged = []
+
+        for start, end in sorted(_ranges):
+            if merged and merged[-1][1] == start:
+                merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+
+        ranges[granularity] = merged
+
+    return ranges
+
+
+def _rollup_query(
+    *,
+    project_id: UUID,
+    focus: Focus,
+    window_text: str,
+    oldest: datetime,
+    rollup_ranges: Dict[int, List[Tuple[datetime, datetime]]],
+) -> Optional[select]:
+    conditions = [
+        and_(
+            NodesRollupsDBE.granularity == granularity,
+            _within(NodesRollupsDBE.bucket, ranges),
+        )
+        for granularity, ranges in rollup_ranges.items()
+        if granularity and ranges
+    ]
+
+    if not conditions:
+        return None
+
+    query = select(
+        func.date_bin(
+            text(f"'{window_text}'"),
+            NodesRollupsDBE.bucket,
+            oldest,
+        ).label("timestamp"),
+        *[
+            func.sum(getattr(NodesRollupsDBE, metric)).label(metric)
+            for metric in _ROLLUP_METRICS
+        ],
+    )
+
+    query = query.filter_by(
+        project_id=project_id,
+        focus=focus,
+    )
+
+    query = query.filter(or_(*conditions))
+
+    query = query.group_by("timestamp")
+
+    return query
+
+
+def _within(
+    column: Column,
+    ranges: List[Tuple[datetime, datetime]],
+):
+    if not ranges:
+        return false()
+
+    return or_(*[and_(column >= start, column < end) for start, end in ranges])
+
+
+def _where(
+    query: select,
+    query_dto: QueryDTO,
+) -> select:
+    # WINDOWING
+    windowing = query_dto.windowing
+    # ---------
+    if windowing:
+        if windowing.oldest:
+            query = query.filter(NodesDBE.created_at >= windowing.oldest)
+
+        if windowing.newest:
+            query = query.filter(NodesDBE.created_at < windowing.newest)
+    # ---------
+
+    # FILTERING
+    filtering = query_dto.filtering
+    # ---------
+    if filtering:
+        operator = filtering.operator
+        conditions = filtering.conditions
+
+        query = query.filter(
+            _combine(
+                operator,
+                _filters(conditions),
+            )
+        )
+    # ---------
+
+    return query
+
+
+async def _count(
+    session: AsyncSession,
+    query: select,
+    counting: CountingDTO,
+) -> Optional[int]:
+    # 1. NO COUNT
+    # -> useful with keyset pagination
+    if counting.mode == CountingMode.NONE:
+        return None
+
+    # 2. PLANNER ESTIMATE
+    # -> constant time, but only as good as the table statistics
+    if counting.mode == CountingMode.ESTIMATED:
+        statement = query.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={"literal_binds": True},
+        )
+
+        connection = await session.connection()
+
+        plan = (
+            await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}")
+        ).scalar()
+
+        if isinstance(plan, str):
+            plan = loads(plan)
+
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    # 3. CAPPED COUNT
+    # -> stops scanning after cap + 1 rows
+    if counting.mode == CountingMode.CAPPED and counting.cap:
+        query = query.limit(counting.cap + 1)
+
+    # 4. EXACT COUNT
+    # -> dangerous with large datasets
+    count_query = select(
+        func.count()  # pylint: disable=E1102:not-callable
+    ).select_from(query.subquery())
+
+    return (await session.execute(count_query)).scalar()
+
+
+def _next_cursor(
+    pagination: Optional[PaginationDTO],
+    rows: int,
+    created_at: datetime,
+    key: UUID,
+) -> Optional[str]:
+    # KEYSET PAGINATION IS ANY SIZED PAGINATION WITHOUT A PAGE NUMBER
+    if not pagination or not pagination.size or pagination.page:
+        return None
+
+    # A SHORT PAGE IS THE LAST PAGE
+    if rows < pagination.size:
+        return None
+
+    return encode_cursor(created_at, key)
 
 
 def _chunk(
     query: select,
+    key: Column,
     page: Optional[int] = None,
     size: Optional[int] = None,
     next: Optional[datetime] = None,  # pylint: disable=W0621:redefined-builtin
     stop: Optional[datetime] = None,
+    cursor: Optional[str] = None,
 ) -> select:
+    # 0. WHERE (created_at, key) < cursor LIMIT size
+    # -> stable and constant-time at any depth
+    if cursor and size:
+        created_at, key_value = decode_cursor(cursor)
+
+        query = query.filter(
+            tuple_(NodesDBE.created_at, key) < tuple_(created_at, key_value)
+        )
+        # redundant, but lets the planner prune partitions
+        query = query.filter(NodesDBE.created_at <= created_at)
+        query = query.limit(size)
+
     # 1. LIMIT size OFFSET (page - 1) * size
     # -> unstable if windowing.newest is not set
-    if page and size:
+    elif page and size:
         limit = size
         offset = (page - 1) * size
 
@@ -700,11 +1540,65 @@ _FLAT_KEYS = {
     "node.type": "node_type",
     "node.name": "node_name",
     "parent.id": "parent_id",
+    # TYPED COLUMNS
+    "status.code": "status_code",
+    "metrics.unit.duration.total": "unit_duration_total",
+    "metrics.unit.costs.total": "unit_costs_total",
+    "metrics.unit.tokens.total": "unit_tokens_total",
+    "metrics.acc.duration.total": "acc_duration_total",
+    "metrics.acc.costs.total": "acc_costs_total",
+    "metrics.acc.tokens.total": "acc_tokens_total",
 }
 
 _NESTED_FIELDS = ("data",)
 
 
+def _indexed_filter(
+    field: str,
+    key: Optional[str],
+    operator: Union[
+        ComparisonOperator,
+        NumericOperator,
+        StringOperator,
+        ListOperator,
+        ExistenceOperator,
+    ],
+    value,
+):
+    """
+    Compiles conditions that GIN indexes can serve:
+    - refs.* equality as containment (refs @> '{"key": value}')
+    - meta.* existence as key existence (meta ? 'key')
+    Returns None when the condition is not eligible.
+    """
+    if not key:
+        return None
+
+    if field == "refs":
+        if operator in (ComparisonOperator.IS, NumericOperator.EQ):
+            return NodesDBE.refs.contains(_to_jsonb(key, value))
+
+        if operator == ListOperator.IN:
+            return or_(*[NodesDBE.refs.contains(_to_jsonb(key, v)) for v in value])
+
+    if field == "meta":
+        if operator == ExistenceOperator.EXISTS:
+            return NodesDBE.meta.has_key(key)
+
+        if operator == ExistenceOperator.NOT_EXISTS:
+            return not_(NodesDBE.meta.has_key(key))
+
+    return None
+
+
+def _to_jsonb(key: str, value):
+    # CAST FROM TEXT SO THAT THE CONDITION CAN ALSO BE RENDERED WITH LITERAL BINDS
+    return cast(
+        literal(dumps({key: str(value) if isinstance(value, UUID) else value}), String),
+        JSONB,
+    )
+
+
 def _filters(filtering: FilteringDTO) -> list:
     _conditions = []
 
@@ -732,6 +1626,13 @@ def _filters(filtering: FilteringDTO) -> list:
             field = _split[0]
             key = _split[1] if len(_split) > 1 else None
 
+            # USE GIN INDEXES WHEN ELIGIBLE
+            indexed = _indexed_filter(field, key, condition.operator, value)
+
+            if indexed is not None:
+                _conditions.append(indexed)
+                continue
+
             # GET COLUMN AS ATTRIBUTE
             attribute: Column = getattr(NodesDBE, field)
 
@@ -1,7 +1,8 @@
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy import Column, UUID, TIMESTAMP, Enum as SQLEnum, String
+from sqlalchemy import Integer, BigInteger, Numeric, Boolean
 
-from oss.src.core.observability.dtos import TreeType, NodeType
+from oss.src.core.observability.dtos import TreeType, NodeType, Focus, StatusCode
 from oss.src.dbs.postgres.shared.dbas import ProjectScopeDBA, LifecycleDBA
 
 
@@ -43,6 +44,7 @@ class StatusDBA:
     __abstract__ = True
 
     status = Column(JSONB(none_as_null=True), nullable=True)
+    status_code = Column(SQLEnum(StatusCode), nullable=True)
 
 
 class AttributesDBA:
@@ -54,10 +56,22 @@ class AttributesDBA:
     refs = Column(JSONB(none_as_null=True), nullable=True)
 
 
+class TypedMetricsDBA:
+    __abstract__ = True
+
+    unit_duration_total = Column(Numeric, nullable=True)
+    unit_costs_total = Column(Numeric, nullable=True)
+    unit_tokens_total = Column(BigInteger, nullable=True)
+    acc_duration_total = Column(Numeric, nullable=True)
+    acc_costs_total = Column(Numeric, nullable=True)
+    acc_tokens_total = Column(BigInteger, nullable=True)
+
+
 class EventsDBA:
     __abstract__ = True
 
     exception = Column(JSONB(none_as_null=True), nullable=True)
+    is_error = Column(Boolean, nullable=True)
 
 
 class LinksDBA:
@@ -88,9 +102,45 @@ class SpanDBA(
     TimeDBA,
     StatusDBA,
     AttributesDBA,
+    TypedMetricsDBA,
     EventsDBA,
     LinksDBA,
     FullTextSearchDBA,
     OTelDBA,
 ):
     __abstract__ = True
+
+
+class BucketDBA:
+    __abstract__ = True
+
+    granularity = Column(Integer, nullable=False)  # minutes
+    focus = Column(SQLEnum(Focus), nullable=False)
+    bucket = Column(TIMESTAMP(timezone=True), nullable=False)
+
+
+class TotalMetricsDBA:
+    __abstract__ = True
+
+    count = Column(BigInteger, nullable=False, default=0)
+    duration = Column(Numeric, nullable=False, default=0)
+    cost = Column(Numeric, nullable=False, default=0)
+    tokens = Column(BigInteger, nullable=False, default=0)
+
+
+class ErrorMetricsDBA:
+    __abstract__ = True
+
+    error_count = Column(BigInteger, nullable=False, default=0)
+    error_duration = Column(Numeric, nullable=False, default=0)
+    error_cost = Column(Numeric, nullable=False, default=0)
+    error_tokens = Column(BigInteger, nullable=False, default=0)
+
+
+class RollupDBA(
+    ProjectScopeDBA,
+    BucketDBA,
+    TotalMetricsDBA,
+    ErrorMetricsDBA,
+):
+    __abstract__ = True
@@ -1,7 +1,7 @@
-from sqlalchemy import PrimaryKeyConstraint, Index
+from sqlalchemy import PrimaryKeyConstraint, Index, text
 
 from oss.src.dbs.postgres.shared.base import Base
-from oss.src.dbs.postgres.observability.dbas import SpanDBA
+from oss.src.dbs.postgres.observability.dbas import SpanDBA, RollupDBA
 
 
 class NodesDBE(Base, SpanDBA):
@@ -11,7 +11,8 @@ class NodesDBE(Base, SpanDBA):
         PrimaryKeyConstraint(
             "project_id",
             "node_id",
-        ),  # focus = node
+            "created_at",
+        ),  # focus = node, including the partition key
         Index(
             "index_project_id_tree_id",
             "project_id",
@@ -27,4 +28,58 @@ class NodesDBE(Base, SpanDBA):
             "project_id",
             "created_at",
         ),  # sorting and pagination
+        Index(
+            "index_project_id_acc_costs_total",
+            "project_id",
+            "acc_costs_total",
+        ),  # filtering on costs
+        Index(
+            "index_project_id_acc_duration_total",
+            "project_id",
+            "acc_duration_total",
+        ),  # filtering on latency
+        Index(
+            "index_project_id_acc_tokens_total",
+            "project_id",
+            "acc_tokens_total",
+        ),  # filtering on tokens
+        Index(
+            "index_project_id_created_at_is_error",
+            "project_id",
+            "created_at",
+            postgresql_where=text("is_error"),
+        ),  # filtering on errors
+        Index(
+            "index_content_trgm",
+            "content",
+            postgresql_using="gin",
+            postgresql_ops={"content": "gin_trgm_ops"},
+        ),  # text search on content
+        Index(
+            "index_refs_gin",
+            "refs",
+            postgresql_using="gin",
+            postgresql_ops={"refs": "jsonb_path_ops"},
+        ),  # containment on refs
+        Index(
+            "index_meta_gin",
+            "meta",
+            postgresql_using="gin",
+        ),  # existence on meta
+        {
+            "postgresql_partition_by": "RANGE (created_at)",
+        },  # weekly partitions, see migrations and ObservabilityDAO.maintain()
+    )
+
+
+class NodesRollupsDBE(Base, RollupDBA):
+    __tablename__ = "nodes_rollups"
+
+    __table_args__ = (
+        PrimaryKeyConstraint(
+            "project_id",
+            "granularity",
+            "focus",
+            "bucket",
+        ),  # windowing
     )
@@ -1,6 +1,7 @@
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Dict, Any
 from json import dumps, loads
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
 
 from oss.src.core.shared.dtos import LifecycleDTO
 from oss.src.core.observability.dtos import (
@@ -15,9 +16,22 @@ from oss.src.core.observability.dtos import (
     SpanDTO,
     MetricsDTO,
     BucketDTO,
+    Focus,
 )
 
-from oss.src.dbs.postgres.observability.dbes import NodesDBE
+from oss.src.dbs.postgres.observability.dbes import NodesDBE, NodesRollupsDBE
+
+TYPED_METRICS = {
+    "unit.duration.total": ("unit_duration_total", float),
+    "unit.costs.total": ("unit_costs_total", float),
+    "unit.tokens.total": ("unit_tokens_total", int),
+    "acc.duration.total": ("acc_duration_total", float),
+    "acc.costs.total": ("acc_costs_total", float),
+    "acc.tokens.total": ("acc_tokens_total", int),
+}
+
+ROLLUP_GRANULARITIES = [1440, 60, 1]  # minutes, coarsest first
+ROLLUP_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 
 def map_span_dbe_to_dto(span: NodesDBE) -> SpanDTO:
@@ -78,11 +92,39 @@ def map_span_dbe_to_dto(span: NodesDBE) -> SpanDTO:
     )
 
 
+def _get_metric(
+    metrics: Optional[Dict[str, Any]],
+    key: str,
+    to_type: type,
+) -> Optional[Any]:
+    if not metrics or metrics.get(key) is None:
+        return None
+
+    try:
+        return to_type(float(metrics[key]))
+    except (TypeError, ValueError):
+        return None
+
+
 def map_span_dto_to_dbe(
     project_id: str,
     span_dto: SpanDTO,
 ) -> NodesDBE:
     span_dbe = NodesDBE(
+        **map_span_dto_to_values(
+            project_id=project_id,
+            span_dto=span_dto,
+        )
+    )
+
+    return span_dbe
+
+
+def map_span_dto_to_values(
+    project_id: str,
+    span_dto: SpanDTO,
+) -> Dict[str, Any]:
+    span_values = dict(
         # SCOPE
         project_id=project_id,
         # LIFECYCLE
@@ -107,15 +149,22 @@ def map_span_dto_to_dbe(
         status=(
             span_dto.status.model_dump(exclude_none=True) if span_dto.status else None
         ),
+        status_code=span_dto.status.code if span_dto.status else None,
         # ATTRIBUTES
         data=span_dto.encode(span_dto.data),
         metrics=span_dto.encode(span_dto.metrics),
         meta=span_dto.encode(span_dto.meta),
         refs=span_dto.encode(span_dto.refs),
+        # TYPED METRICS
+        **{
+            column: _get_metric(span_dto.metrics, key, to_type)
+            for key, (column, to_type) in TYPED_METRICS.items()
+        },
         # EVENTS
         exception=(
             loads(span_dto.exception.model_dump_json()) if span_dto.exception else None
         ),
+        is_error=span_dto.exception is not None,
         # LINKS
         links=(
             [loads(link.model_dump_json()) for link in span_dto.links]
@@ -128,47 +177,41 @@ def map_span_dto_to_dbe(
         otel=loads(span_dto.otel.model_dump_json()) if span_dto.otel else None,
     )
 
-    return span_dbe
+    return span_values
 
 
 def map_bucket_dbes_to_dtos(
-    total_bucket_dbes: List[NodesDBE],
-    error_bucket_dbes: List[NodesDBE],
+    bucket_dbes: List[Any],
     window: int,
     timestamps: Optional[List[datetime]] = None,
 ) -> Tuple[List[BucketDTO], int]:
-    total_metrics = {
-        bucket.timestamp: MetricsDTO(
-            count=bucket.count,
-            duration=bucket.duration,
-            cost=bucket.cost,
-            tokens=bucket.tokens,
+    total_metrics: Dict[datetime, MetricsDTO] = dict()
+    error_metrics: Dict[datetime, MetricsDTO] = dict()
+
+    # BUCKETS MAY SPAN SEVERAL ROWS (e.g. RAW EDGES AND ROLLUPS)
+    for bucket in bucket_dbes:
+        total_metrics.setdefault(bucket.timestamp, MetricsDTO()).plus(
+            MetricsDTO(
+                count=bucket.count,
+                duration=bucket.duration,
+                cost=bucket.cost,
+                tokens=bucket.tokens,
+            )
         )
-        for bucket in total_bucket_dbes
-    }
-
-    error_metrics = {
-        bucket.timestamp: MetricsDTO(
-            count=bucket.count,
-            duration=bucket.duration,
-            cost=bucket.cost,
-            tokens=bucket.tokens,
+        error_metrics.setdefault(bucket.timestamp, MetricsDTO()).plus(
+            MetricsDTO(
+                count=bucket.error_count,
+                duration=bucket.error_duration,
+                cost=bucket.error_cost,
+                tokens=bucket.error_tokens,
+            )
         )
-        for bucket in error_bucket_dbes
-    }
 
     total_timestamps = timestamps
     if not total_timestamps:
-        total_timestamps = list(
-            set(list(total_metrics.keys()) + list(error_metrics.keys()))
-        )
+        total_timestamps = list(total_metrics.keys())
         total_timestamps.sort()
 
-    _total_timestamps = list(
-        set(list(total_metrics.keys()) + list(error_metrics.keys()))
-    )
-    _total_timestamps.sort()
-
     bucket_dtos = [
         BucketDTO(
             timestamp=timestamp,
@@ -182,3 +225,91 @@ def map_bucket_dbes_to_dtos(
     count = len(bucket_dtos)
 
     return bucket_dtos, count
+
+
+def map_span_dbes_to_rollup_values(
+    project_id: UUID,
+    span_dbes: List[Any],
+    sign: int = 1,
+) -> List[Dict[str, Any]]:
+    """
+    Aggregates spans into per-granularity rollup deltas.
+
+    Each span row must expose created_at, parent_id, is_error and the typed
+    unit/acc metrics columns. Use sign=-1 to compute the deltas of deleted spans.
+    """
+    rollups: Dict[Tuple[int, str, datetime], Dict[str, Any]] = dict()
+
+    for span in span_dbes:
+        for focus, prefix in ((Focus.NODE, "unit"), (Focus.TREE, "acc")):
+            # TREE ROLLUPS ONLY COUNT ROOT NODES, AS IN ANALYTICS
+            if focus == Focus.TREE and span.parent_id is not None:
+                continue
+
+            duration = float(getattr(span, f"{prefix}_duration_total") or 0.0)
+            cost = float(getattr(span, f"{prefix}_costs_total") or 0.0)
+            tokens = int(getattr(span, f"{prefix}_tokens_total") or 0)
+
+            for granularity in ROLLUP_GRANULARITIES:
+                bucket = floor_to_granularity(span.created_at, granularity)
+
+                key = (granularity, focus.value, bucket)
+
+                if key not in rollups:
+                    rollups[key] = dict(
+                        project_id=project_id,
+                        granularity=granularity,
+                        focus=focus,
+                        bucket=bucket,
+                        count=0,
+                        duration=0.0,
+                        cost=0.0,
+                        tokens=0,
+                        error_count=0,
+                        error_duration=0.0,
+                        error_cost=0.0,
+                        error_tokens=0,
+                    )
+
+                rollup = rollups[key]
+
+                rollup["count"] += sign
+                rollup["duration"] += sign * duration
+                rollup["cost"] += sign * cost
+                rollup["tokens"] += sign * tokens
+
+                if span.is_error:
+                    rollup["error_count"] += sign
+                    rollup["error_duration"] += sign * duration
+                    rollup["error_cost"] += sign * cost
+                    rollup["error_tokens"] += sign * tokens
+
+    # SORTED TO TAKE ROW LOCKS IN THE SAME ORDER ACROSS WRITERS
+    return [rollups[key] for key in sorted(rollups.keys())]
+
+
+def floor_to_granularity(
+    timestamp: datetime,
+    granularity: int,
+) -> datetime:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+
+    step = timedelta(minutes=granularity)
+
+    return ROLLUP_EPOCH + ((timestamp - ROLLUP_EPOCH) // step) * step
+
+
+def ceil_to_granularity(
+    timestamp: datetime,
+    granularity: int,
+) -> datetime:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+
+    floor = floor_to_granularity(timestamp, granularity)
+
+    if floor == timestamp:
+        return floor
+
+    return floor + timedelta(minutes=granularity)
@@ -1,3 +1,30 @@
 import os
 
 POSTGRES_URI = os.environ.get("POSTGRES_URI")
+
+# POOL
+POSTGRES_POOL_SIZE = int(os.getenv("POSTGRES_POOL_SIZE", "20"))
+POSTGRES_POOL_MAX_OVERFLOW = int(os.getenv("POSTGRES_POOL_MAX_OVERFLOW", "10"))
+POSTGRES_POOL_TIMEOUT = float(os.getenv("POSTGRES_POOL_TIMEOUT", "30"))  # seconds
+POSTGRES_POOL_RECYCLE = int(os.getenv("POSTGRES_POOL_RECYCLE", "1800"))  # seconds
+POSTGRES_POOL_PRE_PING = os.getenv("POSTGRES_POOL_PRE_PING", "true") == "true"
+# One connection per request, instead of one per session. The connection is
+# held for the whole request, including its awaits on anything but the
+# database, so at most POOL_SIZE + MAX_OVERFLOW requests use the database at once.
+POSTGRES_POOL_PER_REQUEST = os.getenv("POSTGRES_POOL_PER_REQUEST", "false") == "true"
+
+# ASYNCPG
+# Set to 0 behind poolers in transaction mode, e.g. PgBouncer.
+POSTGRES_STATEMENT_CACHE_SIZE = int(os.getenv("POSTGRES_STATEMENT_CACHE_SIZE", "100"))
+POSTGRES_COMMAND_TIMEOUT = float(os.getenv("POSTGRES_COMMAND_TIMEOUT", "0"))  # seconds
+
+# SERVER
+POSTGRES_STATEMENT_TIMEOUT = int(os.getenv("POSTGRES_STATEMENT_TIMEOUT", "0"))  # ms
+POSTGRES_IDLE_IN_TRANSACTION_TIMEOUT = int(
+    os.getenv("POSTGRES_IDLE_IN_TRANSACTION_TIMEOUT", "0")  # ms
+)
+
+# METRICS
+POSTGRES_SLOW_QUERY_THRESHOLD = float(
+    os.getenv("POSTGRES_SLOW_QUERY_THRESHOLD", "1000")  # ms
+)
@@ -1,16 +1,88 @@
-from asyncio import current_task
-from typing import AsyncGenerator
+from asyncio import Task, current_task
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Dict, Optional
 from contextlib import asynccontextmanager
 
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
+    AsyncConnection,
     AsyncEngine,
     create_async_engine,
     async_sessionmaker,
     async_scoped_session,
 )
 
-from oss.src.dbs.postgres.shared.config import POSTGRES_URI
+from oss.src.dbs.postgres.shared.metrics import EngineMetrics, InstrumentedPool
+from oss.src.dbs.postgres.shared.config import (
+    POSTGRES_URI,
+    POSTGRES_POOL_SIZE,
+    POSTGRES_POOL_MAX_OVERFLOW,
+    POSTGRES_POOL_TIMEOUT,
+    POSTGRES_POOL_RECYCLE,
+    POSTGRES_POOL_PRE_PING,
+    POSTGRES_STATEMENT_CACHE_SIZE,
+    POSTGRES_COMMAND_TIMEOUT,
+    POSTGRES_STATEMENT_TIMEOUT,
+    POSTGRES_IDLE_IN_TRANSACTION_TIMEOUT,
+    POSTGRES_SLOW_QUERY_THRESHOLD,
+)
+
+
+def _connect_args(
+    postgres_uri: str,
+) -> Dict[str, Any]:
+    if make_url(postgres_uri).get_driver_name() != "asyncpg":
+        return {}
+
+    server_settings = {}
+
+    if POSTGRES_STATEMENT_TIMEOUT:
+        server_settings["statement_timeout"] = str(POSTGRES_STATEMENT_TIMEOUT)
+
+    if POSTGRES_IDLE_IN_TRANSACTION_TIMEOUT:
+        server_settings["idle_in_transaction_session_timeout"] = str(
+            POSTGRES_IDLE_IN_TRANSACTION_TIMEOUT
+        )
+
+    return {
+        # SQLALCHEMY'S CACHE OF PREPARED STATEMENTS, THEN ASYNCPG'S OWN
+        "prepared_statement_cache_size": POSTGRES_STATEMENT_CACHE_SIZE,
+        "statement_cache_size": POSTGRES_STATEMENT_CACHE_SIZE,
+        "command_timeout": POSTGRES_COMMAND_TIMEOUT or None,
+        "server_settings": server_settings,
+    }
+
+
+class RequestScope:
+    """
+    Connection checked out once per request, and lent to its sessions in turn.
+
+    Sessions still commit or roll back their own transactions, but skip the
+    pool checkout, pre-ping and reset of a connection every time. Sessions
+    nested in the session the connection is lent to, i.e. opened by the same
+    task, join its transaction through a savepoint: they see its writes, and
+    their own are only committed with it. Sessions opened concurrently, i.e.
+    by other tasks, fall back to the pool.
+    """
+
+    def __init__(self) -> None:
+        self.connection: Optional[AsyncConnection] = None
+        self.lent = False
+        self.task: Optional[Task] = None
+        self.closed = False
+
+    async def release(self) -> None:
+        if self.connection is not None:
+            connection, self.connection = self.connection, None
+
+            await connection.close()
+
+
+_request_scope: ContextVar[Optional[RequestScope]] = ContextVar(
+    "request_scope",
+    default=None,
+)
 
 
 class Engine:
@@ -19,7 +91,18 @@ class Engine:
 
         self.async_engine: AsyncEngine = create_async_engine(
             url=self.postgres_uri,
+            poolclass=InstrumentedPool,
+            pool_size=POSTGRES_POOL_SIZE,
+            max_overflow=POSTGRES_POOL_MAX_OVERFLOW,
+            pool_timeout=POSTGRES_POOL_TIMEOUT,
+            pool_recycle=POSTGRES_POOL_RECYCLE,
+            pool_pre_ping=POSTGRES_POOL_PRE_PING,
+            connect_args=_connect_args(self.postgres_uri),
         )
+        self.metrics = EngineMetrics(
+            slow_query_threshold=POSTGRES_SLOW_QUERY_THRESHOLD,
+        )
+        self.metrics.instrument(self.async_engine.sync_engine)
         self.async_session_maker = async_sessionmaker(
             autocommit=False,
             autoflush=False,
@@ -41,10 +124,81 @@ class Engine:
 
         await self.async_engine.dispose()
 
+    @asynccontextmanager
+    async def request_scope(self) -> AsyncGenerator[RequestScope, None]:
+        scope = RequestScope()
+        token = _request_scope.set(scope)
+
+        try:
+            yield scope
+
+        finally:
+            _request_scope.reset(token)
+
+            scope.closed = True
+
+            # OTHERWISE RELEASED BY THE SESSION IT IS LENT TO, e.g. WHEN STREAMING
+            if not scope.lent:
+                await scope.release()
+
     @asynccontextmanager
     async def session(self) -> AsyncGenerator[AsyncSession, None]:
-        session: AsyncSession = self.async_session()
+        scope = _request_scope.get()
+
+        if scope is None or scope.closed:
+            async with self._session(self.async_session()) as session:
+                yield session
+
+            return
+
+        if scope.lent:
+            if scope.task is not current_task() or scope.connection is None:
+                async with self._session(self.async_session()) as session:
+                    yield session
+
+                return
+
+            # NESTED, SO THE LENT CONNECTION IS IDLE UNTIL THIS SESSION IS DONE
+            async with self._session(
+                self.async_session_maker(
+                    bind=scope.connection,
+                    join_transaction_mode="create_savepoint",
+                )
+            ) as session:
+                yield session
+
+            return
+
+        scope.lent = True
+        scope.task = current_task()
 
+        try:
+            if scope.connection is None:
+                scope.connection = await self.async_engine.connect()
+
+            async with self._session(
+                self.async_session_maker(bind=scope.connection)
+            ) as session:
+                yield session
+
+        except Exception as e:
+            # DO NOT LEND A CONNECTION IN AN UNKNOWN STATE
+            await scope.release()
+
+            raise e
+
+        finally:
+            scope.lent = False
+            scope.task = None
+
+            if scope.closed:
+                await scope.release()
+
+    @asynccontextmanager
+    async def _session(
+        self,
+        session: AsyncSession,
+    ) -> AsyncGenerator[AsyncSession, None]:
         try:
             yield session
 
@@ -61,10 +215,10 @@ class Engine:
     ### LEGACY CODE ###
 
     async def init_db(self):
-        self.open()
+        await self.open()
 
     async def close_db(self):
-        self.close()
+        await self.close()
 
 
 engine = Engine()
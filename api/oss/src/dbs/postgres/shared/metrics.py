@@ -0,0 +1,173 @@
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from oss.src.utils.logging import get_module_logger
+
+log = get_module_logger(__file__)
+
+
+CHECKOUT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)  # ms
+QUERY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)  # ms
+
+
+class Histogram:
+    """Cumulative histogram of durations, in milliseconds."""
+
+    def __init__(
+        self,
+        buckets: Tuple[float, ...],
+    ):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(
+        self,
+        value: float,
+    ) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulated = 0
+        buckets: Dict[str, int] = dict()
+
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulated += count
+            buckets[str(bound)] = cumulated
+
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "buckets": buckets,
+        }
+
+
+class EngineMetrics:
+    """
+    Connection pool and query metrics of an engine.
+
+    Checkout waits are timed by the instrumented pool, query durations by
+    cursor execution events. Statements slower than the threshold are logged.
+    """
+
+    def __init__(
+        self,
+        *,
+        slow_query_threshold: float,
+    ):
+        self.slow_query_threshold = slow_query_threshold
+
+        self.checkout_wait = Histogram(CHECKOUT_BUCKETS)
+        self.checkout_timeouts = 0
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.slow_queries = 0
+
+        self._engine: Optional[Engine] = None
+
+    def instrument(
+        self,
+        engine: Engine,
+    ) -> None:
+        self._engine = engine
+
+        if isinstance(engine.pool, InstrumentedPool):
+            engine.pool.metrics = self
+
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = self._engine.pool if self._engine else None
+
+        return {
+            "pool": (
+                {
+                    "size": pool.size(),
+                    "checked_in": pool.checkedin(),
+                    "checked_out": pool.checkedout(),
+                    "overflow": pool.overflow(),
+                }
+                if isinstance(pool, AsyncAdaptedQueuePool)
+                else None
+            ),
+            "checkout_wait": self.checkout_wait.snapshot(),
+            "checkout_timeouts": self.checkout_timeouts,
+            "queries": self.queries.snapshot(),
+            "slow_queries": self.slow_queries,
+        }
+
+    def _before_cursor_execute(  # pylint: disable=too-many-arguments
+        self,
+        conn,
+        cursor,
+        statement,
+        parameters,
+        context,
+        executemany,
+    ) -> None:
+        conn.info.setdefault("query_start_time", []).append(perf_counter())
+
+    def _after_cursor_execute(  # pylint: disable=too-many-arguments
+        self,
+        conn,
+        cursor,
+        statement: str,
+        parameters,
+        context,
+        executemany,
+    ) -> None:
+        started: List[float] = conn.info.get("query_start_time")
+
+        if not started:
+            return
+
+        duration = (perf_counter() - started.pop()) * 1000
+
+        self.queries.observe(duration)
+
+        if duration >= self.slow_query_threshold:
+            self.slow_queries += 1
+
+            log.warning(
+                "Slow query took %.0f ms: %s",
+                duration,
+                " ".join(statement.split())[:500],
+            )
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool timing how long checkouts wait for a connection."""
+
+    metrics: Optional[EngineMetrics] = None
+
+    def _do_get(self):
+        started = perf_counter()
+
+        try:
+            return super()._do_get()
+
+        except PoolTimeoutError:
+            if self.metrics:
+                self.metrics.checkout_timeouts += 1
+
+            raise
+
+        finally:
+            if self.metrics:
+                self.metrics.checkout_wait.observe((perf_counter() - started) * 1000)
+
+    def recreate(self) -> "InstrumentedPool":
+        pool = super().recreate()
+
+        pool.metrics = self.metrics
+
+        return pool
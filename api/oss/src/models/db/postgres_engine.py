@@ -4,12 +4,12 @@ from contextlib import asynccontextmanager
 
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
-    create_async_engine,
     async_sessionmaker,
     async_scoped_session,
 )
 
 from oss.src.models.db.config import POSTGRES_URI
+from oss.src.dbs.postgres.shared.engine import engine as shared_engine
 
 
 class DBEngine:
@@ -19,7 +19,8 @@ class DBEngine:
 
     def __init__(self) -> None:
         self.postgres_uri = POSTGRES_URI
-        self.engine = create_async_engine(url=self.postgres_uri)  # type: ignore
+        # Shares the connection pool of the main engine, see dbs.postgres.shared
+        self.engine = shared_engine.async_engine
         self.async_session_maker = async_sessionmaker(
             bind=self.engine, class_=AsyncSession, expire_on_commit=False
         )
@@ -62,16 +63,10 @@ class DBEngine:
 
     async def close_db(self):
         """
-        Closes and dispose all the connections using the engine.
-
-        :raises     Exception:  if engine is initialized
+        Does not close any connection, as the connection pool belongs to the
+        shared engine, which closes it on shutdown, see engine.close().
         """
 
-        if self.engine is None:
-            raise Exception("DBEngine is not initialized")
-
-        await self.engine.dispose()
-
 
 # Initialize db engine
 db_engine = DBEngine()
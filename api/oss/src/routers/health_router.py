@@ -1,5 +1,6 @@
 from fastapi import status
 from oss.src.utils.common import APIRouter
+from oss.src.dbs.postgres.shared.engine import engine
 
 router = APIRouter()
 
@@ -7,3 +8,8 @@ router = APIRouter()
 @router.get("/", status_code=status.HTTP_200_OK, operation_id="health_check")
 def health_check():
     return {"status": "ok"}
+
+
+@router.get("/db", status_code=status.HTTP_200_OK, operation_id="health_check_db")
+def health_check_db():
+    return {"status": "ok", "metrics": engine.metrics.snapshot()}
@@ -5,6 +5,7 @@ from fastapi.responses import JSONResponse
 
 from oss.src.utils.logging import get_module_logger
 from oss.src.services import db_manager
+from oss.src.services.auth_cache import auth_cache
 from oss.src.utils.common import APIRouter, is_ee
 from oss.src.models.api.workspace_models import Workspace
 
@@ -110,6 +111,8 @@ async def remove_user_from_workspace(
         workspace_id (str): The ID of the workspace.
     """
 
+    user = await db_manager.get_user_with_email(email=email)
+
     if is_ee():
         user_org_workspace_data = await get_user_org_and_workspace_id(
             request.state.user_id
@@ -144,4 +147,8 @@ async def remove_user_from_workspace(
             email=email,
         )
 
+    # THE CACHED CONTEXTS OF THE USER WOULD KEEP THEIR ACCESS UNTIL THEY EXPIRE
+    if user:
+        await auth_cache.invalidate_user(user_id=str(user.id))
+
     return delete_user_from_workspace
@@ -5,7 +5,7 @@ import uuid
 import string
 import secrets
 import hashlib
-from typing import List, Union
+from typing import List, Optional, Union
 from datetime import datetime, timezone
 
 from sqlalchemy.future import select
@@ -14,7 +14,8 @@ from sqlalchemy.exc import NoResultFound
 from oss.src.utils.logging import get_module_logger
 from oss.src.models.db_models import APIKeyDB
 from oss.src.dbs.postgres.shared.engine import engine
-from oss.src.utils.redis_utils import redis_connection
+from oss.src.utils.redis_utils import async_redis_connection
+from oss.src.services.auth_cache import auth_cache
 
 log = get_module_logger(__file__)
 
@@ -133,37 +134,62 @@ async def is_valid_api_key(key: str):
         return api_key
 
 
-async def check_rate_limit(api_key_obj: APIKeyDB, cache_key: str):
+async def check_rate_limit(rate_limit: int, cache_key: str):
     """
     Checks if an API key has exceeded its rate limit.
 
     Args:
-    - key: The API key to be checked.
+    - rate_limit: The number of requests allowed per minute, 0 for unlimited.
+    - cache_key: The Redis key counting the requests of the API key.
 
     Returns:
     - True if the API key has exceeded its rate limit, False otherwise.
     """
 
-    if api_key_obj.rate_limit > 0:
-        # Check rate limiting in Redis
-        r = redis_connection()
-        if r is not None:
-            api_requests_within_minute = r.get(cache_key)
-            if api_requests_within_minute is None:
-                # Initialize the count in Redis with an initial value of 1 and a one-minute TTL
-                r.setex(cache_key, 60, 1)
-            else:
-                # Check if requests made within the last minute exceed the rate limit
-                count_within_minute = int(api_requests_within_minute.decode("utf-8"))
-                if count_within_minute > api_key_obj.rate_limit:
-                    return True
-
-        # increment the apikey usage count in redis
-        r.incr(cache_key)
+    if rate_limit > 0:
+        # Count the requests made within the current minute in Redis
+        r = async_redis_connection()
+
+        count_within_minute = await r.incr(cache_key)
+        if count_within_minute == 1:
+            await r.expire(cache_key, 60)
+
+        if count_within_minute > rate_limit:
+            return True
 
     return False
 
 
+def hash_api_key(key: str) -> Optional[str]:
+    """
+    Hashes an API key the way it is stored, i.e. as "<prefix>.<sha256 of raw key>".
+
+    Args:
+        key (str): The API key, optionally with a "Bearer " prefix.
+
+    Returns:
+        Optional[str]: The prefixed hashed API key, None if the API key is malformed.
+    """
+
+    try:
+        # Extract the prefix and raw API key
+        bearer_prefix, raw_api_key = key.split(".", 1)
+
+        # Retrieve the prefix of the api key from the bearer_prefix (Bearer xxxxxx)
+        prefix = (
+            bearer_prefix.split(" ")[-1] if "Bearer" in bearer_prefix else bearer_prefix
+        )
+
+    except ValueError:
+        return None
+
+    # Hash the raw API key
+    hashed_api_key = hashlib.sha256(raw_api_key.encode()).hexdigest()
+
+    # Add the prefix to the hashed API key
+    return f"{prefix}.{hashed_api_key}"
+
+
 async def use_api_key(key: str) -> Union[APIKeyDB, bool]:
     """
     Validates and checks the rate limit of an API key.
@@ -195,24 +221,11 @@ async def use_api_key(key: str) -> Union[APIKeyDB, bool]:
     ```
     """
 
-    try:
-        # Extract the prefix and raw API key
-        bearer_prefix, raw_api_key = key.split(".", 1)
-
-        # Retrieve the prefix of the api key from the bearer_prefix (Bearer xxxxxx)
-        prefix = (
-            bearer_prefix.split(" ")[-1] if "Bearer" in bearer_prefix else bearer_prefix
-        )
+    prefixed_hashed_api_key = hash_api_key(key)
 
-    except ValueError as exc:
+    if not prefixed_hashed_api_key:
         return False
 
-    # Hash the raw API key
-    hashed_api_key = hashlib.sha256(raw_api_key.encode()).hexdigest()
-
-    # Add the prefix to the hashed API key
-    prefixed_hashed_api_key = f"{prefix}.{hashed_api_key}"
-
     # Use the API key and check rate limiting
     api_key = await is_valid_api_key(key=prefixed_hashed_api_key)
 
@@ -269,3 +282,5 @@ async def delete_api_key(user_id: str, key_prefix: str):
 
         await session.delete(existing_key)
         await session.commit()
+
+    await auth_cache.invalidate(existing_key.hashed_key)
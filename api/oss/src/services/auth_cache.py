@@ -0,0 +1,274 @@
+import os
+from json import dumps, loads
+from time import monotonic
+from hashlib import sha256
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+from asyncio import Task, CancelledError, create_task, sleep
+
+from oss.src.utils.logging import get_module_logger
+from oss.src.utils.redis_utils import async_redis_connection
+from oss.src.services import db_manager
+
+log = get_module_logger(__file__)
+
+_REDIS_CONFIGURED = bool(os.getenv("REDIS_URL"))
+
+# ENV VARS
+AUTH_CACHE_ENABLED = os.getenv("AGENTA_AUTH_CACHE_ENABLED", "true") == "true"
+AUTH_CACHE_TTL = int(os.getenv("AGENTA_AUTH_CACHE_TTL", "60"))  # seconds
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AGENTA_AUTH_CACHE_MAX_ENTRIES", "10000"))
+AUTH_CACHE_REDIS = (
+    os.getenv("AGENTA_AUTH_CACHE_REDIS", str(_REDIS_CONFIGURED).lower()) == "true"
+)
+AUTH_CACHE_LOCAL_TTL = int(
+    os.getenv("AGENTA_AUTH_CACHE_LOCAL_TTL", "1")  # seconds, with Redis only
+)
+AUTH_LAST_USED_INTERVAL = float(
+    os.getenv("AGENTA_AUTH_LAST_USED_INTERVAL", "10")  # seconds
+)
+
+_REDIS_PREFIX = "agenta:auth"
+
+
+def hash_credentials(*parts: Optional[str]) -> str:
+    return sha256(":".join(part or "" for part in parts).encode()).hexdigest()
+
+
+class AuthCache:
+    """
+    Resolved authentication contexts, keyed by credential hash.
+
+    A context holds the ids the middleware sets on the request state, i.e.
+    user, project, workspace and organization, plus what is needed to keep
+    checking the credentials, e.g. API key expiration and rate limit.
+
+    Contexts live in a TTL LRU local to the process, and in Redis, shared
+    across workers, when it is configured. Revocations go through invalidate(),
+    which only reaches the other workers through Redis: with Redis, contexts
+    are kept locally for local_ttl only, and revocations propagate within it;
+    without Redis, they propagate to the other workers within the TTL.
+
+    Contexts are also indexed by user, so that invalidate_user() revokes all
+    the contexts of a user, e.g. when they are removed from a workspace, or
+    their role changes.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = AUTH_CACHE_ENABLED,
+        ttl: int = AUTH_CACHE_TTL,
+        max_entries: int = AUTH_CACHE_MAX_ENTRIES,
+        redis: bool = AUTH_CACHE_REDIS,
+        local_ttl: int = AUTH_CACHE_LOCAL_TTL,
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.redis = redis
+        self.local_ttl = min(local_ttl, ttl) if redis else ttl
+
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    async def get(
+        self,
+        key: str,
+    ) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            expires_at, auth_context = entry
+
+            if expires_at >= monotonic():
+                self._entries.move_to_end(key)
+
+                return auth_context
+
+            del self._entries[key]
+
+        if not self.redis:
+            return None
+
+        try:
+            value = await async_redis_connection().get(f"{_REDIS_PREFIX}:{key}")
+
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            log.warning("Failed to read auth cache with error %s", str(e))
+
+            return None
+
+        if value is None:
+            return None
+
+        auth_context = loads(value)
+
+        self._set(key, auth_context)
+
+        return auth_context
+
+    async def set(
+        self,
+        key: str,
+        auth_context: Dict[str, Any],
+    ) -> None:
+        if not self.enabled:
+            return
+
+        self._set(key, auth_context)
+
+        if not self.redis:
+            return
+
+        try:
+            redis = async_redis_connection()
+
+            await redis.setex(
+                f"{_REDIS_PREFIX}:{key}",
+                self.ttl,
+                dumps(auth_context),
+            )
+
+            if auth_context.get("user_id"):
+                # THE INDEX OUTLIVES THE CONTEXTS IT LISTS, NOT THE OTHER WAY
+                user_key = f"{_REDIS_PREFIX}:user:{auth_context['user_id']}"
+
+                await redis.sadd(user_key, key)
+                await redis.expire(user_key, self.ttl)
+
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            log.warning("Failed to write auth cache with error %s", str(e))
+
+    async def invalidate(
+        self,
+        key: str,
+    ) -> None:
+        self._entries.pop(key, None)
+
+        if not self.redis:
+            return
+
+        try:
+            await async_redis_connection().delete(f"{_REDIS_PREFIX}:{key}")
+
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            log.error("Failed to invalidate auth cache with error %s", str(e))
+
+    async def invalidate_user(
+        self,
+        user_id: str,
+    ) -> None:
+        for key, (_, auth_context) in list(self._entries.items()):
+            if auth_context.get("user_id") == user_id:
+                del self._entries[key]
+
+        if not self.redis:
+            return
+
+        try:
+            redis = async_redis_connection()
+
+            user_key = f"{_REDIS_PREFIX}:user:{user_id}"
+
+            keys = await redis.smembers(user_key)
+
+            await redis.delete(
+                user_key,
+                *(f"{_REDIS_PREFIX}:{key.decode()}" for key in keys),
+            )
+
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            log.error("Failed to invalidate auth cache with error %s", str(e))
+
+    def _set(
+        self,
+        key: str,
+        auth_context: Dict[str, Any],
+    ) -> None:
+        self._entries[key] = (monotonic() + self.local_ttl, auth_context)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class LastUsedWriter:
+    """
+    Batches API key last-usage timestamps, written back periodically.
+
+    Usages are recorded in memory, and flushed in a single UPDATE per interval
+    instead of one per request. Without the background task, e.g. in scripts
+    and tests, usages are written right away.
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float = AUTH_LAST_USED_INTERVAL,
+    ):
+        self.interval = interval
+
+        self._pending: Dict[str, datetime] = dict()
+        self._task: Optional[Task] = None
+
+    async def touch(
+        self,
+        api_key_id: str,
+    ) -> None:
+        if not self._task:
+            await db_manager.update_api_key_timestamp(api_key_id=api_key_id)
+
+            return
+
+        self._pending[api_key_id] = datetime.now(timezone.utc)
+
+    async def start(self) -> None:
+        if self._task:
+            return
+
+        self._task = create_task(self._work())
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+
+        self._task.cancel()
+
+        try:
+            await self._task
+        except CancelledError:
+            pass
+
+        self._task = None
+
+        await self.flush()
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, dict()
+
+        # ONE TIMESTAMP PER BATCH, THE LATEST, IS PRECISE ENOUGH FOR LAST USAGE
+        await db_manager.update_api_keys_timestamps(
+            api_key_ids=list(pending.keys()),
+            timestamp=max(pending.values()),
+        )
+
+    async def _work(self) -> None:
+        while True:
+            await sleep(self.interval)
+
+            try:
+                await self.flush()
+
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                log.error("Failed to write API key usages with error %s", str(e))
+
+
+auth_cache = AuthCache()
+last_used_writer = LastUsedWriter()
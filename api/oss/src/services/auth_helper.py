@@ -15,6 +15,11 @@ from oss.src.utils.logging import get_module_logger
 from oss.src.utils.common import is_ee
 from oss.src.services import db_manager
 from oss.src.services import api_key_service
+from oss.src.services.auth_cache import (
+    auth_cache,
+    last_used_writer,
+    hash_credentials,
+)
 from oss.src.services.exceptions import (
     UnauthorizedException,
     TooManyRequestsException,
@@ -252,6 +257,19 @@ async def verify_bearer_token(
         if not user_session_id:
             raise UnauthorizedException()
 
+        # The session is verified above, on every request, so that only the
+        # resolution of its user, project, workspace and organization is cached.
+        auth_cache_key = hash_credentials(
+            user_session_id,
+            query_project_id,
+            query_workspace_id,
+        )
+
+        auth_context = await auth_cache.get(auth_cache_key)
+
+        if auth_context:
+            return await _set_bearer_auth_context(request, auth_context)
+
         user_info = await get_supertokens_user_by_id(user_id=user_session_id)
 
         if not user_info:
@@ -348,18 +366,16 @@ async def verify_bearer_token(
         if not (project_id and workspace_id):
             raise UnauthorizedException()
 
-        secret_token = await sign_secret_token(
-            user_id=user_id,
-            project_id=project_id,
-            workspace_id=workspace_id,
-            organization_id=organization_id,
-        )
+        auth_context = {
+            "user_id": user_id,
+            "project_id": project_id,
+            "workspace_id": workspace_id,
+            "organization_id": organization_id,
+        }
 
-        request.state.user_id = user_id
-        request.state.project_id = project_id
-        request.state.workspace_id = workspace_id
-        request.state.organization_id = organization_id
-        request.state.credentials = f"{_SECRET_TOKEN_PREFIX}{secret_token}"
+        await auth_cache.set(auth_cache_key, auth_context)
+
+        await _set_bearer_auth_context(request, auth_context)
 
     except UnauthorizedException as exc:
         raise exc
@@ -368,39 +384,88 @@ async def verify_bearer_token(
         raise UnauthorizedException() from exc
 
 
+async def _set_bearer_auth_context(
+    request: Request,
+    auth_context: dict,
+):
+    secret_token = await sign_secret_token(
+        user_id=auth_context["user_id"],
+        project_id=auth_context["project_id"],
+        workspace_id=auth_context["workspace_id"],
+        organization_id=auth_context["organization_id"],
+    )
+
+    request.state.user_id = auth_context["user_id"]
+    request.state.project_id = auth_context["project_id"]
+    request.state.workspace_id = auth_context["workspace_id"]
+    request.state.organization_id = auth_context["organization_id"]
+    request.state.credentials = f"{_SECRET_TOKEN_PREFIX}{secret_token}"
+
+
 async def verify_apikey_token(
     request: Request,
     apikey_token: str,
 ):
-    api_key_obj = await api_key_service.use_api_key(
-        key=apikey_token,
-    )
-    if not api_key_obj:
+    hashed_apikey_token = api_key_service.hash_api_key(apikey_token)
+
+    if not hashed_apikey_token:
+        raise UnauthorizedException()
+
+    auth_context = await auth_cache.get(hashed_apikey_token)
+
+    if not auth_context:
+        api_key_obj = await api_key_service.is_valid_api_key(
+            key=hashed_apikey_token,
+        )
+        if not api_key_obj:
+            raise UnauthorizedException()
+
+        apikey_project_db = await db_manager.get_project_by_id(
+            project_id=str(api_key_obj.project_id)
+        )
+
+        auth_context = {
+            "api_key_id": str(api_key_obj.id),
+            "rate_limit": api_key_obj.rate_limit,
+            "expiration_date": (
+                api_key_obj.expiration_date.isoformat()
+                if api_key_obj.expiration_date
+                else None
+            ),
+            "user_id": str(api_key_obj.created_by_id),
+            "project_id": str(api_key_obj.project_id),
+            "workspace_id": str(apikey_project_db.workspace_id),
+            "organization_id": str(apikey_project_db.organization_id),
+        }
+
+        await auth_cache.set(hashed_apikey_token, auth_context)
+
+    elif auth_context["expiration_date"] and datetime.fromisoformat(
+        auth_context["expiration_date"]
+    ) < datetime.now(timezone.utc):
+        await auth_cache.invalidate(hashed_apikey_token)
+
         raise UnauthorizedException()
 
     # Check rate limiting
-    cache_key = f"apikey_rate_limit:{apikey_token}"
+    cache_key = f"apikey_rate_limit:{hashed_apikey_token}"
     rate_limit_exceeded = await api_key_service.check_rate_limit(
-        api_key_obj=api_key_obj,
+        rate_limit=auth_context["rate_limit"],
         cache_key=cache_key,
     )
 
     if rate_limit_exceeded:
         raise TooManyRequestsException()
 
-    # Update the last usage timestamp
-    await db_manager.update_api_key_timestamp(
-        api_key_id=str(api_key_obj.id),
-    )
-
-    apikey_project_db = await db_manager.get_project_by_id(
-        project_id=str(api_key_obj.project_id)
+    # Update the last usage timestamp, in batches
+    await last_used_writer.touch(
+        api_key_id=auth_context["api_key_id"],
     )
 
-    request.state.user_id = str(api_key_obj.created_by_id)
-    request.state.project_id = str(api_key_obj.project_id)
-    request.state.workspace_id = str(apikey_project_db.workspace_id)
-    request.state.organization_id = str(apikey_project_db.organization_id)
+    request.state.user_id = auth_context["user_id"]
+    request.state.project_id = auth_context["project_id"]
+    request.state.workspace_id = auth_context["workspace_id"]
+    request.state.organization_id = auth_context["organization_id"]
     request.state.credentials = f"{_APIKEY_TOKEN_PREFIX}{apikey_token}"
 
 
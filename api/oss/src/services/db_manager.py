@@ -7,7 +7,7 @@ from json import dumps
 
 from fastapi import HTTPException
 from sqlalchemy.future import select
-from sqlalchemy import func, or_, asc
+from sqlalchemy import func, or_, asc, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from supertokens_python.types import AccountInfo
 from sqlalchemy.orm import joinedload, load_only
@@ -2970,3 +2970,27 @@ async def update_api_key_timestamp(api_key_id: str) -> None:
 
         await session.commit()
         await session.refresh(api_key)
+
+
+async def update_api_keys_timestamps(
+    api_key_ids: List[str], timestamp: Optional[datetime] = None
+) -> None:
+    """
+    Updates the timestamp of many api keys at once
+
+    Args:
+        api_key_ids (List[str]):    The IDs of the api keys
+        timestamp (datetime):       The last usage timestamp, defaults to now
+    """
+
+    if not api_key_ids:
+        return
+
+    async with engine.session() as session:
+        await session.execute(
+            update(APIKeyDB)
+            .where(
+                APIKeyDB.id.in_([uuid.UUID(api_key_id) for api_key_id in api_key_ids])
+            )
+            .values(updated_at=timestamp or datetime.now(timezone.utc))
+        )
@@ -1,7 +1,12 @@
 import os
+from typing import Optional
+
 import redis
+import redis.asyncio
 from redis.exceptions import ConnectionError
 
+_async_redis_client: Optional[redis.asyncio.Redis] = None
+
 
 def redis_connection() -> redis.Redis:
     """Returns a client object for connecting to a Redis service specified \
@@ -19,3 +24,20 @@ def redis_connection() -> redis.Redis:
     except ConnectionError:
         raise ConnectionError("Could not connect to redis service.")
     return redis_client
+
+
+def async_redis_connection() -> redis.asyncio.Redis:
+    """Returns a shared asyncio client object for connecting to the Redis \
+        service specified by the REDIS_URL environment variable.
+
+    :return: an asyncio Redis client object.
+    """
+
+    global _async_redis_client  # pylint: disable=global-statement
+
+    if _async_redis_client is None:
+        _async_redis_client = redis.asyncio.from_url(
+            url=os.environ.get("REDIS_URL", None)
+        )
+
+    return _async_redis_client
@@ -0,0 +1,97 @@
+"""
+Latency of the 30-day observability dashboard, i.e. ObservabilityDAO.analytics
+over the last 30 days, by day and by hour, for spans and for traces.
+
+Requires a migrated tracing database, e.g.:
+
+    cd api && POSTGRES_URI=postgresql+asyncpg://... \\
+        python -m oss.tests.benchmarks.analytics [--spans 100000] [--rounds 10]
+
+Spans are spread over the window, written to a fresh project id, and deleted
+afterwards.
+"""
+
+from uuid import uuid4
+from statistics import median
+from time import perf_counter
+from argparse import ArgumentParser
+from asyncio import run
+from datetime import datetime, timedelta, timezone
+
+from oss.src.core.shared.dtos import LifecycleDTO
+from oss.src.core.observability.dtos import (
+    AnalyticsDTO,
+    WindowingDTO,
+    GroupingDTO,
+    Focus,
+)
+from oss.src.dbs.postgres.observability.dao import ObservabilityDAO
+from oss.tests.benchmarks.spans import make_span_dtos
+
+_WINDOW = timedelta(days=30)
+
+
+async def main(spans: int, rounds: int) -> None:
+    dao = ObservabilityDAO()
+
+    project_id = uuid4()
+
+    newest = datetime.now(timezone.utc)
+    oldest = newest - _WINDOW
+
+    span_dtos = make_span_dtos(spans)
+
+    # SPREAD THE SPANS EVENLY OVER THE WINDOW
+    step = _WINDOW / spans
+
+    for index, span_dto in enumerate(span_dtos):
+        span_dto.lifecycle = LifecycleDTO(created_at=oldest + step * index)
+
+    await dao.create_many(project_id=project_id, span_dtos=span_dtos)
+
+    try:
+        for focus in (Focus.NODE, Focus.TREE):
+            for window in (1440, 60):
+                analytics_dto = AnalyticsDTO(
+                    grouping=GroupingDTO(focus=focus),
+                    windowing=WindowingDTO(
+                        oldest=oldest,
+                        newest=newest,
+                        window=window,
+                    ),
+                )
+
+                timings = []
+
+                for _ in range(rounds):
+                    start = perf_counter()
+
+                    await dao.analytics(
+                        project_id=project_id,
+                        analytics_dto=analytics_dto,
+                    )
+
+                    timings.append(perf_counter() - start)
+
+                print(
+                    f"{focus.value:>4} by {window:>4} minutes: "
+                    f"p50 {median(timings) * 1000:8.1f}ms, "
+                    f"max {max(timings) * 1000:8.1f}ms",
+                    flush=True,
+                )
+
+    finally:
+        await dao.delete_many(
+            project_id=project_id,
+            node_ids=[span_dto.node.id for span_dto in span_dtos],
+        )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--spans", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=10)
+
+    args = parser.parse_args()
+
+    run(main(args.spans, args.rounds))
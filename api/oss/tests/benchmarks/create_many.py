@@ -0,0 +1,49 @@
+"""
+Spans per second of ObservabilityDAO.create_many, for 1k, 10k and 100k spans.
+
+Requires a migrated tracing database, e.g.:
+
+    cd api && POSTGRES_URI=postgresql+asyncpg://... \\
+        python -m oss.tests.benchmarks.create_many [--sizes 1000 10000 100000]
+
+Spans are written to a fresh project id, which is deleted afterwards.
+"""
+
+from uuid import uuid4
+from time import perf_counter
+from argparse import ArgumentParser
+from asyncio import run
+
+from oss.src.dbs.postgres.observability.dao import ObservabilityDAO
+from oss.tests.benchmarks.spans import make_span_dtos
+
+
+async def main(sizes) -> None:
+    dao = ObservabilityDAO()
+
+    for size in sizes:
+        project_id = uuid4()
+        span_dtos = make_span_dtos(size, seed=size)
+
+        start = perf_counter()
+
+        await dao.create_many(project_id=project_id, span_dtos=span_dtos)
+
+        elapsed = perf_counter() - start
+
+        print(
+            f"{size:>7} spans: {elapsed:8.3f}s, {size / elapsed:10.0f} spans/s",
+            flush=True,
+        )
+
+        await dao.delete_many(
+            project_id=project_id,
+            node_ids=[span_dto.node.id for span_dto in span_dtos],
+        )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+
+    run(main(parser.parse_args().sizes))
@@ -0,0 +1,46 @@
+"""
+Throughput of parse_otlp_stream on a synthetic OTLP payload of ~10 MB.
+
+    cd api && python -m oss.tests.benchmarks.parse_otlp [--megabytes 10] [--rounds 5]
+"""
+
+from time import perf_counter
+from argparse import ArgumentParser
+
+from oss.src.apis.fastapi.observability.opentelemetry.otlp import parse_otlp_stream
+from oss.tests.benchmarks.spans import make_otlp_payload
+
+
+def main(megabytes: float, rounds: int) -> None:
+    probe = make_otlp_payload(100)
+    count = int(megabytes * 1024 * 1024 / (len(probe) / 100))
+
+    otlp_stream = make_otlp_payload(count)
+
+    print(f"payload: {len(otlp_stream) / 1024 / 1024:.1f} MB, {count} spans")
+
+    timings = []
+
+    for _ in range(rounds):
+        start = perf_counter()
+
+        parse_otlp_stream(otlp_stream)
+
+        timings.append(perf_counter() - start)
+
+    best = min(timings)
+
+    print(
+        f"best of {rounds}: {best:.3f}s, {count / best:.0f} spans/s, "
+        f"{len(otlp_stream) / 1024 / 1024 / best:.1f} MB/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--megabytes", type=float, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+
+    args = parser.parse_args()
+
+    main(args.megabytes, args.rounds)
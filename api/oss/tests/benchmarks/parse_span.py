@@ -0,0 +1,49 @@
+"""
+Per-span latency of parse_from_otel_span_dto, for spans with few and with
+hundreds of flattened ag.data.* attributes.
+
+    cd api && python -m oss.tests.benchmarks.parse_span [--messages 4 150] [--spans 1000]
+"""
+
+from time import perf_counter
+from argparse import ArgumentParser
+
+from oss.src.apis.fastapi.observability.utils import parse_from_otel_span_dto
+from oss.tests.benchmarks.spans import make_otel_span_dtos
+
+
+def main(messages_list, spans: int, rounds: int) -> None:
+    for messages in messages_list:
+        otel_span_dtos = make_otel_span_dtos(spans, messages=messages)
+
+        keys = len(otel_span_dtos[0].attributes)
+
+        timings = []
+
+        for _ in range(rounds):
+            # PARSING CONSUMES THE ATTRIBUTES OF THE SPANS
+            copies = [
+                otel_span_dto.model_copy(deep=True) for otel_span_dto in otel_span_dtos
+            ]
+
+            start = perf_counter()
+
+            for otel_span_dto in copies:
+                parse_from_otel_span_dto(otel_span_dto)
+
+            timings.append(perf_counter() - start)
+
+        best = min(timings) / spans
+
+        print(f"{keys:>5} attributes: {best * 1_000_000:8.1f}us per span", flush=True)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--messages", type=int, nargs="+", default=[4, 150])
+    parser.add_argument("--spans", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+
+    args = parser.parse_args()
+
+    main(args.messages, args.spans, args.rounds)
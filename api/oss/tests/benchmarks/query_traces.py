@@ -0,0 +1,87 @@
+"""
+Response time of GET /traces for a page of 5k nodes, by focus, i.e. the
+assembly and serialization of the response, with the database stubbed out.
+
+    cd api && python -m oss.tests.benchmarks.query_traces [--nodes 5000] [--rounds 5]
+"""
+
+from uuid import UUID
+from time import perf_counter
+from argparse import ArgumentParser
+from asyncio import run
+
+from fastapi import FastAPI, Request
+from httpx import AsyncClient, ASGITransport
+
+from oss.src.core.observability.service import ObservabilityService
+from oss.src.apis.fastapi.observability.router import ObservabilityRouter
+from oss.tests.benchmarks.spans import make_span_dtos
+
+
+class StubObservabilityDAO:
+    def __init__(self, span_dtos):
+        self.span_dtos = span_dtos
+        self.page = None
+
+    def prepare(self):
+        # THE SERVICE CONNECTS CHILDREN IN PLACE, SO EACH PAGE IS A FRESH COPY
+        self.page = [span_dto.model_copy(deep=True) for span_dto in self.span_dtos]
+
+    async def query(self, *, project_id, query_dto):
+        return self.page, len(self.page), None
+
+
+def make_app(dao: StubObservabilityDAO) -> FastAPI:
+    router = ObservabilityRouter(ObservabilityService(observability_dao=dao))
+
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def authenticate(request: Request, call_next):
+        request.state.project_id = str(UUID(int=0))
+        return await call_next(request)
+
+    app.include_router(router.router, prefix="/observability/v1")
+
+    return app
+
+
+async def main(nodes: int, tree_size: int, rounds: int) -> None:
+    dao = StubObservabilityDAO(make_span_dtos(nodes, tree_size=tree_size))
+    app = make_app(dao)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        for focus in ("node", "tree", "root"):
+            timings = []
+
+            for _ in range(rounds):
+                dao.prepare()
+
+                start = perf_counter()
+
+                response = await client.get(
+                    "/observability/v1/traces", params={"focus": focus}
+                )
+
+                timings.append(perf_counter() - start)
+
+                response.raise_for_status()
+
+            print(
+                f"focus={focus:<4}: {min(timings):6.3f}s best of {rounds}, "
+                f"{len(response.content) / 1024 / 1024:5.1f} MB",
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=5000)
+    parser.add_argument("--tree-size", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+
+    args = parser.parse_args()
+
+    run(main(args.nodes, args.tree_size, args.rounds))
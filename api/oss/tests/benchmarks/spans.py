@@ -0,0 +1,141 @@
+"""
+Synthetic traces for the observability benchmarks.
+
+Spans are built as OTLP payloads, like the SDK exports them, then parsed with
+the ingestion path of the tree being benchmarked, so that the same script can
+be run against an older checkout for a baseline.
+"""
+
+from os import urandom
+from random import Random
+from typing import Any, List, Optional
+from datetime import datetime, timedelta, timezone
+
+import oss.src.apis.fastapi.observability.opentelemetry.traces_proto as Trace_Proto
+from oss.src.apis.fastapi.observability.opentelemetry.otlp import parse_otlp_stream
+from oss.src.apis.fastapi.observability.utils import parse_from_otel_span_dto
+from oss.src.core.observability.dtos import OTelSpanDTO, SpanDTO
+
+
+def _set_value(
+    any_value: Any,
+    value: Any,
+) -> None:
+    if isinstance(value, bool):
+        any_value.bool_value = value
+    elif isinstance(value, int):
+        any_value.int_value = value
+    elif isinstance(value, float):
+        any_value.double_value = value
+    elif isinstance(value, list):
+        for item in value:
+            _set_value(any_value.array_value.values.add(), item)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            attribute = any_value.kvlist_value.values.add()
+            attribute.key = key
+            _set_value(attribute.value, item)
+    else:
+        any_value.string_value = str(value)
+
+
+def _attributes(
+    random: Random,
+    index: int,
+    is_root: bool,
+    messages: int,
+) -> dict:
+    attributes = {
+        "ag.type.node": "workflow" if is_root else "chat",
+        "ag.meta.system": "openai",
+        "ag.meta.request.model": "gpt-4o-mini",
+        "ag.meta.request.temperature": 0.7,
+        "ag.meta.tags": ["benchmark", f"span-{index % 8}"],
+        "ag.metrics.unit.costs.total": round(random.random() / 100, 6),
+        "ag.metrics.unit.tokens.prompt": random.randint(10, 500),
+        "ag.metrics.unit.tokens.completion": random.randint(10, 500),
+        "ag.metrics.unit.tokens.total": random.randint(20, 1000),
+        "ag.refs.application.id": "0190e436-818a-7c97-83b4-d7af4bd23e99",
+        "ag.refs.variant.slug": "default",
+        "ag.data.outputs.completion.0.role": "assistant",
+        "ag.data.outputs.completion.0.content": "lorem ipsum " * 20,
+        "ag.data.internals.retries": 0,
+        "ag.data.internals.options": {"stream": False, "n": 1},
+    }
+
+    if is_root:
+        attributes["ag.type.tree"] = "invocation"
+
+    for i in range(messages):
+        role = "user" if i % 2 else "system"
+        attributes[f"ag.data.inputs.messages.{i}.role"] = role
+        attributes[f"ag.data.inputs.messages.{i}.content"] = f"message {i} " * 16
+
+    return attributes
+
+
+def make_otlp_payload(
+    count: int,
+    *,
+    tree_size: int = 10,
+    messages: int = 4,
+    start: Optional[datetime] = None,
+    seed: int = 42,
+) -> bytes:
+    """Serializes `count` spans, in traces of `tree_size` spans, as OTLP protobuf."""
+
+    random = Random(seed)
+    start = start or datetime.now(timezone.utc) - timedelta(hours=1)
+
+    proto = Trace_Proto.TracesData()
+    scope_spans = proto.resource_spans.add().scope_spans.add()
+
+    trace_id, root_id = None, None
+
+    for index in range(count):
+        is_root = index % tree_size == 0
+
+        if is_root:
+            trace_id, root_id = urandom(16), None
+
+        span = scope_spans.spans.add()
+        span.trace_id = trace_id
+        span.span_id = urandom(8)
+        span.name = "workflow" if is_root else f"chat-{index % tree_size}"
+        span.kind = 2 if is_root else 3  # SERVER, CLIENT
+
+        if root_id:
+            span.parent_span_id = root_id
+        else:
+            root_id = span.span_id
+
+        time_start = start + timedelta(milliseconds=index)
+        time_end = time_start + timedelta(milliseconds=random.randint(5, 5000))
+
+        span.start_time_unix_nano = int(time_start.timestamp() * 1_000_000_000)
+        span.end_time_unix_nano = int(time_end.timestamp() * 1_000_000_000)
+        span.status.code = 2 if random.random() < 0.05 else 1  # ERROR, OK
+
+        for key, value in _attributes(random, index, is_root, messages).items():
+            attribute = span.attributes.add()
+            attribute.key = key
+            _set_value(attribute.value, value)
+
+    return proto.SerializeToString()
+
+
+def make_otel_span_dtos(
+    count: int,
+    **kwargs: Any,
+) -> List[OTelSpanDTO]:
+    return parse_otlp_stream(make_otlp_payload(count, **kwargs))
+
+
+def make_span_dtos(
+    count: int,
+    **kwargs: Any,
+) -> List[SpanDTO]:
+    return [
+        parse_from_otel_span_dto(otel_span_dto)
+        for otel_span_dto in make_otel_span_dtos(count, **kwargs)
+    ]
@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+
+from oss.src.dbs.postgres.shared.engine import engine
+from oss.src.dbs.postgres.observability.dbes import NodesDBE, NodesRollupsDBE
+
+
+async def _create_tracing_tables(connection) -> None:
+    if await connection.run_sync(lambda c: inspect(c).has_table("nodes")):
+        return
+
+    await connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+    await connection.run_sync(
+        NodesDBE.metadata.create_all,
+        tables=[NodesDBE.__table__, NodesRollupsDBE.__table__],
+    )
+
+    await connection.execute(
+        text("CREATE TABLE IF NOT EXISTS nodes_default PARTITION OF nodes DEFAULT")
+    )
+
+
+@pytest.fixture
+async def database():
+    """
+    The tracing tables of the database at POSTGRES_URI, created if missing.
+
+    Tests using it are skipped without a reachable database. They write to
+    fresh project ids, and do not clean up the tables.
+    """
+
+    try:
+        async with engine.async_engine.begin() as connection:
+            await _create_tracing_tables(connection)
+
+    except (OSError, DBAPIError) as e:
+        await engine.async_engine.dispose()
+
+        pytest.skip(f"requires a database at POSTGRES_URI: {e}")
+
+    yield engine
+
+    # CONNECTIONS ARE BOUND TO THE EVENT LOOP OF THE TEST
+    await engine.async_engine.dispose()
@@ -0,0 +1,199 @@
+from types import SimpleNamespace
+from contextlib import asynccontextmanager
+
+import pytest
+
+import oss.src.services.auth_cache as auth_cache_module
+import oss.src.services.api_key_service as api_key_service
+from oss.src.services.auth_cache import AuthCache, hash_credentials
+
+_CONTEXT = {"user_id": "user", "project_id": "project"}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+
+    monkeypatch.setattr(auth_cache_module, "monotonic", lambda: clock.now)
+
+    return clock
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+
+    client = fakeredis.FakeAsyncRedis()
+
+    monkeypatch.setattr(auth_cache_module, "async_redis_connection", lambda: client)
+
+    return client
+
+
+def test_credentials_are_hashed_by_part():
+    assert hash_credentials("a", "b") == hash_credentials("a", "b")
+    assert hash_credentials("a", "b") != hash_credentials("ab", None)
+
+
+async def test_hit_after_set():
+    cache = AuthCache(redis=False)
+
+    assert await cache.get("key") is None
+
+    await cache.set("key", _CONTEXT)
+
+    assert await cache.get("key") == _CONTEXT
+
+
+async def test_disabled_cache_is_always_missed():
+    cache = AuthCache(enabled=False, redis=False)
+
+    await cache.set("key", _CONTEXT)
+
+    assert await cache.get("key") is None
+
+
+async def test_entries_expire(clock):
+    cache = AuthCache(ttl=60, redis=False)
+
+    await cache.set("key", _CONTEXT)
+
+    clock.now += 60
+
+    assert await cache.get("key") == _CONTEXT
+
+    clock.now += 1
+
+    assert await cache.get("key") is None
+    assert "key" not in cache._entries
+
+
+async def test_least_recently_used_entries_are_evicted():
+    cache = AuthCache(max_entries=2, redis=False)
+
+    await cache.set("a", _CONTEXT)
+    await cache.set("b", _CONTEXT)
+    await cache.get("a")
+    await cache.set("c", _CONTEXT)
+
+    assert list(cache._entries) == ["a", "c"]
+
+
+async def test_invalidate():
+    cache = AuthCache(redis=False)
+
+    await cache.set("key", _CONTEXT)
+    await cache.invalidate("key")
+
+    assert await cache.get("key") is None
+
+
+async def test_redis_entries_are_shared_across_workers(redis, clock):
+    worker_a = AuthCache(ttl=60, redis=True, local_ttl=1)
+    worker_b = AuthCache(ttl=60, redis=True, local_ttl=1)
+
+    await worker_a.set("key", _CONTEXT)
+
+    assert await worker_b.get("key") == _CONTEXT
+    assert 0 < await redis.ttl("agenta:auth:key") <= 60
+
+
+async def test_redis_revocations_reach_other_workers_within_local_ttl(redis, clock):
+    worker_a = AuthCache(ttl=60, redis=True, local_ttl=1)
+    worker_b = AuthCache(ttl=60, redis=True, local_ttl=1)
+
+    await worker_a.set("key", _CONTEXT)
+    await worker_b.get("key")
+
+    await worker_a.invalidate("key")
+
+    assert await worker_a.get("key") is None
+
+    clock.now += 2
+
+    assert await worker_b.get("key") is None
+
+
+async def test_invalidate_user():
+    cache = AuthCache(redis=False)
+
+    await cache.set("a", _CONTEXT)
+    await cache.set("b", {**_CONTEXT, "project_id": "other"})
+    await cache.set("c", {**_CONTEXT, "user_id": "other"})
+
+    await cache.invalidate_user("user")
+
+    assert list(cache._entries) == ["c"]
+
+
+async def test_redis_user_revocations_reach_other_workers_within_local_ttl(
+    redis, clock
+):
+    worker_a = AuthCache(ttl=60, redis=True, local_ttl=1)
+    worker_b = AuthCache(ttl=60, redis=True, local_ttl=1)
+
+    await worker_a.set("a", _CONTEXT)
+    await worker_b.set("b", {**_CONTEXT, "project_id": "other"})
+    await worker_b.set("c", {**_CONTEXT, "user_id": "other"})
+
+    await worker_a.invalidate_user("user")
+
+    assert await worker_a.get("b") is None
+
+    clock.now += 2
+
+    assert await worker_b.get("a") is None
+    assert await worker_b.get("b") is None
+    assert await worker_b.get("c") is not None
+    assert not await redis.exists("agenta:auth:user:user")
+
+
+async def test_redis_errors_are_misses(monkeypatch):
+    def fail():
+        raise ConnectionError()
+
+    monkeypatch.setattr(auth_cache_module, "async_redis_connection", fail)
+
+    cache = AuthCache(redis=True)
+
+    await cache.set("key", _CONTEXT)
+    cache._entries.clear()
+
+    assert await cache.get("key") is None
+
+
+async def test_deleted_api_keys_are_revoked(monkeypatch):
+    cache = AuthCache(redis=False)
+
+    monkeypatch.setattr(api_key_service, "auth_cache", cache)
+
+    api_key = SimpleNamespace(hashed_key="hashed")
+
+    class FakeSession:
+        async def execute(self, statement):
+            return SimpleNamespace(
+                scalars=lambda: SimpleNamespace(first=lambda: api_key)
+            )
+
+        async def delete(self, instance):
+            pass
+
+        async def commit(self):
+            pass
+
+    @asynccontextmanager
+    async def session():
+        yield FakeSession()
+
+    monkeypatch.setattr(api_key_service.engine, "session", session)
+
+    await cache.set("hashed", _CONTEXT)
+    await cache.set("other", _CONTEXT)
+
+    await api_key_service.delete_api_key(
+        user_id="0190e436-818a-7c97-83b4-d7af4bd23e99",
+        key_prefix="prefix",
+    )
+
+    assert await cache.get("hashed") is None
+    assert await cache.get("other") == _CONTEXT
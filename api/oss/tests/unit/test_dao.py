@@ -0,0 +1,221 @@
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from oss.src.core.observability.dtos import (
+    SpanDTO,
+    RootDTO,
+    TreeDTO,
+    NodeDTO,
+    ParentDTO,
+    TimeDTO,
+    StatusDTO,
+    StatusCode,
+    Focus,
+)
+from oss.src.core.observability.service import ObservabilityService
+from oss.src.dbs.postgres.observability.dao import ObservabilityDAO
+from oss.src.dbs.postgres.observability.dbes import NodesDBE, NodesRollupsDBE
+
+_NOW = datetime.now(timezone.utc).replace(tzinfo=None)  # TIMESTAMP columns
+
+
+def _span(
+    tree_id: UUID,
+    node_id: Optional[UUID] = None,
+    parent_id: Optional[UUID] = None,
+    cost: float = 0.0,
+) -> SpanDTO:
+    return SpanDTO(
+        root=RootDTO(id=tree_id),
+        tree=TreeDTO(id=tree_id),
+        node=NodeDTO(id=node_id or uuid4(), name="span"),
+        parent=ParentDTO(id=parent_id) if parent_id else None,
+        time=TimeDTO(start=_NOW, end=_NOW + timedelta(seconds=1)),
+        status=StatusDTO(code=StatusCode.OK),
+        metrics={"unit.costs.total": cost, "acc.costs.total": cost},
+    )
+
+
+async def _nodes(engine, project_id: UUID) -> Dict[UUID, NodesDBE]:
+    async with engine.session() as session:
+        query = select(NodesDBE).filter_by(project_id=project_id)
+
+        return {
+            span_dbe.node_id: span_dbe
+            for span_dbe in (await session.execute(query)).scalars().all()
+        }
+
+
+async def _count(engine, project_id: UUID) -> int:
+    async with engine.session() as session:
+        query = select(func.count()).filter(NodesDBE.project_id == project_id)
+
+        return await session.scalar(query)
+
+
+async def _create(project_id: UUID, span_dtos: List[SpanDTO]) -> None:
+    # THE DAO MUST NOT DEPEND ON THE DTOS SURVIVING A CALL UNCHANGED
+    await ObservabilityDAO().create_many(
+        project_id=project_id,
+        span_dtos=[span_dto.model_copy(deep=True) for span_dto in span_dtos],
+    )
+
+
+# CREATE
+
+
+async def test_create_many_ignores_a_batch_already_stored(database):
+    project_id, tree_id = uuid4(), uuid4()
+
+    root = _span(tree_id, cost=1.0)
+    batch = [root, _span(tree_id, parent_id=root.node.id, cost=2.0)]
+
+    await _create(project_id, batch)
+
+    # e.g. AN EXPORTER RETRYING A BATCH THAT WAS STORED, BUT NOT ACKNOWLEDGED
+    await _create(project_id, batch)
+
+    assert await _count(database, project_id) == 2
+
+
+async def _ingest(project_id: UUID, span_dtos: List[SpanDTO]) -> None:
+    await ObservabilityService(ObservabilityDAO()).ingest(
+        project_id=project_id,
+        span_dtos=[span_dto.model_copy(deep=True) for span_dto in span_dtos],
+    )
+
+
+async def _costs(engine, project_id: UUID) -> Dict[UUID, float]:
+    return {
+        node_id: span_dbe.acc_costs_total
+        for node_id, span_dbe in (await _nodes(engine, project_id)).items()
+    }
+
+
+# CUMULATE
+
+
+async def test_children_after_their_parent_are_cumulated(database):
+    project_id, tree_id = uuid4(), uuid4()
+
+    root = _span(tree_id, cost=1.0)
+    child = _span(tree_id, parent_id=root.node.id, cost=2.0)
+
+    await _ingest(project_id, [root])
+    await _ingest(project_id, [child])
+
+    nodes = await _nodes(database, project_id)
+
+    assert nodes[root.node.id].acc_costs_total == 3.0
+    assert nodes[root.node.id].metrics["acc.costs.total"] == 3.0
+    assert nodes[child.node.id].acc_costs_total == 2.0
+
+
+async def test_duplicate_children_are_cumulated_once(database):
+    project_id, tree_id = uuid4(), uuid4()
+
+    root = _span(tree_id, cost=1.0)
+    child = _span(tree_id, parent_id=root.node.id, cost=2.0)
+
+    await _ingest(project_id, [root])
+    await _ingest(project_id, [child])
+
+    # e.g. AN EXPORTER RETRYING THE BATCH OF THE CHILD
+    await _ingest(project_id, [child])
+
+    assert await _costs(database, project_id) == {
+        root.node.id: 3.0,
+        child.node.id: 2.0,
+    }
+
+    # THE TREE ROLLUPS FOLLOW THE CUMULATED METRICS OF THE ROOT
+    async with database.session() as session:
+        query = select(NodesRollupsDBE).filter_by(
+            project_id=project_id,
+            focus=Focus.TREE,
+        )
+
+        rollups = (await session.execute(query)).scalars().all()
+
+    assert {(rollup.count, rollup.cost) for rollup in rollups} == {(1, 3.0)}
+
+
+async def test_grandchildren_after_both_are_cumulated_to_every_ancestor(database):
+    project_id, tree_id = uuid4(), uuid4()
+
+    root = _span(tree_id, cost=1.0)
+    child = _span(tree_id, parent_id=root.node.id, cost=2.0)
+    grandchild = _span(tree_id, parent_id=child.node.id, cost=4.0)
+
+    await _ingest(project_id, [root])
+    await _ingest(project_id, [child])
+    await _ingest(project_id, [grandchild])
+
+    assert await _costs(database, project_id) == {
+        root.node.id: 7.0,
+        child.node.id: 6.0,
+        grandchild.node.id: 4.0,
+    }
+
+
+async def test_children_before_their_parent_are_cumulated(database):
+    project_id, tree_id = uuid4(), uuid4()
+
+    root = _span(tree_id, cost=1.0)
+    child = _span(tree_id, parent_id=root.node.id, cost=2.0)
+
+    await _ingest(project_id, [child])
+    await _ingest(project_id, [root])
+
+    assert await _costs(database, project_id) == {
+        root.node.id: 3.0,
+        child.node.id: 2.0,
+    }
+
+
+# DELETE
+
+
+async def test_delete_many_removes_exactly_the_subtree(database):
+    project_id, tree_a, tree_b = uuid4(), uuid4(), uuid4()
+
+    root = _span(tree_a)
+    mid = _span(tree_a, parent_id=root.node.id)
+    leaf = _span(tree_a, parent_id=mid.node.id)
+    sibling = _span(tree_a, parent_id=root.node.id)
+    other_root = _span(tree_b)
+    other_child = _span(tree_b, parent_id=other_root.node.id)
+
+    await _create(project_id, [root, mid, leaf, sibling, other_root, other_child])
+
+    tree_ids = await ObservabilityDAO().delete_many(
+        project_id=project_id,
+        node_ids=[mid.node.id],
+    )
+
+    assert tree_ids == [tree_a]
+    assert set(await _nodes(database, project_id)) == {
+        root.node.id,
+        sibling.node.id,
+        other_root.node.id,
+        other_child.node.id,
+    }
+
+
+async def test_delete_many_of_missing_nodes_affects_no_tree(database):
+    project_id, tree_id = uuid4(), uuid4()
+
+    await _create(project_id, [_span(tree_id)])
+
+    assert (
+        await ObservabilityDAO().delete_many(
+            project_id=project_id,
+            node_ids=[uuid4()],
+        )
+        == []
+    )
+    assert await _count(database, project_id) == 1
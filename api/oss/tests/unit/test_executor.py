@@ -0,0 +1,70 @@
+from asyncio import create_task, sleep
+
+from oss.src.apis.fastapi.observability.executor import (
+    OTLPExecutor,
+    parse_otlp_payload,
+)
+from oss.tests.benchmarks.spans import make_otlp_payload
+
+
+async def test_pool_and_inline_parsing_agree():
+    otlp_stream = make_otlp_payload(50, tree_size=5)
+
+    executor = OTLPExecutor(workers=1, threshold=1024)
+
+    await executor.start()
+
+    try:
+        assert executor.offloads(otlp_stream)
+        assert not executor.offloads(b"\x00" * 1023)
+
+        pooled = await executor.parse(otlp_stream)
+
+    finally:
+        await executor.stop()
+
+    inline = parse_otlp_payload(otlp_stream)
+
+    assert len(pooled) == len(inline) == 50
+    assert [span_dto.model_dump() for span_dto in pooled] == [
+        span_dto.model_dump() for span_dto in inline
+    ]
+
+
+async def test_parses_inline_when_stopped():
+    otlp_stream = make_otlp_payload(5)
+
+    executor = OTLPExecutor(workers=1, threshold=0)
+
+    assert not executor.offloads(otlp_stream)
+    assert len(await executor.parse(otlp_stream)) == 5
+
+
+async def test_stop_does_not_block_the_event_loop():
+    executor = OTLPExecutor(workers=1, threshold=0)
+
+    await executor.start()
+
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+
+        while True:
+            ticks += 1
+
+            await sleep(0)
+
+    ticker = create_task(tick())
+
+    await sleep(0)
+
+    ticks = 0
+
+    await executor.stop()
+
+    ticker.cancel()
+
+    # THE LOOP KEPT RUNNING WHILE THE WORKER PROCESS WAS SHUT DOWN
+    assert ticks > 1
+    assert not executor.running
@@ -0,0 +1,146 @@
+from json import loads
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Optional
+
+import pyarrow
+import pyarrow.ipc
+
+from oss.src.core.shared.dtos import LifecycleDTO
+from oss.src.core.observability.dtos import (
+    SpanDTO,
+    RootDTO,
+    TreeDTO,
+    NodeDTO,
+    ParentDTO,
+    TimeDTO,
+    StatusDTO,
+    StatusCode,
+)
+from oss.src.apis.fastapi.observability.export import (
+    EXPORT_BATCH_SIZE,
+    export_ndjson,
+    export_arrow,
+)
+
+_NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _span(
+    tree_id: UUID,
+    parent_id: Optional[UUID] = None,
+    lifecycle: bool = True,
+) -> SpanDTO:
+    return SpanDTO(
+        lifecycle=LifecycleDTO(created_at=_NOW) if lifecycle else None,
+        root=RootDTO(id=tree_id),
+        tree=TreeDTO(id=tree_id),
+        node=NodeDTO(id=uuid4(), name="span"),
+        parent=ParentDTO(id=parent_id) if parent_id else None,
+        time=TimeDTO(start=_NOW, end=_NOW + timedelta(seconds=1)),
+        status=StatusDTO(code=StatusCode.OK),
+        metrics={"acc.costs.total": 1.0},
+    )
+
+
+async def _stream(span_dtos: List[SpanDTO]) -> AsyncIterator[SpanDTO]:
+    for span_dto in span_dtos:
+        yield span_dto.model_copy(deep=True)
+
+
+async def _collect(chunks: AsyncIterator[bytes]) -> List[bytes]:
+    return [chunk async for chunk in chunks]
+
+
+# NDJSON
+
+
+async def test_ndjson_is_one_line_per_span():
+    tree_id = uuid4()
+
+    root = _span(tree_id, lifecycle=False)
+    child = _span(tree_id, parent_id=root.node.id)
+
+    chunks = await _collect(export_ndjson(_stream([root, child])))
+
+    assert len(chunks) == 2
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+
+    lines = [loads(chunk) for chunk in b"".join(chunks).splitlines()]
+
+    assert [line["node"]["id"] for line in lines] == [
+        str(root.node.id),
+        str(child.node.id),
+    ]
+
+    # NONE IS LEFT OUT, AND ATTRIBUTES ARE UNMARSHALLED
+    assert "parent" not in lines[0] and "lifecycle" not in lines[0]
+    assert lines[1]["parent"] == {"id": str(root.node.id)}
+    assert lines[1]["metrics"] == {"acc": {"costs": {"total": 1.0}}}
+
+
+# ARROW
+
+
+def _read(chunks: List[bytes]) -> List[pyarrow.RecordBatch]:
+    return list(pyarrow.ipc.open_stream(b"".join(chunks)))
+
+
+async def test_arrow_is_one_record_batch_per_batch_of_spans():
+    tree_id = uuid4()
+
+    span_dtos = [_span(tree_id) for _ in range(EXPORT_BATCH_SIZE + 1)]
+
+    chunks = await _collect(export_arrow(_stream(span_dtos)))
+
+    # A FULL BATCH IS YIELDED AS SOON AS IT IS WRITTEN
+    assert len(chunks) == 2
+
+    batches = _read(chunks)
+
+    assert [batch.num_rows for batch in batches] == [EXPORT_BATCH_SIZE, 1]
+
+    node_ids = [
+        node_id for batch in batches for node_id in batch.column("node_id").to_pylist()
+    ]
+
+    assert node_ids == [str(span_dto.node.id) for span_dto in span_dtos]
+
+
+async def test_arrow_exactly_one_batch_of_spans():
+    span_dtos = [_span(uuid4()) for _ in range(EXPORT_BATCH_SIZE)]
+
+    batches = _read(await _collect(export_arrow(_stream(span_dtos))))
+
+    assert [batch.num_rows for batch in batches] == [EXPORT_BATCH_SIZE]
+
+
+async def test_arrow_rows():
+    tree_id = uuid4()
+
+    root = _span(tree_id, lifecycle=False)
+    child = _span(tree_id, parent_id=root.node.id)
+
+    (batch,) = _read(await _collect(export_arrow(_stream([root, child]))))
+
+    rows = batch.to_pylist()
+
+    assert rows[0]["parent_id"] is None
+    assert rows[0]["created_at"] is None
+    assert rows[0]["exception"] is None
+
+    assert rows[1]["parent_id"] == str(root.node.id)
+    assert rows[1]["created_at"] == _NOW
+    assert rows[1]["tree_id"] == str(tree_id)
+    assert rows[1]["time_end"] == _NOW + timedelta(seconds=1)
+    assert rows[1]["status_code"] == "OK"
+    assert loads(rows[1]["metrics"]) == {"acc": {"costs": {"total": 1.0}}}
+
+
+async def test_arrow_without_spans_is_an_empty_stream():
+    chunks = await _collect(export_arrow(_stream([])))
+
+    reader = pyarrow.ipc.open_stream(b"".join(chunks))
+
+    assert "node_id" in reader.schema.names
+    assert list(reader) == []
@@ -0,0 +1,67 @@
+import oss.src.apis.fastapi.observability.opentelemetry.traces_proto as Trace_Proto
+from oss.src.apis.fastapi.observability.opentelemetry.otlp import (
+    _parse_value,
+    parse_otlp_stream,
+)
+from oss.tests.benchmarks.spans import _set_value, make_otlp_payload
+
+
+def _any_value(value):
+    any_value = Trace_Proto.AnyValue()
+    _set_value(any_value, value)
+
+    return any_value
+
+
+def test_parse_value_scalars():
+    assert _parse_value(_any_value("text")) == "text"
+    assert _parse_value(_any_value(True)) is True
+    assert _parse_value(_any_value(False)) is False
+    assert _parse_value(_any_value(42)) == 42
+    assert _parse_value(_any_value(0.5)) == 0.5
+
+    any_value = Trace_Proto.AnyValue()
+    any_value.bytes_value = b"\x00\x01"
+
+    assert _parse_value(any_value) == b"\x00\x01"
+
+
+def test_parse_value_unset():
+    assert _parse_value(Trace_Proto.AnyValue()) is None
+
+
+def test_parse_value_containers():
+    value = {
+        "tags": ["a", 1, True],
+        "options": {"stream": False, "n": 1, "stop": ["\n"]},
+        "nested": [{"role": "user"}, [1, 2]],
+    }
+
+    parsed = _parse_value(_any_value(value))
+
+    assert parsed == value
+    assert isinstance(parsed["tags"], list)
+    assert isinstance(parsed["options"], dict)
+
+
+def test_parse_value_empty_containers():
+    any_value = Trace_Proto.AnyValue()
+    any_value.array_value.SetInParent()
+
+    assert _parse_value(any_value) == []
+
+    any_value = Trace_Proto.AnyValue()
+    any_value.kvlist_value.SetInParent()
+
+    assert _parse_value(any_value) == {}
+
+
+def test_parse_otlp_stream_attributes():
+    (otel_span_dto,) = parse_otlp_stream(make_otlp_payload(1))
+
+    attributes = otel_span_dto.attributes
+
+    assert attributes["ag.type.node"] == "workflow"
+    assert attributes["ag.meta.request.temperature"] == 0.7
+    assert attributes["ag.meta.tags"] == ["benchmark", "span-0"]
+    assert attributes["ag.data.internals.options"] == {"stream": False, "n": 1}
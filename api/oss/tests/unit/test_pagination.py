@@ -0,0 +1,88 @@
+from uuid import uuid4
+from base64 import urlsafe_b64encode
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.future import select
+
+from oss.src.core.observability.dtos import PaginationDTO
+from oss.src.core.observability.utils import (
+    PaginationException,
+    encode_cursor,
+    decode_cursor,
+)
+from oss.src.dbs.postgres.observability.dbes import NodesDBE
+from oss.src.dbs.postgres.observability.dao import _chunk, _next_cursor
+
+
+def _compile(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 1, 31, 23, 59, 59, 123456, tzinfo=timezone.utc)
+    key = uuid4()
+
+    cursor = encode_cursor(created_at, key)
+
+    assert decode_cursor(cursor) == (created_at, key)
+    # SAFE IN QUERY STRINGS
+    assert set(cursor) <= set(
+        "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_="
+    )
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "not a cursor",
+        urlsafe_b64encode(b"2025-01-31T00:00:00+00:00").decode(),
+        urlsafe_b64encode(b"yesterday|" + str(uuid4()).encode()).decode(),
+        urlsafe_b64encode(b"2025-01-31T00:00:00+00:00|not-a-uuid").decode(),
+        urlsafe_b64encode(b"\xff\xfe|\xfd").decode(),
+    ],
+)
+def test_decode_cursor_rejects_invalid_cursors(cursor):
+    with pytest.raises(PaginationException):
+        decode_cursor(cursor)
+
+
+def test_next_cursor_only_for_full_keyset_pages():
+    created_at, key = datetime.now(timezone.utc), uuid4()
+
+    assert _next_cursor(None, 10, created_at, key) is None
+    assert _next_cursor(PaginationDTO(page=1, size=10), 10, created_at, key) is None
+    assert _next_cursor(PaginationDTO(size=10), 9, created_at, key) is None
+
+    cursor = _next_cursor(PaginationDTO(size=10), 10, created_at, key)
+
+    assert decode_cursor(cursor) == (created_at, key)
+
+
+def test_chunk_with_cursor_seeks_past_the_cursor():
+    created_at, key = datetime.now(timezone.utc), uuid4()
+
+    query = _chunk(
+        select(NodesDBE),
+        key=NodesDBE.node_id,
+        size=10,
+        cursor=encode_cursor(created_at, key),
+    )
+
+    sql = _compile(query)
+
+    assert "(nodes.created_at, nodes.node_id) < (" in sql
+    assert "nodes.created_at <= " in sql
+    assert "LIMIT" in sql
+    assert "OFFSET" not in sql
+
+
+def test_chunk_with_page_falls_back_to_offset():
+    query = _chunk(select(NodesDBE), key=NodesDBE.node_id, page=3, size=10)
+
+    sql = _compile(query)
+
+    assert "LIMIT" in sql
+    assert "OFFSET" in sql
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+
+from oss.src.dbs.postgres.observability.dao import (
+    _dedup_since,
+    _floor_to_partition,
+    _partition_name,
+    _PARTITION_INTERVAL,
+)
+
+_UTC = timezone.utc
+
+
+def test_partitions_start_on_mondays():
+    start = _floor_to_partition(datetime(2025, 4, 17, 13, 45, tzinfo=_UTC))
+
+    assert start == datetime(2025, 4, 14, tzinfo=_UTC)
+    assert start.weekday() == 0
+    assert _partition_name(start) == "nodes_p20250414"
+
+
+def test_dedup_window_covers_the_previous_partition():
+    now = datetime.now(_UTC)
+
+    since = _dedup_since([{"created_at": func.current_timestamp()}])
+
+    assert since == _floor_to_partition(now) - _PARTITION_INTERVAL
+    assert now - since >= _PARTITION_INTERVAL
+
+
+def test_dedup_window_reaches_back_to_explicit_created_at():
+    created_at = datetime.now(_UTC) - timedelta(days=60)
+
+    since = _dedup_since(
+        [
+            {"created_at": func.current_timestamp()},
+            {"created_at": created_at.replace(tzinfo=None)},
+        ]
+    )
+
+    assert since == _floor_to_partition(created_at)
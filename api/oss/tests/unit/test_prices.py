@@ -0,0 +1,44 @@
+import pytest
+
+import oss.src.core.observability.utils as utils
+
+
+@pytest.fixture
+def pricing_file(tmp_path, monkeypatch):
+    path = tmp_path / "prices.json"
+
+    monkeypatch.setattr(utils, "PRICING_FILE", str(path))
+
+    utils.get_custom_prices.cache_clear()
+    utils.get_prices.cache_clear()
+
+    yield path
+
+    utils.get_custom_prices.cache_clear()
+    utils.get_prices.cache_clear()
+
+
+def test_custom_prices_take_precedence(pricing_file):
+    pricing_file.write_text(
+        '{"my-model": {"input_cost_per_token": 0.5, "output_cost_per_token": 1}}'
+    )
+
+    assert utils.get_prices("my-model") == (0.5, 1.0)
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        None,  # missing
+        "{not json",
+        '["not", "a", "mapping"]',
+        '{"my-model": "not a price"}',
+        '{"my-model": {"input_cost_per_token": "free"}}',
+    ],
+)
+def test_broken_pricing_files_are_ignored(pricing_file, content):
+    if content is not None:
+        pricing_file.write_text(content)
+
+    assert utils.get_custom_prices() == {}
+    assert utils.get_prices("my-model") is None
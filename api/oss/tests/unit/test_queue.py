@@ -0,0 +1,218 @@
+from uuid import UUID, uuid4
+from asyncio import Event, sleep
+
+import pytest
+from fastapi import FastAPI, Request
+from httpx import AsyncClient, ASGITransport
+
+from oss.src.core.observability.queue import IngestionQueue, IngestionQueueFull
+from oss.src.apis.fastapi.observability.router import ObservabilityRouter
+from oss.tests.benchmarks.spans import make_otlp_payload, make_span_dtos
+
+
+class FakeObservabilityService:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.batches = []
+        self.released = Event()
+        self.released.set()
+
+    async def ingest(self, *, project_id, span_dtos):
+        await self.released.wait()
+
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database is down")
+
+        self.batches.append((project_id, list(span_dtos)))
+
+
+def _project_ids(queue: IngestionQueue, count: int, worker: int):
+    project_ids = []
+
+    while len(project_ids) < count:
+        project_id = uuid4()
+
+        if project_id.int % queue.workers == worker:
+            project_ids.append(project_id)
+
+    return project_ids
+
+
+@pytest.fixture
+def span_dtos():
+    return make_span_dtos(10, tree_size=5)
+
+
+async def test_coalesces_payloads_by_project(span_dtos):
+    service = FakeObservabilityService()
+    queue = IngestionQueue(service, workers=1, batch_size=100, linger=0.05)
+
+    project_a, project_b = uuid4(), uuid4()
+
+    await queue.start()
+
+    queue.put(project_id=project_a, span_dtos=span_dtos[:5])
+    queue.put(project_id=project_b, span_dtos=span_dtos[5:])
+    queue.put(project_id=project_a, span_dtos=span_dtos[5:])
+
+    await queue.stop()
+
+    batches = {project_id: span_dtos for project_id, span_dtos in service.batches}
+
+    assert len(service.batches) == 2
+    assert batches[project_a] == span_dtos[:5] + span_dtos[5:]
+    assert batches[project_b] == span_dtos[5:]
+    assert queue.metrics()["ingested"] == 15
+
+
+async def test_routes_each_project_to_a_single_worker(span_dtos):
+    service = FakeObservabilityService()
+    queue = IngestionQueue(service, workers=4, batch_size=1, linger=0)
+
+    project_id = uuid4()
+
+    await queue.start()
+
+    for span_dto in span_dtos:
+        queue.put(project_id=project_id, span_dtos=[span_dto])
+
+    assert [queue_.qsize() > 0 for queue_ in queue._queues].count(True) == 1
+
+    await queue.stop()
+
+    # ONE BATCH AT A TIME, IN ORDER, SO THAT METRICS CUMULATE ACROSS BATCHES
+    assert [span_dtos[0] for _, span_dtos in service.batches] == span_dtos
+
+
+async def test_rejects_payloads_when_full(span_dtos):
+    service = FakeObservabilityService()
+    service.released.clear()
+
+    queue = IngestionQueue(service, max_size=2, workers=1, batch_size=1, linger=0)
+
+    (project_id,) = _project_ids(queue, 1, 0)
+
+    await queue.start()
+
+    queue.put(project_id=project_id, span_dtos=span_dtos[:1])
+    await sleep(0)  # the worker takes the first payload, then waits on ingest
+
+    queue.put(project_id=project_id, span_dtos=span_dtos[1:2])
+    queue.put(project_id=project_id, span_dtos=span_dtos[2:3])
+
+    with pytest.raises(IngestionQueueFull):
+        queue.put(project_id=project_id, span_dtos=span_dtos[3:])
+
+    assert queue.metrics()["dropped"] == 7
+    assert queue.metrics()["enqueued"] == 3
+
+    service.released.set()
+
+    await queue.stop()
+
+
+async def test_stop_drains_pending_payloads(span_dtos):
+    service = FakeObservabilityService()
+    queue = IngestionQueue(service, workers=2, batch_size=1, linger=0)
+
+    await queue.start()
+
+    for span_dto in span_dtos:
+        queue.put(project_id=uuid4(), span_dtos=[span_dto])
+
+    await queue.stop()
+
+    assert not queue.running
+    assert queue.depth == 0
+    assert sum(len(span_dtos) for _, span_dtos in service.batches) == 10
+    assert queue.metrics()["ingested"] == 10
+
+
+async def test_stop_drops_what_is_not_drained_in_time(span_dtos):
+    service = FakeObservabilityService(failures=100)
+    queue = IngestionQueue(
+        service,
+        workers=1,
+        batch_size=1,
+        linger=0,
+        retries=100,
+        backoff=1,
+        drain_timeout=0.1,
+    )
+
+    await queue.start()
+
+    for span_dto in span_dtos:
+        queue.put(project_id=uuid4(), span_dtos=[span_dto])
+
+    await sleep(0)
+
+    # e.g. THE DATABASE IS DOWN, SO THE WORKER KEEPS RETRYING ITS FIRST SPAN
+    await queue.stop()
+
+    assert not queue.running
+    assert queue.metrics()["ingested"] == 0
+    assert queue.metrics()["dropped"] == 10
+
+
+async def test_retries_then_counts_failed_spans(span_dtos):
+    service = FakeObservabilityService(failures=3)
+    queue = IngestionQueue(service, workers=1, linger=0, retries=2, backoff=0)
+
+    await queue.start()
+
+    queue.put(project_id=uuid4(), span_dtos=span_dtos)  # fails 3 times
+    await queue.stop()
+
+    await queue.start()
+
+    queue.put(project_id=uuid4(), span_dtos=span_dtos)  # succeeds
+    await queue.stop()
+
+    metrics = queue.metrics()
+
+    assert metrics["failed"] == 10
+    assert metrics["retried"] == 20
+    assert metrics["ingested"] == 10
+
+
+async def test_receiver_answers_503_when_full():
+    service = FakeObservabilityService()
+    service.released.clear()
+
+    queue = IngestionQueue(service, max_size=1, workers=1, batch_size=1, linger=0)
+    router = ObservabilityRouter(service, ingestion_queue=queue)
+
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def authenticate(request: Request, call_next):
+        request.state.project_id = str(UUID(int=0))
+        request.state.organization_id = str(UUID(int=0))
+        return await call_next(request)
+
+    app.include_router(router.otlp, prefix="/otlp")
+
+    await queue.start()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        statuses = []
+
+        for _ in range(3):
+            response = await client.post(
+                "/otlp/v1/traces",
+                content=make_otlp_payload(2),
+                headers={"Content-Type": "application/x-protobuf"},
+            )
+            statuses.append(response.status_code)
+
+            await sleep(0)
+
+    assert statuses == [202, 202, 503]
+
+    service.released.set()
+
+    await queue.stop()
@@ -0,0 +1,166 @@
+from asyncio import gather
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import AsyncClient, ASGITransport
+
+import oss.src.apis.fastapi.shared.utils as utils_module
+from oss.src.apis.fastapi.shared.utils import RequestScopeMiddleware
+from oss.src.dbs.postgres.shared.engine import Engine
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeAsyncEngine:
+    def __init__(self):
+        self.connections = []
+
+    async def connect(self):
+        connection = FakeConnection()
+
+        self.connections.append(connection)
+
+        return connection
+
+
+class FakeSession:
+    def __init__(self, bind=None, **kwargs):
+        self.bind = bind
+        self.kwargs = kwargs
+        self.committed = False
+        self.rolled_back = False
+        self.closed = False
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        self.rolled_back = True
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def engine():
+    engine = Engine()
+
+    engine.async_engine = FakeAsyncEngine()
+    engine.async_session_maker = FakeSession
+    engine.async_session = lambda: FakeSession(bind="pool")
+
+    return engine
+
+
+async def test_sessions_outside_a_scope_use_the_pool(engine):
+    async with engine.session() as session:
+        assert session.bind == "pool"
+
+    assert session.committed and session.closed
+    assert engine.async_engine.connections == []
+
+
+async def test_sequential_sessions_share_one_connection(engine):
+    async with engine.request_scope():
+        async with engine.session() as first:
+            pass
+
+        async with engine.session() as second:
+            pass
+
+    (connection,) = engine.async_engine.connections
+
+    assert first.bind is second.bind is connection
+    assert first.committed and second.committed
+    assert connection.closed
+
+
+async def test_nested_sessions_join_through_a_savepoint(engine):
+    async with engine.request_scope():
+        async with engine.session() as outer:
+            async with engine.session() as inner:
+                pass
+
+            assert not outer.committed
+
+    (connection,) = engine.async_engine.connections
+
+    # NO SECOND CHECKOUT, SO NO WAIT ON THE POOL WHILE HOLDING A CONNECTION
+    assert inner.bind is outer.bind is connection
+    assert inner.kwargs == {"join_transaction_mode": "create_savepoint"}
+    assert inner.committed and outer.committed
+    assert connection.closed
+
+
+async def test_concurrent_sessions_use_the_pool(engine):
+    async def read():
+        async with engine.session() as session:
+            return session
+
+    async with engine.request_scope():
+        async with engine.session() as outer:
+            others = await gather(read(), read())
+
+    assert outer.bind is engine.async_engine.connections[0]
+    assert [other.bind for other in others] == ["pool", "pool"]
+
+
+async def test_failed_sessions_release_the_connection(engine):
+    async with engine.request_scope():
+        with pytest.raises(ValueError):
+            async with engine.session() as failed:
+                raise ValueError()
+
+        async with engine.session() as session:
+            pass
+
+    first, second = engine.async_engine.connections
+
+    assert failed.rolled_back and first.closed
+    assert session.bind is second and second.closed
+
+
+async def test_streamed_sessions_share_the_request_connection(engine, monkeypatch):
+    monkeypatch.setattr(utils_module, "engine", engine)
+    monkeypatch.setattr(utils_module, "POSTGRES_POOL_PER_REQUEST", True)
+
+    sessions = []
+
+    app = FastAPI()
+    app.add_middleware(RequestScopeMiddleware)
+
+    @app.get("/stream")
+    async def stream():
+        async with engine.session() as session:
+            sessions.append(session)
+
+        async def chunks():
+            for chunk in (b"a", b"b"):
+                async with engine.session() as session:
+                    sessions.append(session)
+
+                # STILL CHECKED OUT, UNTIL THE RESPONSE IS STREAMED
+                assert not session.bind.closed
+
+                yield chunk
+
+        return StreamingResponse(chunks())
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/stream")
+
+    assert response.content == b"ab"
+
+    (connection,) = engine.async_engine.connections
+
+    assert [session.bind for session in sessions] == [connection] * 3
+    assert connection.closed
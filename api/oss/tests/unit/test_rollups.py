@@ -0,0 +1,178 @@
+from uuid import uuid4
+from random import Random
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from oss.src.core.observability.dtos import Focus
+from oss.src.dbs.postgres.observability.dao import _to_rollup_ranges
+from oss.src.dbs.postgres.observability.mappings import (
+    map_span_dbes_to_rollup_values,
+    floor_to_granularity,
+    ceil_to_granularity,
+    ROLLUP_GRANULARITIES,
+)
+
+_UTC = timezone.utc
+
+
+def _flatten(ranges):
+    return sorted(
+        (start, end, granularity)
+        for granularity, _ranges in ranges.items()
+        for start, end in _ranges
+    )
+
+
+def _span(created_at, parent_id=None, is_error=False, unit=1.0, acc=10.0):
+    return SimpleNamespace(
+        created_at=created_at,
+        parent_id=parent_id,
+        is_error=is_error,
+        unit_duration_total=unit,
+        unit_costs_total=unit / 100,
+        unit_tokens_total=int(unit * 10),
+        acc_duration_total=acc,
+        acc_costs_total=acc / 100,
+        acc_tokens_total=int(acc * 10),
+    )
+
+
+def test_floor_and_ceil_to_granularity():
+    timestamp = datetime(2025, 1, 31, 13, 45, 30, tzinfo=_UTC)
+
+    assert floor_to_granularity(timestamp, 1) == datetime(
+        2025, 1, 31, 13, 45, tzinfo=_UTC
+    )
+    assert ceil_to_granularity(timestamp, 60) == datetime(2025, 1, 31, 14, tzinfo=_UTC)
+    assert floor_to_granularity(timestamp, 1440) == datetime(2025, 1, 31, tzinfo=_UTC)
+    assert ceil_to_granularity(datetime(2025, 1, 31, tzinfo=_UTC), 1440) == datetime(
+        2025, 1, 31, tzinfo=_UTC
+    )
+    # NAIVE TIMESTAMPS ARE UTC
+    assert floor_to_granularity(timestamp.replace(tzinfo=None), 60) == datetime(
+        2025, 1, 31, 13, tzinfo=_UTC
+    )
+
+
+def test_rollup_ranges_of_aligned_days_are_a_single_day_range():
+    newest = datetime(2025, 2, 1, tzinfo=_UTC)
+    oldest = newest - timedelta(days=30)
+
+    ranges = _to_rollup_ranges(oldest, newest, 1440)
+
+    assert ranges[1440] == [(oldest, newest)]
+    assert ranges[60] == ranges[1] == ranges[0] == []
+
+
+def test_rollup_ranges_read_only_the_unaligned_edges_from_nodes():
+    oldest = datetime(2025, 1, 1, 10, 30, 15, tzinfo=_UTC)
+    newest = datetime(2025, 1, 3, 12, 15, 45, tzinfo=_UTC)
+
+    ranges = _to_rollup_ranges(oldest, newest, 60)
+
+    # BUCKETS START AT oldest, SO EVERY BUCKET EDGE IS OFF BY 15 SECONDS,
+    # ONLY WHOLE MINUTES FIT IN A BUCKET, AND EDGES MERGE ACROSS BUCKETS
+    assert ranges[1440] == ranges[60] == []
+    assert ranges[1][0] == (
+        datetime(2025, 1, 1, 10, 31, tzinfo=_UTC),
+        datetime(2025, 1, 1, 11, 30, tzinfo=_UTC),
+    )
+    assert ranges[0][0] == (oldest, datetime(2025, 1, 1, 10, 31, tzinfo=_UTC))
+    assert ranges[0][-1] == (datetime(2025, 1, 3, 12, 15, tzinfo=_UTC), newest)
+    assert all(end - start <= timedelta(minutes=1) for start, end in ranges[0])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_rollup_ranges_tile_the_window(seed):
+    random = Random(seed)
+
+    oldest = datetime(2025, 1, 1, tzinfo=_UTC) + timedelta(
+        seconds=random.randint(0, 86400 * 30)
+    )
+    newest = oldest + timedelta(seconds=random.randint(1, 86400 * 30))
+    window = random.choice([1, 5, 15, 60, 720, 1440])
+
+    ranges = _to_rollup_ranges(oldest, newest, window)
+
+    tiles = _flatten(ranges)
+
+    # NO GAPS, NO OVERLAPS
+    assert tiles[0][0] == oldest
+    assert tiles[-1][1] == newest
+    assert all(a[1] == b[0] for a, b in zip(tiles, tiles[1:]))
+
+    # ROLLUP RANGES ARE ALIGNED TO THEIR GRANULARITY
+    for start, end, granularity in tiles:
+        assert start < end
+
+        if granularity:
+            assert floor_to_granularity(start, granularity) == start
+            assert floor_to_granularity(end, granularity) == end
+
+
+def test_rollup_values_aggregate_nodes_and_trees():
+    project_id = uuid4()
+    created_at = datetime(2025, 1, 31, 13, 45, 30, tzinfo=_UTC)
+
+    root = _span(created_at)
+    child = _span(created_at + timedelta(minutes=1), parent_id=uuid4(), is_error=True)
+
+    values = map_span_dbes_to_rollup_values(project_id, [root, child])
+
+    # 2 SPANS IN 2 MINUTES, 1 HOUR, 1 DAY + 1 TRACE IN 1 MINUTE, 1 HOUR, 1 DAY
+    assert len(values) == 4 + 3
+
+    by_key = {(v["granularity"], v["focus"], v["bucket"]): v for v in values}
+
+    day = floor_to_granularity(created_at, 1440)
+
+    nodes = by_key[(1440, Focus.NODE, day)]
+
+    assert nodes["project_id"] == project_id
+    assert nodes["count"] == 2
+    assert nodes["duration"] == 2.0
+    assert nodes["tokens"] == 20
+    assert nodes["error_count"] == 1
+    assert nodes["error_duration"] == 1.0
+
+    trees = by_key[(1440, Focus.TREE, day)]
+
+    assert trees["count"] == 1
+    assert trees["duration"] == 10.0
+    assert trees["cost"] == 0.1
+    assert trees["error_count"] == 0
+
+    assert [(v["granularity"], v["focus"].value, v["bucket"]) for v in values] == (
+        sorted((v["granularity"], v["focus"].value, v["bucket"]) for v in values)
+    )
+
+
+def test_rollup_values_of_deleted_spans_are_negated():
+    project_id = uuid4()
+    spans = [
+        _span(datetime(2025, 1, 31, 13, 45, tzinfo=_UTC), is_error=True),
+        _span(datetime(2025, 1, 31, 13, 46, tzinfo=_UTC), parent_id=uuid4()),
+    ]
+
+    added = map_span_dbes_to_rollup_values(project_id, spans)
+    deleted = map_span_dbes_to_rollup_values(project_id, spans, sign=-1)
+
+    assert len(added) == len(deleted)
+
+    for a, d in zip(added, deleted):
+        for metric in ("count", "duration", "cost", "tokens", "error_count"):
+            assert a[metric] == -d[metric]
+
+
+def test_rollup_values_treat_missing_metrics_as_zero():
+    span = _span(datetime(2025, 1, 31, tzinfo=_UTC))
+    span.unit_costs_total = None
+    span.acc_tokens_total = None
+
+    values = map_span_dbes_to_rollup_values(uuid4(), [span])
+
+    assert len(values) == 2 * len(ROLLUP_GRANULARITIES)
+    assert all(value["count"] == 1 for value in values)
+    assert all(value["cost"] == 0.0 for value in values if value["focus"] == Focus.NODE)
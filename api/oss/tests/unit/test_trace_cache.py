@@ -0,0 +1,234 @@
+from uuid import uuid4
+
+import pytest
+
+import oss.src.core.observability.cache as cache_module
+from oss.src.core.observability.cache import TraceCache
+
+
+async def _read(cache, project_id, tree_id, content=b"{}", format="agenta"):
+    """Mimics fetch_trace_by_id: get, then generation, then read, then set."""
+
+    cached = await cache.get(project_id=project_id, tree_id=tree_id, format=format)
+
+    if cached is not None:
+        return cached
+
+    generation = await cache.generation(project_id=project_id, tree_id=tree_id)
+
+    await cache.set(
+        project_id=project_id,
+        tree_id=tree_id,
+        format=format,
+        content=content,
+        generation=generation,
+    )
+
+    return content
+
+
+@pytest.fixture(params=["memory", "redis"])
+async def cache(request, monkeypatch):
+    if request.param == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+
+        client = fakeredis.FakeAsyncRedis()
+
+        monkeypatch.setattr(cache_module, "async_redis_connection", lambda: client)
+
+        yield TraceCache(backend="redis", ttl=60, max_entries=4, max_bytes=1024)
+
+        await client.flushall()
+
+    else:
+        yield TraceCache(backend="memory", ttl=60, max_entries=4, max_bytes=1024)
+
+
+async def test_hit_after_miss(cache):
+    project_id, tree_id = uuid4(), uuid4()
+
+    assert await _read(cache, project_id, tree_id, b"v1") == b"v1"
+    assert await _read(cache, project_id, tree_id, b"v2") == b"v1"
+
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_formats_are_cached_apart(cache):
+    project_id, tree_id = uuid4(), uuid4()
+
+    await _read(cache, project_id, tree_id, b"agenta", format="agenta")
+    await _read(cache, project_id, tree_id, b"otel", format="opentelemetry")
+
+    assert await _read(cache, project_id, tree_id, format="agenta") == b"agenta"
+    assert await _read(cache, project_id, tree_id, format="opentelemetry") == b"otel"
+
+
+async def test_invalidate_trees(cache):
+    project_id, tree_a, tree_b = uuid4(), uuid4(), uuid4()
+
+    await _read(cache, project_id, tree_a, b"a1")
+    await _read(cache, project_id, tree_b, b"b1")
+
+    await cache.invalidate(project_id=project_id, tree_ids=[tree_a])
+
+    assert await _read(cache, project_id, tree_a, b"a2") == b"a2"
+    assert await _read(cache, project_id, tree_b, b"b2") == b"b1"
+
+
+async def test_invalidate_project(cache):
+    project_a, project_b, tree_id = uuid4(), uuid4(), uuid4()
+
+    await _read(cache, project_a, tree_id, b"a1")
+    await _read(cache, project_b, tree_id, b"b1")
+
+    await cache.invalidate(project_id=project_a)
+
+    assert await _read(cache, project_a, tree_id, b"a2") == b"a2"
+    assert await _read(cache, project_b, tree_id, b"b2") == b"b1"
+
+
+async def test_clear(cache):
+    project_id, tree_id = uuid4(), uuid4()
+
+    await _read(cache, project_id, tree_id, b"v1")
+
+    await cache.clear()
+
+    assert await _read(cache, project_id, tree_id, b"v2") == b"v2"
+
+
+@pytest.mark.parametrize("scope", ["tree", "project", "all"])
+async def test_set_after_invalidate_is_skipped(cache, scope):
+    project_id, tree_id = uuid4(), uuid4()
+
+    # A READER MISSES, AND READS THE TREE FROM THE DATABASE...
+    generation = await cache.generation(project_id=project_id, tree_id=tree_id)
+
+    # ...WHILE AN INGESTION WRITES TO THE TREE AND INVALIDATES IT...
+    if scope == "tree":
+        await cache.invalidate(project_id=project_id, tree_ids=[tree_id])
+    elif scope == "project":
+        await cache.invalidate(project_id=project_id)
+    else:
+        await cache.clear()
+
+    # ...SO THE TREE AS READ BEFORE THE INGESTION MUST NOT BE CACHED
+    await cache.set(
+        project_id=project_id,
+        tree_id=tree_id,
+        format="agenta",
+        content=b"stale",
+        generation=generation,
+    )
+
+    assert cache.skips == 1
+    assert await _read(cache, project_id, tree_id, b"fresh") == b"fresh"
+
+
+async def test_set_is_not_skipped_for_other_trees(cache):
+    project_id, tree_a, tree_b = uuid4(), uuid4(), uuid4()
+
+    generation = await cache.generation(project_id=project_id, tree_id=tree_a)
+
+    await cache.invalidate(project_id=project_id, tree_ids=[tree_b])
+
+    await cache.set(
+        project_id=project_id,
+        tree_id=tree_a,
+        format="agenta",
+        content=b"a1",
+        generation=generation,
+    )
+
+    assert cache.skips == 0
+    assert await _read(cache, project_id, tree_a, b"a2") == b"a1"
+
+
+async def test_oversized_entries_are_not_cached(cache):
+    project_id, tree_id = uuid4(), uuid4()
+
+    await _read(cache, project_id, tree_id, b"x" * 2048)
+
+    assert await _read(cache, project_id, tree_id, b"v2") == b"v2"
+
+
+async def test_memory_entries_expire(monkeypatch):
+    cache = TraceCache(backend="memory", ttl=60)
+    project_id, tree_id = uuid4(), uuid4()
+
+    now = 1000.0
+    monkeypatch.setattr(cache_module, "monotonic", lambda: now)
+
+    await _read(cache, project_id, tree_id, b"v1")
+
+    now += 61
+
+    assert await _read(cache, project_id, tree_id, b"v2") == b"v2"
+
+
+async def test_memory_evicts_least_recently_used():
+    cache = TraceCache(backend="memory", max_entries=2)
+    project_id = uuid4()
+    tree_a, tree_b, tree_c = uuid4(), uuid4(), uuid4()
+
+    await _read(cache, project_id, tree_a, b"a")
+    await _read(cache, project_id, tree_b, b"b")
+    await _read(cache, project_id, tree_a)  # a is now the most recently used
+    await _read(cache, project_id, tree_c, b"c")
+
+    assert await _read(cache, project_id, tree_a, b"a2") == b"a"
+    assert await _read(cache, project_id, tree_b, b"b2") == b"b2"
+
+
+async def test_memory_invalidations_are_bounded():
+    cache = TraceCache(backend="memory", max_entries=2)
+    project_id, tree_id = uuid4(), uuid4()
+
+    generation = await cache.generation(project_id=project_id, tree_id=tree_id)
+
+    await cache.invalidate(project_id=project_id, tree_ids=[tree_id])
+
+    # THE INVALIDATION OF THE TREE IS FORGOTTEN, BUT NOT ITS CLOCK
+    await cache.invalidate(project_id=project_id, tree_ids=[uuid4(), uuid4()])
+
+    assert len(cache._invalidations) == 2
+
+    await cache.set(
+        project_id=project_id,
+        tree_id=tree_id,
+        format="agenta",
+        content=b"stale",
+        generation=generation,
+    )
+
+    assert cache.skips == 1
+
+
+async def test_redis_entries_are_keyed_by_tree(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+
+    client = fakeredis.FakeAsyncRedis()
+
+    monkeypatch.setattr(cache_module, "async_redis_connection", lambda: client)
+
+    cache = TraceCache(backend="redis", ttl=60)
+    project_id, tree_a, tree_b = uuid4(), uuid4(), uuid4()
+
+    await _read(cache, project_id, tree_a, b"a")
+    await _read(cache, project_id, tree_b, b"b")
+
+    prefix = f"agenta:observability:traces:{project_id}"
+
+    # ONE TTL PER TREE, NOT REFRESHED BY WRITES TO OTHER TREES
+    assert 0 < await client.ttl(f"{prefix}:{tree_a}:agenta") <= 60
+    assert await client.zcard(f"{prefix}:index") == 2
+
+    await cache.invalidate(project_id=project_id, tree_ids=[tree_a])
+
+    assert await client.zcard(f"{prefix}:index") == 1
+
+    await cache.invalidate(project_id=project_id)
+
+    assert not await client.exists(f"{prefix}:{tree_b}:agenta", f"{prefix}:index")
@@ -0,0 +1,71 @@
+from oss.src.apis.fastapi.observability.utils import (
+    _unmarshal_attributes,
+    parse_from_otel_span_dto,
+)
+from oss.tests.benchmarks.spans import make_otel_span_dtos
+
+
+def test_unmarshals_nested_objects_and_lists():
+    marshalled = {
+        "ag.type": "tree",
+        "ag.node.name": "root",
+        "ag.node.children.0.name": "child1",
+        "ag.node.children.1.name": "child2",
+    }
+
+    assert _unmarshal_attributes(marshalled) == {
+        "ag": {
+            "type": "tree",
+            "node": {
+                "name": "root",
+                "children": [{"name": "child1"}, {"name": "child2"}],
+            },
+        }
+    }
+
+
+def test_gaps_in_lists_of_values_are_none():
+    assert _unmarshal_attributes({"tags.2": "c", "tags.0": "a"}) == {
+        "tags": ["a", None, "c"]
+    }
+
+
+def test_gaps_in_lists_of_objects_are_empty_objects():
+    assert _unmarshal_attributes({"messages.2.role": "user"}) == {
+        "messages": [{}, {}, {"role": "user"}]
+    }
+
+
+def test_gaps_in_nested_lists():
+    assert _unmarshal_attributes({"c.2.1.c": 8}) == {"c": [{}, {}, [{}, {"c": 8}]]}
+
+
+def test_levels_mixing_digits_and_names_are_objects():
+    # NEITHER A LIST NOR A LIST INDEX CAN HOLD BOTH, SO NO KEY IS DROPPED
+    assert _unmarshal_attributes({"a.0": 1, "a.b": 2}) == {"a": {"0": 1, "b": 2}}
+    assert _unmarshal_attributes({"a.1.x": 1, "a.name": "n"}) == {
+        "a": {"1": {"x": 1}, "name": "n"}
+    }
+
+
+def test_values_that_are_dicts_are_kept_as_is():
+    assert _unmarshal_attributes({"a.b": {"0": 1}, "a.c.0": {"d": 2}}) == {
+        "a": {"b": {"0": 1}, "c": [{"d": 2}]}
+    }
+
+
+def test_parses_namespaces_of_a_span():
+    (otel_span_dto,) = make_otel_span_dtos(1, messages=3)
+
+    span_dto = parse_from_otel_span_dto(otel_span_dto)
+
+    assert span_dto.node.type.value == "workflow"
+    assert span_dto.meta["request.model"] == "gpt-4o-mini"
+    assert span_dto.meta["tags"] == ["benchmark", "span-0"]
+    assert span_dto.data["inputs.messages.2.role"] == "system"
+    assert span_dto.data["internals.options"] == {"stream": False, "n": 1}
+    assert span_dto.refs == {
+        "application.id": "0190e436-818a-7c97-83b4-d7af4bd23e99",
+        "variant.slug": "default",
+    }
+    assert span_dto.metrics["unit.tokens.prompt"] > 0
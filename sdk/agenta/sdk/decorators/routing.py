@@ -2,19 +2,13 @@ from typing import Type, Any, Callable, Dict, Optional, Tuple, List
 from inspect import signature, iscoroutinefunction, Signature, Parameter
 from functools import wraps
 from traceback import format_exception
-from asyncio import sleep
 from uuid import UUID
 from pydantic import BaseModel, HttpUrl, ValidationError
 from os import environ
 
 from fastapi import Body, FastAPI, HTTPException, Request
 
-from agenta.sdk.middleware.mock import MockMiddleware
-from agenta.sdk.middleware.inline import InlineMiddleware
-from agenta.sdk.middleware.vault import VaultMiddleware
-from agenta.sdk.middleware.config import ConfigMiddleware
-from agenta.sdk.middleware.otel import OTelMiddleware
-from agenta.sdk.middleware.auth import AuthMiddleware
+from agenta.sdk.middleware.pipeline import PipelineMiddleware
 from agenta.sdk.middleware.cors import CORSMiddleware
 
 from agenta.sdk.context.routing import (
@@ -27,6 +21,7 @@ from agenta.sdk.context.tracing import (
     TracingContext,
 )
 from agenta.sdk.router import router
+from agenta.sdk.utils.http import open_async_client, close_async_client
 from agenta.sdk.utils.exceptions import suppress, display_exception
 from agenta.sdk.utils.logging import get_module_logger
 from agenta.sdk.utils.helpers import get_current_version
@@ -49,6 +44,9 @@ app = FastAPI(
 
 app.include_router(router, prefix=AGENTA_RUNTIME_PREFIX)
 
+app.add_event_handler("startup", open_async_client)
+app.add_event_handler("shutdown", close_async_client)
+
 
 class PathValidator(BaseModel):
     url: HttpUrl
@@ -141,12 +139,7 @@ class entrypoint:
         ### --- Middleware --- #
         if not entrypoint._middleware:
             entrypoint._middleware = True
-            app.add_middleware(MockMiddleware)
-            app.add_middleware(InlineMiddleware)
-            app.add_middleware(VaultMiddleware)
-            app.add_middleware(ConfigMiddleware)
-            app.add_middleware(AuthMiddleware)
-            app.add_middleware(OTelMiddleware)
+            app.add_middleware(PipelineMiddleware)
             app.add_middleware(CORSMiddleware)
         ### ------------------ #
 
@@ -454,8 +447,6 @@ class entrypoint:
         inline: bool,
     ):
         TIMEOUT = 1
-        TIMESTEP = 0.1
-        NOFSTEPS = TIMEOUT / TIMESTEP
 
         context = tracing_context.get()
 
@@ -467,14 +458,7 @@ class entrypoint:
 
         if _tree_id is not None:
             if inline:
-                remaining_steps = NOFSTEPS
-                while (
-                    not ag.tracing.is_inline_trace_ready(_tree_id)
-                    and remaining_steps > 0
-                ):
-                    await sleep(TIMESTEP)
-
-                    remaining_steps -= 1
+                await ag.tracing.wait_inline_trace(_tree_id, timeout=TIMEOUT)
 
                 tree = ag.tracing.get_inline_trace(_tree_id)
 
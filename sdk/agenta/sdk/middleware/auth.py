@@ -1,14 +1,14 @@
-from typing import Callable, Optional
+from typing import Dict, Optional
 
 from os import getenv
 from json import dumps
 
 import httpx
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import FastAPI, Request
+from fastapi import Request
 from fastapi.responses import JSONResponse
 
-from agenta.sdk.utils.cache import TTLLRUCache
+from agenta.sdk.utils.cache import AsyncCache
+from agenta.sdk.utils.http import get_async_client
 from agenta.sdk.utils.constants import TRUTHY
 from agenta.sdk.utils.exceptions import display_exception
 from agenta.sdk.utils.logging import get_module_logger
@@ -24,7 +24,7 @@ _CACHE_ENABLED = getenv("AGENTA_MIDDLEWARE_CACHE_ENABLED", "false").lower() in T
 
 _ALWAYS_ALLOW_LIST = [f"{AGENTA_RUNTIME_PREFIX}/health"]
 
-_cache = TTLLRUCache()
+_cache = AsyncCache(namespace="auth", enabled=_CACHE_ENABLED)
 
 
 class DenyResponse(JSONResponse):
@@ -51,16 +51,14 @@ class DenyException(Exception):
         self.content = content
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: FastAPI):
-        super().__init__(app)
-
+class AuthMiddleware:
+    def __init__(self):
         self.host = ag.DEFAULT_AGENTA_SINGLETON_INSTANCE.host
 
         self.scope_type = ag.DEFAULT_AGENTA_SINGLETON_INSTANCE.scope_type
         self.scope_id = ag.DEFAULT_AGENTA_SINGLETON_INSTANCE.scope_id
 
-    async def dispatch(self, request: Request, call_next: Callable):
+    async def __call__(self, request: Request) -> Optional[DenyResponse]:
         try:
             if request.url.path in _ALWAYS_ALLOW_LIST:
                 request.state.auth = {}
@@ -70,7 +68,7 @@ class AuthMiddleware(BaseHTTPMiddleware):
 
                 request.state.auth = {"credentials": credentials}
 
-            return await call_next(request)
+            return None
 
         except DenyException as deny:
             display_exception("Auth Middleware Exception")
@@ -133,119 +131,122 @@ class AuthMiddleware(BaseHTTPMiddleware):
                 sort_keys=True,
             )
 
-            if _CACHE_ENABLED:
-                credentials = _cache.get(_hash)
+            return await _cache.get(
+                _hash,
+                lambda: self._verify_credentials(
+                    headers=headers,
+                    cookies=cookies,
+                    params=params,
+                ),
+            )
+
+        except DenyException as deny:
+            raise deny
+        except Exception as exc:
+            log.debug(f"Unexpected error while verifying credentials (local): {exc}")
+            raise DenyException(
+                status_code=500,
+                content=f"Could no verify credentials: unexpected error - {str(exc)}. Please try again later or contact support if the issue persists.",
+            ) from exc
 
-                if credentials:
-                    log.debug("Using cached credentials")
-                    return credentials
+    async def _verify_credentials(
+        self,
+        headers: Optional[Dict],
+        cookies: Optional[Dict],
+        params: Dict,
+    ) -> Optional[str]:
+        try:
+            client = get_async_client()
 
             try:
-                async with httpx.AsyncClient() as client:
-                    try:
-                        response = await client.get(
-                            f"{self.host}/api/permissions/verify",
-                            headers=headers,
-                            cookies=cookies,
-                            params=params,
-                            timeout=30.0,
-                        )
-                    except httpx.TimeoutException as exc:
-                        log.debug(f"Timeout error while verify credentials: {exc}")
-                        raise DenyException(
-                            status_code=504,
-                            content="Could not verify credentials: connection to {self.host} timed out. Please check your network connection.",
-                        ) from exc
-                    except httpx.ConnectError as exc:
-                        log.debug(f"Connection error while verify credentials: {exc}")
-                        raise DenyException(
-                            status_code=503,
-                            content=f"Could not verify credentials: connection to {self.host} failed. Please check if agenta is available.",
-                        ) from exc
-                    except httpx.NetworkError as exc:
-                        log.debug(f"Network error while verify credentials: {exc}")
-                        raise DenyException(
-                            status_code=503,
-                            content="Could not verify credentials: connection to {self.host} failed. Please check your network connection.",
-                        ) from exc
-                    except httpx.HTTPError as exc:
-                        log.debug(f"HTTP error while verify credentials: {exc}")
-                        raise DenyException(
-                            status_code=502,
-                            content=f"Could not verify credentials: connection to {self.host} failed. Please check if agenta is available.",
-                        ) from exc
-
-                    if response.status_code == 401:
-                        log.debug("Agenta returned 401 - Invalid credentials")
-                        raise DenyException(
-                            status_code=401,
-                            content="Invalid credentials. Please check your credentials or login again.",
-                        )
-                    elif response.status_code == 403:
-                        log.debug("Agenta returned 403 - Permission denied")
-                        raise DenyException(
-                            status_code=403,
-                            content="Permission denied. Please check your permissions or contact your administrator.",
-                        )
-                    elif response.status_code != 200:
-                        log.debug(
-                            f"Agenta returned {response.status_code} - Unexpected status code"
-                        )
-                        raise DenyException(
-                            status_code=500,
-                            content=f"Could no verify credentials: {self.host} returned unexpected status code {response.status_code}. Please try again later or contact support if the issue persists.",
-                        )
-
-                    try:
-                        auth = response.json()
-                    except ValueError as exc:
-                        log.debug(f"Agenta returned invalid JSON response: {exc}")
-                        raise DenyException(
-                            status_code=500,
-                            content=f"Could no verify credentials: {self.host} returned unexpected invalid JSON response. Please try again later or contact support if the issue persists.",
-                        ) from exc
-
-                    if not isinstance(auth, dict):
-                        log.debug(
-                            f"Agenta returned invalid response format: {type(auth)}"
-                        )
-                        raise DenyException(
-                            status_code=500,
-                            content=f"Could no verify credentials: {self.host} returned unexpected invalid response format. Please try again later or contact support if the issue persists.",
-                        )
-
-                    effect = auth.get("effect")
-                    if effect != "allow":
-                        log.debug("Access denied by Agenta - effect: {effect}")
-                        raise DenyException(
-                            status_code=403,
-                            content="Permission denied. Please check your permissions or contact your administrator.",
-                        )
-
-                    credentials = auth.get("credentials")
-
-                    if not credentials:
-                        log.debug("No credentials found in the response")
-
-                    _cache.put(_hash, credentials)
-
-                    return credentials
-
-            except DenyException as deny:
-                raise deny
-            except Exception as exc:  # pylint: disable=bare-except
+                response = await client.get(
+                    f"{self.host}/api/permissions/verify",
+                    headers=headers,
+                    cookies=cookies,
+                    params=params,
+                    timeout=30.0,
+                )
+            except httpx.TimeoutException as exc:
+                log.debug(f"Timeout error while verify credentials: {exc}")
+                raise DenyException(
+                    status_code=504,
+                    content="Could not verify credentials: connection to {self.host} timed out. Please check your network connection.",
+                ) from exc
+            except httpx.ConnectError as exc:
+                log.debug(f"Connection error while verify credentials: {exc}")
+                raise DenyException(
+                    status_code=503,
+                    content=f"Could not verify credentials: connection to {self.host} failed. Please check if agenta is available.",
+                ) from exc
+            except httpx.NetworkError as exc:
+                log.debug(f"Network error while verify credentials: {exc}")
+                raise DenyException(
+                    status_code=503,
+                    content="Could not verify credentials: connection to {self.host} failed. Please check your network connection.",
+                ) from exc
+            except httpx.HTTPError as exc:
+                log.debug(f"HTTP error while verify credentials: {exc}")
+                raise DenyException(
+                    status_code=502,
+                    content=f"Could not verify credentials: connection to {self.host} failed. Please check if agenta is available.",
+                ) from exc
+
+            if response.status_code == 401:
+                log.debug("Agenta returned 401 - Invalid credentials")
+                raise DenyException(
+                    status_code=401,
+                    content="Invalid credentials. Please check your credentials or login again.",
+                )
+            elif response.status_code == 403:
+                log.debug("Agenta returned 403 - Permission denied")
+                raise DenyException(
+                    status_code=403,
+                    content="Permission denied. Please check your permissions or contact your administrator.",
+                )
+            elif response.status_code != 200:
                 log.debug(
-                    f"Unexpected error while verifying credentials (remote): {exc}"
+                    f"Agenta returned {response.status_code} - Unexpected status code"
                 )
                 raise DenyException(
                     status_code=500,
-                    content=f"Could no verify credentials: unexpected error - {str(exc)}. Please try again later or contact support if the issue persists.",
+                    content=f"Could no verify credentials: {self.host} returned unexpected status code {response.status_code}. Please try again later or contact support if the issue persists.",
+                )
+
+            try:
+                auth = response.json()
+            except ValueError as exc:
+                log.debug(f"Agenta returned invalid JSON response: {exc}")
+                raise DenyException(
+                    status_code=500,
+                    content=f"Could no verify credentials: {self.host} returned unexpected invalid JSON response. Please try again later or contact support if the issue persists.",
                 ) from exc
 
+            if not isinstance(auth, dict):
+                log.debug(f"Agenta returned invalid response format: {type(auth)}")
+                raise DenyException(
+                    status_code=500,
+                    content=f"Could no verify credentials: {self.host} returned unexpected invalid response format. Please try again later or contact support if the issue persists.",
+                )
+
+            effect = auth.get("effect")
+            if effect != "allow":
+                log.debug("Access denied by Agenta - effect: {effect}")
+                raise DenyException(
+                    status_code=403,
+                    content="Permission denied. Please check your permissions or contact your administrator.",
+                )
+
+            credentials = auth.get("credentials")
+
+            if not credentials:
+                log.debug("No credentials found in the response")
+
+            return credentials
+
         except DenyException as deny:
             raise deny
-        except Exception as exc:
-            log.debug(f"Unexpected error while verifying credentials (local): {exc}")
+        except Exception as exc:  # pylint: disable=bare-except
+            log.debug(f"Unexpected error while verifying credentials (remote): {exc}")
             raise DenyException(
                 status_code=500,
                 content=f"Could no verify credentials: unexpected error - {str(exc)}. Please try again later or contact support if the issue persists.",
@@ -1,16 +1,14 @@
-from typing import Callable, Optional, Tuple, Dict
+from typing import Any, Optional, Tuple, Dict
 
 from os import getenv
 from json import dumps
 
 from pydantic import BaseModel
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request, FastAPI
+from fastapi import Request
 
-import httpx
-
-from agenta.sdk.utils.cache import TTLLRUCache
+from agenta.sdk.utils.cache import AsyncCache
+from agenta.sdk.utils.http import get_async_client
 from agenta.sdk.utils.constants import TRUTHY
 from agenta.sdk.utils.exceptions import suppress
 
@@ -19,7 +17,7 @@ import agenta as ag
 
 _CACHE_ENABLED = getenv("AGENTA_MIDDLEWARE_CACHE_ENABLED", "false").lower() in TRUTHY
 
-_cache = TTLLRUCache()
+_cache = AsyncCache(namespace="config", enabled=_CACHE_ENABLED)
 
 
 class Reference(BaseModel):
@@ -28,17 +26,14 @@ class Reference(BaseModel):
     version: Optional[str] = None
 
 
-class ConfigMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: FastAPI):
-        super().__init__(app)
-
+class ConfigMiddleware:
+    def __init__(self):
         self.host = ag.DEFAULT_AGENTA_SINGLETON_INSTANCE.host
 
-    async def dispatch(
+    async def __call__(
         self,
         request: Request,
-        call_next: Callable,
-    ):
+    ) -> None:
         request.state.config = {"parameters": None, "references": None}
 
         with suppress():
@@ -49,8 +44,6 @@ class ConfigMiddleware(BaseHTTPMiddleware):
                 "references": references,
             }
 
-        return await call_next(request)
-
     # @atimeit
     async def _get_config(self, request: Request) -> Optional[Tuple[Dict, Dict]]:
         credentials = request.state.auth.get("credentials")
@@ -59,9 +52,11 @@ class ConfigMiddleware(BaseHTTPMiddleware):
         if credentials:
             headers = {"Authorization": credentials}
 
-        application_ref = await self._parse_application_ref(request)
-        variant_ref = await self._parse_variant_ref(request)
-        environment_ref = await self._parse_environment_ref(request)
+        body = await self._parse_body(request)
+
+        application_ref = self._parse_application_ref(request, body)
+        variant_ref = self._parse_variant_ref(request, body)
+        environment_ref = self._parse_environment_ref(request, body)
 
         refs = {}
         if application_ref:
@@ -82,25 +77,25 @@ class ConfigMiddleware(BaseHTTPMiddleware):
             sort_keys=True,
         )
 
-        if _CACHE_ENABLED:
-            config_cache = _cache.get(_hash)
-
-            if config_cache:
-                parameters = config_cache.get("parameters")
-                references = config_cache.get("references")
-
-                return parameters, references
+        return await _cache.get(
+            _hash,
+            lambda: self._fetch_config(headers=headers, refs=refs),
+        )
 
+    async def _fetch_config(
+        self,
+        headers: Optional[Dict],
+        refs: Dict,
+    ) -> Tuple[Optional[Dict], Dict]:
         config = {}
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.host}/api/variants/configs/fetch",
-                headers=headers,
-                json=refs,
-            )
+        response = await get_async_client().post(
+            f"{self.host}/api/variants/configs/fetch",
+            headers=headers,
+            json=refs,
+        )
 
-            if response.status_code == 200:
-                config = response.json()
+        if response.status_code == 200:
+            config = response.json()
 
         if not config:
             config["application_ref"] = refs[
@@ -128,22 +123,27 @@ class ConfigMiddleware(BaseHTTPMiddleware):
                     if ref_part:
                         references[ref_prefix + "." + ref_part_key] = str(ref_part)
 
-        _cache.put(_hash, {"parameters": parameters, "references": references})
-
         return parameters, references
 
-    async def _parse_application_ref(
+    async def _parse_body(
         self,
         request: Request,
-    ) -> Optional[Reference]:
-        baggage = request.state.otel["baggage"]
-
+    ) -> Dict[str, Any]:
         body = {}
         try:
             body = await request.json()
         except:  # pylint: disable=bare-except
             pass
 
+        return body if isinstance(body, dict) else {}
+
+    def _parse_application_ref(
+        self,
+        request: Request,
+        body: Dict[str, Any],
+    ) -> Optional[Reference]:
+        baggage = request.state.otel["baggage"]
+
         application_id = (
             # CLEANEST
             baggage.get("ag.refs.application.id")
@@ -173,18 +173,13 @@ class ConfigMiddleware(BaseHTTPMiddleware):
             version=None,
         )
 
-    async def _parse_variant_ref(
+    def _parse_variant_ref(
         self,
         request: Request,
+        body: Dict[str, Any],
     ) -> Optional[Reference]:
         baggage = request.state.otel["baggage"]
 
-        body = {}
-        try:
-            body = await request.json()
-        except:  # pylint: disable=bare-except
-            pass
-
         variant_id = (
             # CLEANEST
             baggage.get("ag.refs.variant.id")
@@ -221,18 +216,13 @@ class ConfigMiddleware(BaseHTTPMiddleware):
             version=variant_version,
         )
 
-    async def _parse_environment_ref(
+    def _parse_environment_ref(
         self,
         request: Request,
+        body: Dict[str, Any],
     ) -> Optional[Reference]:
         baggage = request.state.otel["baggage"]
 
-        body = {}
-        try:
-            body = await request.json()
-        except:  # pylint: disable=bare-except
-            pass
-
         environment_id = (
             # CLEANEST
             baggage.get("ag.refs.environment.id")
@@ -1,21 +1,14 @@
-from typing import Callable
-
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request, FastAPI
+from fastapi import Request
 
 from agenta.sdk.utils.exceptions import suppress
 from agenta.sdk.utils.constants import TRUTHY
 
 
-class InlineMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: FastAPI):
-        super().__init__(app)
-
-    async def dispatch(
+class InlineMiddleware:
+    def __call__(
         self,
         request: Request,
-        call_next: Callable,
-    ):
+    ) -> None:
         request.state.inline = False
 
         with suppress():
@@ -32,5 +25,3 @@ class InlineMiddleware(BaseHTTPMiddleware):
             )
 
             request.state.inline = inline
-
-        return await call_next(request)
@@ -1,20 +1,13 @@
-from typing import Callable
-
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request, FastAPI
+from fastapi import Request
 
 from agenta.sdk.utils.exceptions import suppress
 
 
-class MockMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: FastAPI):
-        super().__init__(app)
-
-    async def dispatch(
+class MockMiddleware:
+    def __call__(
         self,
         request: Request,
-        call_next: Callable,
-    ):
+    ) -> None:
         request.state.mock = None
 
         with suppress():
@@ -28,5 +21,3 @@ class MockMiddleware(BaseHTTPMiddleware):
             )
 
             request.state.mock = mock
-
-        return await call_next(request)
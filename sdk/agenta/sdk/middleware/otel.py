@@ -1,10 +1,4 @@
-from typing import Callable
-
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request, FastAPI
-
-from opentelemetry.baggage.propagation import W3CBaggagePropagator
-from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+from fastapi import Request
 
 from agenta.sdk.utils.exceptions import suppress
 from agenta.sdk.tracing.propagation import extract
@@ -14,11 +8,8 @@ from agenta.sdk.utils.logging import get_module_logger
 log = get_module_logger(__name__)
 
 
-class OTelMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: FastAPI):
-        super().__init__(app)
-
-    async def dispatch(self, request: Request, call_next: Callable):
+class OTelMiddleware:
+    def __call__(self, request: Request) -> None:
         request.state.otel = {"baggage": {}, "traceparent": None}
 
         headers = dict(request.headers)
@@ -30,5 +21,3 @@ class OTelMiddleware(BaseHTTPMiddleware):
             _, traceparent, baggage = extract(headers)
 
             request.state.otel = {"baggage": baggage, "traceparent": traceparent}
-
-        return await call_next(request)
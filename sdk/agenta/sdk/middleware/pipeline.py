@@ -0,0 +1,72 @@
+from asyncio import gather
+
+from fastapi import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from agenta.sdk.middleware.otel import OTelMiddleware
+from agenta.sdk.middleware.auth import AuthMiddleware
+from agenta.sdk.middleware.config import ConfigMiddleware
+from agenta.sdk.middleware.vault import VaultMiddleware
+from agenta.sdk.middleware.inline import InlineMiddleware
+from agenta.sdk.middleware.mock import MockMiddleware
+
+
+class PipelineMiddleware:
+    """
+    Resolves the request context, i.e. otel, auth, config, vault, inline and
+    mock, into the request state, in a single pure ASGI middleware.
+
+    The body is read once and replayed to the application. Config and vault
+    only depend on auth, so they are resolved concurrently.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+        self.otel = OTelMiddleware()
+        self.auth = AuthMiddleware()
+        self.config = ConfigMiddleware()
+        self.vault = VaultMiddleware()
+        self.inline = InlineMiddleware()
+        self.mock = MockMiddleware()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request = Request(scope, receive)
+
+        body = await request.body()
+
+        self.otel(request)
+
+        deny = await self.auth(request)
+
+        if deny is not None:
+            return await deny(scope, receive, send)
+
+        await gather(
+            self.config(request),
+            self.vault(request),
+        )
+
+        self.inline(request)
+        self.mock(request)
+
+        return await self.app(scope, _replay(body, receive), send)
+
+
+def _replay(body: bytes, receive: Receive) -> Receive:
+    replayed = False
+
+    async def _receive() -> Message:
+        nonlocal replayed
+
+        if replayed:
+            return await receive()
+
+        replayed = True
+
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return _receive
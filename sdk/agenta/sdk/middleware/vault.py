@@ -1,13 +1,12 @@
 from os import getenv
 from json import dumps
-from typing import Callable, Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any
 
-import httpx
-from fastapi import FastAPI, Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Request
 
 from agenta.sdk.utils.constants import TRUTHY
-from agenta.sdk.utils.cache import TTLLRUCache
+from agenta.sdk.utils.cache import AsyncCache
+from agenta.sdk.utils.http import get_async_client
 from agenta.sdk.utils.exceptions import suppress, display_exception
 from agenta.client.backend.types import SecretDto as SecretDTO
 from agenta.client.backend.types import (
@@ -26,20 +25,17 @@ for provider_kind in StandardProviderKind.__args__[0].__args__:  # type: ignore
 
 _CACHE_ENABLED = getenv("AGENTA_MIDDLEWARE_CACHE_ENABLED", "false").lower() in TRUTHY
 
-_cache = TTLLRUCache()
+_cache = AsyncCache(namespace="vault", enabled=_CACHE_ENABLED)
 
 
-class VaultMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: FastAPI):
-        super().__init__(app)
-
+class VaultMiddleware:
+    def __init__(self):
         self.host = ag.DEFAULT_AGENTA_SINGLETON_INSTANCE.host
 
-    async def dispatch(
+    async def __call__(
         self,
         request: Request,
-        call_next: Callable,
-    ):
+    ) -> None:
         request.state.vault = {}
 
         with suppress():
@@ -47,8 +43,6 @@ class VaultMiddleware(BaseHTTPMiddleware):
 
             request.state.vault = {"secrets": secrets}
 
-        return await call_next(request)
-
     async def _get_secrets(self, request: Request) -> Optional[Dict]:
         credentials = request.state.auth.get("credentials")
 
@@ -63,14 +57,15 @@ class VaultMiddleware(BaseHTTPMiddleware):
             sort_keys=True,
         )
 
-        if _CACHE_ENABLED:
-            secrets_cache = _cache.get(_hash)
-
-            if secrets_cache:
-                secrets = secrets_cache.get("secrets")
-
-                return secrets
+        return await _cache.get(
+            _hash,
+            lambda: self._fetch_secrets(headers=headers),
+        )
 
+    async def _fetch_secrets(
+        self,
+        headers: Optional[Dict],
+    ) -> List[Dict[str, Any]]:
         local_secrets: List[Dict[str, Any]] = []
 
         try:
@@ -97,17 +92,16 @@ class VaultMiddleware(BaseHTTPMiddleware):
         vault_secrets: List[Dict[str, Any]] = []
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.host}/api/vault/v1/secrets",
-                    headers=headers,
-                )
+            response = await get_async_client().get(
+                f"{self.host}/api/vault/v1/secrets",
+                headers=headers,
+            )
 
-                if response.status_code != 200:
-                    vault_secrets = []
+            if response.status_code != 200:
+                vault_secrets = []
 
-                else:
-                    vault_secrets = response.json()
+            else:
+                vault_secrets = response.json()
         except:  # pylint: disable=bare-except
             display_exception("Vault: Vault Secrets Exception")
 
@@ -131,6 +125,4 @@ class VaultMiddleware(BaseHTTPMiddleware):
 
         secrets = standard_secrets + custom_secrets
 
-        _cache.put(_hash, {"secrets": secrets})
-
         return secrets
@@ -1,8 +1,15 @@
 from fastapi import APIRouter
 
+from agenta.sdk.utils.cache import get_cache_metrics
+
 router = APIRouter()
 
 
 @router.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@router.get("/metrics")
+def metrics():
+    return {"caches": get_cache_metrics()}
@@ -1,4 +1,13 @@
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
+from threading import Lock
+from asyncio import (
+    AbstractEventLoop,
+    Future,
+    TimeoutError as AsyncTimeoutError,
+    get_running_loop,
+    shield,
+    wait_for,
+)
 
 from opentelemetry.baggage import get_all as get_baggage
 from opentelemetry.context import Context
@@ -33,19 +42,23 @@ class TraceProcessor(BatchSpanProcessor):
         super().__init__(
             span_exporter,
             _DEFAULT_MAX_QUEUE_SIZE,
-            5 * 1000 if inline else _DEFAULT_SCHEDULE_DELAY_MILLIS,  # < 5 seconds
+            _DEFAULT_SCHEDULE_DELAY_MILLIS,
             _DEFAULT_MAX_EXPORT_BATCH_SIZE,
-            500 if inline else _DEFAULT_EXPORT_TIMEOUT_MILLIS,  # < 1 second
+            _DEFAULT_EXPORT_TIMEOUT_MILLIS,
         )
 
         self.references = references or dict()
         self.inline = inline is True
 
         # --- INLINE
+        # Inline traces skip the batch queue: once the last span of a trace
+        # ends, the trace is exported right away and its waiters are woken up.
         if self.inline:
             self._registry = dict()
             self._exporter = span_exporter
             self._spans: Dict[int, List[ReadableSpan]] = dict()
+            self._waiters: Dict[int, Tuple[AbstractEventLoop, Future]] = dict()
+            self._lock = Lock()
         # --- INLINE
 
     def on_start(
@@ -78,9 +91,6 @@ class TraceProcessor(BatchSpanProcessor):
     ):
         # --- INLINE
         if self.inline:
-            if self.done:
-                return
-
             if span.context.trace_id not in self._spans:
                 self._spans[span.context.trace_id] = list()
 
@@ -89,6 +99,8 @@ class TraceProcessor(BatchSpanProcessor):
             del self._registry[span.context.trace_id][span.context.span_id]
 
             if len(self._registry[span.context.trace_id]) == 0:
+                del self._registry[span.context.trace_id]
+
                 self.export(span.context.trace_id)
         # --- INLINE
 
@@ -103,15 +115,17 @@ class TraceProcessor(BatchSpanProcessor):
     ):
         # --- INLINE
         if self.inline:
-            spans = self._spans[trace_id]
+            spans = self._spans.pop(trace_id)
 
-            for span in spans:
-                self.queue.appendleft(span)
+            with self._lock:
+                self._exporter.export(spans)
 
-            with self.condition:
-                self.condition.notify()
+                waiter = self._waiters.pop(trace_id, None)
 
-            del self._spans[trace_id]
+            if waiter:
+                loop, future = waiter
+
+                loop.call_soon_threadsafe(_resolve, future)
         # --- INLINE
 
     def force_flush(
@@ -139,6 +153,36 @@ class TraceProcessor(BatchSpanProcessor):
 
         return is_ready
 
+    async def wait(
+        self,
+        trace_id: int,
+        timeout: float,
+    ) -> bool:
+        """Waits until the last span of the trace ends, or the timeout expires."""
+
+        # --- INLINE
+        if self.inline:
+            with self._lock:
+                if self.is_ready(trace_id):
+                    return True
+
+                if trace_id not in self._waiters:
+                    loop = get_running_loop()
+
+                    self._waiters[trace_id] = (loop, loop.create_future())
+
+                _, future = self._waiters[trace_id]
+
+            try:
+                await wait_for(shield(future), timeout)
+
+            except AsyncTimeoutError:
+                with self._lock:
+                    self._waiters.pop(trace_id, None)
+        # --- INLINE
+
+        return self.is_ready(trace_id)
+
     def fetch(
         self,
         trace_id: Optional[int] = None,
@@ -154,3 +198,8 @@ class TraceProcessor(BatchSpanProcessor):
         # --- INLINE
 
         return trace
+
+
+def _resolve(future: Future) -> None:
+    if not future.done():
+        future.set_result(True)
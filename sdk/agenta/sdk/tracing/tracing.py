@@ -46,7 +46,10 @@ class Tracing(metaclass=Singleton):
         # REFERENCES
         self.references: Dict[str, str] = dict()
         # CREDENTIALS
-        self.credentials: TTLLRUCache = TTLLRUCache(ttl=(60 * 60))  # 1 hour x 512 keys
+        self.credentials: TTLLRUCache = TTLLRUCache(
+            ttl=(60 * 60),  # 1 hour x 512 keys
+            namespace="tracing",
+        )
 
         # TRACER PROVIDER
         self.tracer_provider: Optional[TracerProvider] = None
@@ -210,6 +213,19 @@ class Tracing(metaclass=Singleton):
 
         return is_ready
 
+    async def wait_inline_trace(
+        self,
+        trace_id: Optional[int] = None,
+        timeout: float = 1,
+    ) -> bool:
+        is_ready = True
+
+        with suppress():
+            if self.inline and trace_id:
+                is_ready = await self.inline.wait(trace_id, timeout)
+
+        return is_ready
+
     def get_inline_trace(
         self,
         trace_id: Optional[int] = None,
@@ -1,53 +1,372 @@
-from typing import Optional
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
 from os import getenv
+from sys import getsizeof
 from time import time
+from json import dumps
 from collections import OrderedDict
 from threading import Lock
+from asyncio import Future, Task, create_task, ensure_future, shield
+
+from agenta.sdk.utils.logging import get_module_logger
+
+log = get_module_logger(__name__)
 
 CACHE_CAPACITY = int(getenv("AGENTA_MIDDLEWARE_CACHE_CAPACITY", "512"))
 CACHE_TTL = int(getenv("AGENTA_MIDDLEWARE_CACHE_TTL", str(5 * 60)))  # 5 minutes
+CACHE_STALE_TTL = int(getenv("AGENTA_MIDDLEWARE_CACHE_STALE_TTL", "60"))  # 1 minute
+CACHE_MAX_BYTES = int(
+    getenv("AGENTA_MIDDLEWARE_CACHE_MAX_BYTES", str(16 * 1024 * 1024))  # 16 MB
+)
+CACHE_SHARDS = int(getenv("AGENTA_MIDDLEWARE_CACHE_SHARDS", "16"))
+CACHE_SWEEP_INTERVAL = int(getenv("AGENTA_MIDDLEWARE_CACHE_SWEEP_INTERVAL", "60"))
+
+_caches: Dict[str, "TTLLRUCache"] = dict()
+
+
+def _getenv_int(namespace: Optional[str], name: str, default: Any) -> Any:
+    """Reads AGENTA_CACHE_<NAMESPACE>_<NAME>, to tune a namespace on its own."""
+
+    if not namespace:
+        return default
+
+    value = getenv(f"AGENTA_CACHE_{namespace.upper()}_{name}")
+
+    return int(value) if value else default
+
+
+def _sizeof(value: Any) -> int:
+    """Approximates the size of a value by the length of its JSON."""
+
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+
+    try:
+        return len(dumps(value, default=str))
+    except (TypeError, ValueError):  # e.g. circular references
+        return getsizeof(value)
+
+
+def get_cache_metrics() -> Dict[str, Dict[str, int]]:
+    """Returns the counters of all namespaced caches, by namespace."""
+
+    return {namespace: cache.metrics() for namespace, cache in _caches.items()}
+
+
+class _Shard:
+    def __init__(self):
+        self.cache: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self.lock = Lock()
+        self.bytes = 0
+        self.swept_at = time()
+        # METRICS
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.oversized = 0
 
 
 class TTLLRUCache:
+    """
+    TTL LRU cache, bounded by entries and by bytes.
+
+    Keys are spread over shards, each with its own lock, so that concurrent
+    callers rarely contend. Eviction is LRU within a shard. Expired entries
+    are swept from a shard when it is written to, at most once per sweep
+    interval, instead of lingering until they are read. Values larger than
+    the bytes of a shard are not cached, and counted as oversized.
+
+    Caches with a namespace, e.g. "auth", are listed by get_cache_metrics(),
+    and can be tuned with AGENTA_CACHE_<NAMESPACE>_CAPACITY, _TTL, _STALE_TTL
+    and _MAX_BYTES.
+    """
+
     def __init__(
         self,
         capacity: Optional[int] = CACHE_CAPACITY,
         ttl: Optional[int] = CACHE_TTL,
+        stale_ttl: Optional[int] = 0,
+        max_bytes: Optional[int] = CACHE_MAX_BYTES,
+        namespace: Optional[str] = None,
+        shards: Optional[int] = CACHE_SHARDS,
     ):
-        self.cache = OrderedDict()
-        self.capacity = capacity
-        self.ttl = ttl
-        self.lock = Lock()
+        self.namespace = namespace
+        self.capacity = _getenv_int(namespace, "CAPACITY", capacity)
+        self.ttl = _getenv_int(namespace, "TTL", ttl)
+        # How long expired entries are kept, to be served while revalidated
+        self.stale_ttl = _getenv_int(namespace, "STALE_TTL", stale_ttl)
+        self.max_bytes = _getenv_int(namespace, "MAX_BYTES", max_bytes)
+
+        self.shards = [_Shard() for _ in range(max(1, min(shards, self.capacity)))]
+        self.shard_capacity = -(-self.capacity // len(self.shards))
+        self.shard_max_bytes = self.max_bytes // len(self.shards)
+
+        if namespace:
+            _caches[namespace] = self
+
+    def _shard(self, key) -> _Shard:
+        return self.shards[hash(key) % len(self.shards)]
 
     def get(self, key):
-        with self.lock:
+        value, stale = self.lookup(key)
+
+        if stale:
+            return None
+
+        return value
+
+    def lookup(self, key) -> Tuple[Any, bool]:
+        """Returns the value of the key, and whether it is stale, i.e. expired."""
+
+        shard = self._shard(key)
+
+        with shard.lock:
             # Get
-            value, expiry = self.cache.get(key, (None, None))
+            value, expiry, _ = shard.cache.get(key, (None, None, None))
 
             # Null check
             if value is None:
-                return None
+                shard.misses += 1
+                return None, False
 
             # TTL check
-            if time() > expiry:
-                del self.cache[key]
-                return None
+            now = time()
+
+            if now > expiry + self.stale_ttl:
+                self._remove(shard, key)
+                shard.expirations += 1
+                shard.misses += 1
+                return None, False
 
             # LRU update
-            self.cache.move_to_end(key)
+            shard.cache.move_to_end(key)
+
+            stale = now > expiry
 
-            return value
+            if stale:
+                shard.misses += 1
+            else:
+                shard.hits += 1
+
+            return value, stale
 
     def put(self, key, value):
-        with self.lock:
-            try:
-                # LRU update
-                self.cache.move_to_end(key)
+        size = _sizeof(value)
+
+        shard = self._shard(key)
+
+        with shard.lock:
+            now = time()
 
-            except KeyError:
-                # Capacity check
-                if len(self.cache) >= self.capacity:
-                    self.cache.popitem(last=False)
+            if now - shard.swept_at > CACHE_SWEEP_INTERVAL:
+                self._sweep(shard, now)
 
             # Put
-            self.cache[key] = (value, time() + self.ttl)
+            if key in shard.cache:
+                self._remove(shard, key)
+
+            if size > self.shard_max_bytes:
+                shard.oversized += 1
+                return
+
+            shard.cache[key] = (value, now + self.ttl, size)
+            shard.bytes += size
+
+            # Capacity check
+            while (
+                len(shard.cache) > self.shard_capacity
+                or shard.bytes > self.shard_max_bytes
+            ):
+                self._remove(shard, next(iter(shard.cache)))
+                shard.evictions += 1
+
+    def pop(self, key):
+        shard = self._shard(key)
+
+        with shard.lock:
+            if key not in shard.cache:
+                return None
+
+            return self._remove(shard, key)
+
+    def expire(self):
+        """Drops expired entries from all shards."""
+
+        now = time()
+
+        for shard in self.shards:
+            with shard.lock:
+                self._sweep(shard, now)
+
+    def clear(self):
+        for shard in self.shards:
+            with shard.lock:
+                shard.cache.clear()
+                shard.bytes = 0
+
+    def metrics(self) -> Dict[str, int]:
+        metrics = dict(
+            entries=0,
+            bytes=0,
+            hits=0,
+            misses=0,
+            evictions=0,
+            expirations=0,
+            oversized=0,
+        )
+
+        for shard in self.shards:
+            metrics["entries"] += len(shard.cache)
+            metrics["bytes"] += shard.bytes
+            metrics["hits"] += shard.hits
+            metrics["misses"] += shard.misses
+            metrics["evictions"] += shard.evictions
+            metrics["expirations"] += shard.expirations
+            metrics["oversized"] += shard.oversized
+
+        return metrics
+
+    def _remove(self, shard: _Shard, key):
+        value, _, size = shard.cache.pop(key)
+
+        shard.bytes -= size
+
+        return value
+
+    def _sweep(self, shard: _Shard, now: float):
+        expired = [
+            key
+            for key, (_, expiry, _) in shard.cache.items()
+            if now > expiry + self.stale_ttl
+        ]
+
+        for key in expired:
+            self._remove(shard, key)
+
+        shard.expirations += len(expired)
+        shard.swept_at = now
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into a single in-flight call,
+    whose result, or exception, is shared by all callers.
+    """
+
+    def __init__(self):
+        self.flights: Dict[Hashable, Future] = dict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.flights
+
+    async def do(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        flight = self.flights.get(key)
+
+        if flight is None:
+            flight = ensure_future(fetch())
+
+            self.flights[key] = flight
+
+            flight.add_done_callback(lambda _: self._land(key, flight))
+
+        # A cancelled caller must not cancel the call shared with the others
+        return await shield(flight)
+
+    def _land(self, key: Hashable, flight: Future) -> None:
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+
+        if not flight.cancelled():
+            flight.exception()  # retrieved, even if no caller is left to raise it
+
+
+class AsyncCache:
+    """
+    Async read-through cache, in front of a TTL LRU cache.
+
+    Concurrent misses for the same key share a single fetch. Stale hits are
+    served right away and refreshed in the background, so that hot keys do
+    not wait on the fetch once warm. Failed refreshes drop the entry, so that
+    the next call fetches it again.
+    """
+
+    def __init__(
+        self,
+        capacity: Optional[int] = CACHE_CAPACITY,
+        ttl: Optional[int] = CACHE_TTL,
+        stale_ttl: Optional[int] = CACHE_STALE_TTL,
+        max_bytes: Optional[int] = CACHE_MAX_BYTES,
+        namespace: Optional[str] = None,
+        enabled: bool = True,
+    ):
+        self.cache = TTLLRUCache(
+            capacity=capacity,
+            ttl=ttl,
+            stale_ttl=stale_ttl,
+            max_bytes=max_bytes,
+            namespace=namespace,
+        )
+        self.enabled = enabled
+
+        self._flights = SingleFlight()
+        self._refreshes: Set[Task] = set()
+
+    async def get(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        if self.enabled:
+            value, stale = self.cache.lookup(key)
+
+            if value is not None:
+                if stale:
+                    self._refresh(key, fetch)
+
+                return value
+
+        return await self._flights.do(key, lambda: self._fetch(key, fetch))
+
+    async def _fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        value = await fetch()
+
+        if self.enabled:
+            self.cache.put(key, value)
+
+        return value
+
+    def _refresh(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> None:
+        if key in self._flights:
+            return
+
+        refresh = create_task(self._revalidate(key, fetch))
+
+        # Keep a reference, so that the task is not garbage collected midway
+        self._refreshes.add(refresh)
+
+        refresh.add_done_callback(self._refreshes.discard)
+
+    async def _revalidate(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> None:
+        try:
+            await self._flights.do(key, lambda: self._fetch(key, fetch))
+
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            log.debug(f"Failed to revalidate cache entry: {exc}")
+
+            self.cache.pop(key)
@@ -0,0 +1,60 @@
+from typing import Optional
+from os import getenv
+from importlib.util import find_spec
+
+import httpx
+
+from agenta.sdk.utils.constants import TRUTHY
+
+HTTP_MAX_CONNECTIONS = int(getenv("AGENTA_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(
+    getenv("AGENTA_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")
+)
+HTTP_KEEPALIVE_EXPIRY = float(getenv("AGENTA_HTTP_KEEPALIVE_EXPIRY", "30"))  # seconds
+HTTP_TIMEOUT = float(getenv("AGENTA_HTTP_TIMEOUT", "5"))  # seconds
+HTTP_CONNECT_TIMEOUT = float(getenv("AGENTA_HTTP_CONNECT_TIMEOUT", "5"))  # seconds
+# HTTP/2 requires the optional 'h2' package, i.e. httpx[http2]
+HTTP2_ENABLED = getenv("AGENTA_HTTP2_ENABLED", "true").lower() in TRUTHY
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide async HTTP client, creating it if needed.
+
+    The client pools and keeps connections alive across requests, so that
+    calls to the Agenta API do not pay for TCP and TLS setup every time.
+    Do not close it, see close_async_client() instead.
+    """
+
+    global _client  # pylint: disable=global-statement
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED and find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                HTTP_TIMEOUT,
+                connect=HTTP_CONNECT_TIMEOUT,
+            ),
+        )
+
+    return _client
+
+
+async def open_async_client() -> None:
+    get_async_client()
+
+
+async def close_async_client() -> None:
+    global _client  # pylint: disable=global-statement
+
+    if _client is not None:
+        client, _client = _client, None
+
+        await client.aclose()
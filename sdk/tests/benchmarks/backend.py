@@ -0,0 +1,80 @@
+"""
+Local stub of the Agenta API, for the SDK benchmarks.
+
+It answers the calls of the SDK middlewares, i.e. credentials, configs and
+secrets, after an optional delay, and accepts exported traces. It is served
+by uvicorn on a free local port, so that requests go through real TCP
+connections.
+"""
+
+from time import sleep
+from asyncio import sleep as async_sleep
+from threading import Thread
+from contextlib import contextmanager
+from typing import Iterator
+
+import uvicorn
+from fastapi import FastAPI
+
+
+def make_backend(delay: float = 0.0) -> FastAPI:
+    backend = FastAPI()
+
+    @backend.get("/api/permissions/verify")
+    async def verify_permissions():
+        await async_sleep(delay)
+
+        return {"effect": "allow", "credentials": "ApiKey benchmark"}
+
+    @backend.post("/api/variants/configs/fetch")
+    async def fetch_config():
+        await async_sleep(delay)
+
+        return {
+            "params": {"prompt": "benchmark"},
+            "application_ref": {"id": "0190e436-818a-7c97-83b4-d7af4bd23e99"},
+        }
+
+    @backend.get("/api/vault/v1/secrets")
+    async def list_secrets():
+        await async_sleep(delay)
+
+        return []
+
+    @backend.post("/api/otlp/v1/traces")
+    async def ingest_traces():
+        return {}
+
+    return backend
+
+
+@contextmanager
+def serve_backend(delay: float = 0.0) -> Iterator[str]:
+    """Serves the stub in a background thread, and yields its base URL."""
+
+    server = uvicorn.Server(
+        uvicorn.Config(
+            make_backend(delay),
+            host="127.0.0.1",
+            port=0,
+            log_level="warning",
+            lifespan="off",
+        )
+    )
+
+    thread = Thread(target=server.run, daemon=True)
+    thread.start()
+
+    while not server.started:
+        sleep(0.01)
+
+    (socket,) = server.servers[0].sockets
+    host, port = socket.getsockname()[:2]
+
+    try:
+        yield f"http://{host}:{port}"
+
+    finally:
+        server.should_exit = True
+
+        thread.join()
@@ -0,0 +1,83 @@
+"""
+Latency of the backend calls of the SDK middlewares, i.e. credentials, config
+and secrets, against a local stub of the Agenta API, with a fresh client per
+call, as before, and with the shared pooled client.
+
+    cd sdk && python -m tests.benchmarks.http_client [--requests 500] [--delay 0]
+"""
+
+from statistics import median, quantiles
+from time import perf_counter
+from argparse import ArgumentParser
+from asyncio import run
+from typing import List
+
+import httpx
+
+from agenta.sdk.utils.http import get_async_client, close_async_client
+from tests.benchmarks.backend import serve_backend
+
+# THE CALLS OF AN INVOCATION THAT MISSES THE CACHES
+_CALLS = (
+    ("GET", "/api/permissions/verify"),
+    ("POST", "/api/variants/configs/fetch"),
+    ("GET", "/api/vault/v1/secrets"),
+)
+
+
+async def _fresh(host: str) -> None:
+    for method, path in _CALLS:
+        async with httpx.AsyncClient() as client:
+            response = await client.request(method, f"{host}{path}", json={})
+
+        response.raise_for_status()
+
+
+async def _pooled(host: str) -> None:
+    client = get_async_client()
+
+    for method, path in _CALLS:
+        response = await client.request(method, f"{host}{path}", json={})
+
+        response.raise_for_status()
+
+
+def _report(name: str, timings: List[float]) -> None:
+    p99 = quantiles(timings, n=100)[-1]
+
+    print(
+        f"{name:<6}: p50 {median(timings) * 1000:6.2f}ms, "
+        f"p99 {p99 * 1000:6.2f}ms per invocation",
+        flush=True,
+    )
+
+
+async def main(requests: int, delay: float) -> None:
+    with serve_backend(delay) as host:
+        for name, invoke in (("fresh", _fresh), ("pooled", _pooled)):
+            # WARM UP, e.g. THE POOL AND THE STUB
+            for _ in range(10):
+                await invoke(host)
+
+            timings = []
+
+            for _ in range(requests):
+                start = perf_counter()
+
+                await invoke(host)
+
+                timings.append(perf_counter() - start)
+
+            _report(name, timings)
+
+        await close_async_client()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--delay", type=float, default=0.0)
+
+    args = parser.parse_args()
+
+    run(main(args.requests, args.delay))
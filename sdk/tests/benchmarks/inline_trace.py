@@ -0,0 +1,90 @@
+"""
+Latency of playground calls, i.e. /test on a no-op instrumented workflow,
+which returns its trace inline, with credentials resolved by a local stub of
+the Agenta API.
+
+    cd sdk && python -m tests.benchmarks.inline_trace [--requests 100] [--delay 0]
+"""
+
+from statistics import median, quantiles
+from time import perf_counter
+from argparse import ArgumentParser
+from asyncio import run
+
+import httpx
+from pydantic import BaseModel
+
+import agenta as ag
+from agenta.sdk.utils.http import close_async_client
+from tests.benchmarks.backend import serve_backend
+
+
+class NoopConfig(BaseModel):
+    prompt: str = ""
+
+
+async def main(requests: int, delay: float) -> None:
+    with serve_backend(delay) as host:
+        ag.init(host=host, api_key="benchmark")
+
+        # ROUTES ARE MOUNTED ON THE APP OF THE SDK, SO IMPORT IT AFTER init()
+        from agenta.sdk.decorators.routing import app
+
+        @ag.route("/", config_schema=NoopConfig)
+        @ag.instrument()
+        async def noop(text: str = "") -> str:
+            return text
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+
+            async def call() -> bool:
+                response = await client.post(
+                    "/test",
+                    params={"project_id": "0190e436-818a-7c97-83b4-d7af4bd23e9a"},
+                    headers={"Authorization": "ApiKey benchmark"},
+                    json={"text": "benchmark", "ag_config": {"prompt": "benchmark"}},
+                )
+
+                response.raise_for_status()
+
+                return bool(response.json().get("tree"))
+
+            # WARM UP, e.g. THE CACHES AND THE POOL
+            for _ in range(10):
+                await call()
+
+            timings = []
+            trees = 0
+
+            for _ in range(requests):
+                start = perf_counter()
+
+                trees += await call()
+
+                timings.append(perf_counter() - start)
+
+        # EXPORT THE TRACES WHILE THE STUB IS UP
+        ag.tracing.tracer_provider.force_flush()
+
+        await close_async_client()
+
+    p99 = quantiles(timings, n=100)[-1]
+
+    print(
+        f"/test: p50 {median(timings) * 1000:6.2f}ms, "
+        f"p99 {p99 * 1000:6.2f}ms per call, "
+        f"{trees}/{requests} with a trace",
+        flush=True,
+    )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.0)
+
+    args = parser.parse_args()
+
+    run(main(args.requests, args.delay))
@@ -0,0 +1,174 @@
+from asyncio import Event, gather, sleep, wait_for
+
+import pytest
+
+import agenta.sdk.utils.cache as cache_module
+from agenta.sdk.utils.cache import AsyncCache, SingleFlight
+
+
+class Backend:
+    """Counts fetches, and holds them until released, to make them overlap."""
+
+    def __init__(self, value="v1"):
+        self.value = value
+        self.calls = 0
+        self.released = Event()
+        self.released.set()
+
+    async def fetch(self):
+        self.calls += 1
+
+        await self.released.wait()
+
+        if isinstance(self.value, Exception):
+            raise self.value
+
+        return self.value
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    class Clock:
+        now = 1000.0
+
+    monkeypatch.setattr(cache_module, "time", lambda: Clock.now)
+
+    return Clock
+
+
+async def test_single_flight_coalesces_concurrent_calls():
+    flights = SingleFlight()
+    backend = Backend()
+    backend.released.clear()
+
+    calls = gather(*(flights.do("key", backend.fetch) for _ in range(10)))
+
+    await sleep(0)
+
+    assert "key" in flights
+
+    backend.released.set()
+
+    assert await calls == ["v1"] * 10
+    assert backend.calls == 1
+    assert "key" not in flights
+
+
+async def test_single_flight_shares_exceptions_and_lands():
+    flights = SingleFlight()
+    backend = Backend(ValueError("down"))
+
+    results = await gather(
+        flights.do("key", backend.fetch),
+        flights.do("key", backend.fetch),
+        return_exceptions=True,
+    )
+
+    assert [type(result) for result in results] == [ValueError, ValueError]
+    assert backend.calls == 1
+    assert "key" not in flights
+
+
+async def test_single_flight_survives_cancelled_callers():
+    flights = SingleFlight()
+    backend = Backend()
+    backend.released.clear()
+
+    first = gather(flights.do("key", backend.fetch))
+    second = gather(flights.do("key", backend.fetch))
+
+    await sleep(0)
+
+    first.cancel()
+
+    backend.released.set()
+
+    assert await second == ["v1"]
+    assert backend.calls == 1
+
+
+async def test_async_cache_fetches_once_then_hits():
+    cache = AsyncCache(capacity=8, ttl=60, stale_ttl=60)
+    backend = Backend()
+
+    assert await cache.get("key", backend.fetch) == "v1"
+    assert await cache.get("key", backend.fetch) == "v1"
+
+    assert backend.calls == 1
+    assert cache.cache.metrics()["hits"] == 1
+
+
+async def test_async_cache_coalesces_concurrent_misses():
+    cache = AsyncCache(capacity=8, ttl=60)
+    backend = Backend()
+    backend.released.clear()
+
+    calls = gather(*(cache.get("key", backend.fetch) for _ in range(100)))
+
+    await sleep(0)
+
+    backend.released.set()
+
+    assert await calls == ["v1"] * 100
+    assert backend.calls == 1
+
+
+async def test_async_cache_serves_stale_and_revalidates(clock):
+    cache = AsyncCache(capacity=8, ttl=60, stale_ttl=60)
+    backend = Backend()
+
+    await cache.get("key", backend.fetch)
+
+    clock.now += 61
+    backend.value = "v2"
+    backend.released.clear()
+
+    # STALE, SO SERVED RIGHT AWAY, WHILE REFRESHED IN THE BACKGROUND
+    assert await wait_for(cache.get("key", backend.fetch), timeout=1) == "v1"
+
+    backend.released.set()
+
+    await gather(*cache._refreshes)
+
+    assert await cache.get("key", backend.fetch) == "v2"
+    assert backend.calls == 2
+
+
+async def test_async_cache_drops_entries_that_fail_to_revalidate(clock):
+    cache = AsyncCache(capacity=8, ttl=60, stale_ttl=60)
+    backend = Backend()
+
+    await cache.get("key", backend.fetch)
+
+    clock.now += 61
+    backend.value = ValueError("down")
+
+    assert await cache.get("key", backend.fetch) == "v1"
+
+    await gather(*cache._refreshes)
+
+    assert cache.cache.lookup("key") == (None, False)
+
+
+async def test_async_cache_fetches_expired_entries_again(clock):
+    cache = AsyncCache(capacity=8, ttl=60, stale_ttl=60)
+    backend = Backend()
+
+    await cache.get("key", backend.fetch)
+
+    clock.now += 121
+    backend.value = "v2"
+
+    assert await cache.get("key", backend.fetch) == "v2"
+    assert backend.calls == 2
+
+
+async def test_disabled_async_cache_fetches_every_time_and_stores_nothing():
+    cache = AsyncCache(capacity=8, ttl=60, enabled=False)
+    backend = Backend()
+
+    assert await cache.get("key", backend.fetch) == "v1"
+    assert await cache.get("key", backend.fetch) == "v1"
+
+    assert backend.calls == 2
+    assert cache.cache.metrics()["entries"] == 0
@@ -0,0 +1,138 @@
+import pytest
+
+import agenta.sdk.utils.cache as cache_module
+from agenta.sdk.utils.cache import TTLLRUCache, _sizeof, get_cache_metrics
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    class Clock:
+        now = 1000.0
+
+    monkeypatch.setattr(cache_module, "time", lambda: Clock.now)
+
+    return Clock
+
+
+def test_sizeof():
+    assert _sizeof("abc") == 3
+    assert _sizeof(b"abcd") == 4
+    assert _sizeof({"a": [1, 2]}) == len('{"a": [1, 2]}')
+
+    circular = []
+    circular.append(circular)
+
+    assert _sizeof(circular) > 0
+
+
+def test_hit_and_miss():
+    cache = TTLLRUCache(capacity=8, ttl=60, shards=1)
+
+    assert cache.get("key") is None
+
+    cache.put("key", "value")
+
+    assert cache.get("key") == "value"
+    assert cache.metrics()["hits"] == 1
+    assert cache.metrics()["misses"] == 1
+
+
+def test_entries_expire(clock):
+    cache = TTLLRUCache(capacity=8, ttl=60, shards=1)
+
+    cache.put("key", "value")
+
+    clock.now += 61
+
+    assert cache.get("key") is None
+    assert cache.metrics()["expirations"] == 1
+    assert cache.metrics()["entries"] == 0
+
+
+def test_stale_entries_are_looked_up_as_stale(clock):
+    cache = TTLLRUCache(capacity=8, ttl=60, stale_ttl=60, shards=1)
+
+    cache.put("key", "value")
+
+    clock.now += 61
+
+    assert cache.lookup("key") == ("value", True)
+    assert cache.get("key") is None
+
+    clock.now += 60
+
+    assert cache.lookup("key") == (None, False)
+
+
+def test_expired_entries_are_swept_on_write(clock, monkeypatch):
+    monkeypatch.setattr(cache_module, "CACHE_SWEEP_INTERVAL", 10)
+
+    cache = TTLLRUCache(capacity=8, ttl=60, shards=1)
+
+    cache.put("a", "value")
+
+    clock.now += 61
+
+    cache.put("b", "value")
+
+    assert cache.metrics()["entries"] == 1
+    assert cache.metrics()["expirations"] == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = TTLLRUCache(capacity=2, ttl=60, shards=1)
+
+    cache.put("a", "value")
+    cache.put("b", "value")
+    cache.get("a")
+    cache.put("c", "value")
+
+    assert cache.get("a") == "value"
+    assert cache.get("b") is None
+    assert cache.metrics()["evictions"] == 1
+
+
+def test_entries_are_evicted_by_bytes():
+    cache = TTLLRUCache(capacity=8, ttl=60, max_bytes=10, shards=1)
+
+    cache.put("a", "x" * 6)
+    cache.put("b", "x" * 6)
+
+    assert cache.get("a") is None
+    assert cache.metrics()["bytes"] == 6
+    assert cache.metrics()["evictions"] == 1
+
+
+def test_oversized_values_are_counted_and_not_cached():
+    cache = TTLLRUCache(capacity=8, ttl=60, max_bytes=10, shards=1)
+
+    cache.put("key", "small")
+    cache.put("key", "x" * 11)
+
+    assert cache.get("key") is None
+    assert cache.metrics()["oversized"] == 1
+    assert cache.metrics()["bytes"] == 0
+
+
+def test_pop_and_clear():
+    cache = TTLLRUCache(capacity=8, ttl=60)
+
+    cache.put("a", "value")
+    cache.put("b", "value")
+
+    assert cache.pop("a") == "value"
+    assert cache.pop("a") is None
+
+    cache.clear()
+
+    assert cache.metrics()["entries"] == cache.metrics()["bytes"] == 0
+
+
+def test_namespaces_are_tuned_and_listed(monkeypatch):
+    monkeypatch.setattr(cache_module, "_caches", dict())
+    monkeypatch.setenv("AGENTA_CACHE_UNITTEST_TTL", "5")
+
+    cache = TTLLRUCache(capacity=8, ttl=60, namespace="unittest")
+
+    assert cache.ttl == 5
+    assert get_cache_metrics()["unittest"] == cache.metrics()